@@ -0,0 +1,82 @@
+"""
+ASGI config for backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with uvicorn (SERVER_MODE=asgi in docker-entrypoint.sh) to enable
+the event stream endpoint, which holds one connection open per subscriber.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import asyncio
+import os
+import time
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+loading_started = time.monotonic()
+django_application = get_asgi_application()
+
+
+def _wants_event_stream(scope):
+    for name, value in scope.get('headers', []):
+        if name == b'accept' and b'text/event-stream' in value:
+            return True
+    return False
+
+
+class StreamDisconnectMiddleware:
+    """
+    Cancels event stream responses when the client goes away.
+
+    Django 4.2 stops reading from the connection once the request body is
+    in, so an idle stream never learns that its client disconnected. For
+    requests accepting text/event-stream this keeps listening for
+    http.disconnect and cancels the response, which unsubscribes it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not _wants_event_stream(scope):
+            return await self.app(scope, receive, send)
+
+        body_read = asyncio.Event()
+
+        async def receive_body():
+            message = await receive()
+            if message['type'] != 'http.request' or not message.get('more_body', False):
+                body_read.set()
+            return message
+
+        response = asyncio.ensure_future(self.app(scope, receive_body, send))
+
+        async def watch():
+            await body_read.wait()
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    response.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await response
+        except asyncio.CancelledError:
+            # Swallow our own cancellation; re-raise a server shutdown
+            if not watcher.done() or watcher.cancelled():
+                raise
+        finally:
+            watcher.cancel()
+
+
+application = StreamDisconnectMiddleware(django_application)
+
+from backend import startup  # noqa: E402 (needs the settings configured above)
+
+startup.warm_up()
+startup.report_ready('asgi', loading_started)
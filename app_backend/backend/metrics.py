@@ -1,37 +1,276 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Request metrics are labelled with the view's URL name (get_tickets,
+update_ticket, ...) or, for unnamed routes, the route template, never the
+raw path: /tickets/1234 and /comments/<uuid> would otherwise mint a new
+time series per id. Requests that match no route share one label.
+
+Queries are counted and timed per request through an execute wrapper
+installed on every database connection as it opens. The request's
+QueryRecorder lives in a context variable, which also follows the ORM into
+the worker threads async views run their queries in. It is the only query
+hook in the project: the profilers (backend/profiling.py,
+backend/request_profiler.py) ask it to keep the statements too.
+"""
 import time
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from django.db.backends.signals import connection_created
 from django.http import HttpResponse
 
+UNMATCHED = "<unmatched>"
+# Anything else is labelled "other", so made-up methods can't add series
+METHODS = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+
+# Bucket bounds for what this API serves: most reads take a few
+# milliseconds and a few queries, board pages run to a few hundred KB
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
 
 http_request_total = Counter(
     "django_http_requests_total",
     "Total HTTP requests",
-    ["method", "path", "status"],
+    ["method", "view", "status"],
 )
 
 http_request_duration_seconds = Histogram(
     "django_http_request_duration_seconds",
     "HTTP request latency in seconds",
-    ["method", "path"],
+    ["method", "view"],
+    buckets=LATENCY_BUCKETS,
+)
+
+http_requests_in_progress = Gauge(
+    "django_http_requests_in_progress",
+    "HTTP requests being handled by this process",
+    ["method"],
+)
+
+http_response_size_bytes = Histogram(
+    "django_http_response_size_bytes",
+    "Response body size in bytes (streaming responses are not counted)",
+    ["method", "view"],
+    buckets=SIZE_BUCKETS,
+)
+
+db_queries_per_request = Histogram(
+    "django_db_queries_per_request",
+    "Database queries run while handling a request",
+    ["method", "view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+db_query_duration_seconds = Histogram(
+    "django_db_query_duration_seconds",
+    "Time spent in database queries while handling a request",
+    ["method", "view"],
+    buckets=DB_TIME_BUCKETS,
+)
+
+db_n_plus_one_total = Counter(
+    "django_db_n_plus_one_total",
+    "Requests that repeated a statement often enough to look like an N+1 (QUERY_PROFILER only)",
+    ["view"],
+)
+
+db_pool_connections = Gauge(
+    "db_pool_connections",
+    "Connections of this process's pool (DATABASE_POOL only), by state",
+    ["alias", "state"],
+)
+
+db_pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent getting a connection from the pool, including opening one",
+    ["alias"],
+    buckets=DB_TIME_BUCKETS,
+)
+
+db_pool_connections_opened_total = Counter(
+    "db_pool_connections_opened_total",
+    "Database connections opened by the pool",
+    ["alias"],
+)
+
+db_pool_connections_closed_total = Counter(
+    "db_pool_connections_closed_total",
+    "Database connections the pool closed, by reason",
+    ["alias", "reason"],
+)
+
+db_pool_timeouts_total = Counter(
+    "db_pool_timeouts_total",
+    "Requests that gave up waiting for a pooled connection",
+    ["alias"],
+)
+
+auth_user_cache_hits_total = Counter(
+    "auth_user_cache_hits_total",
+    "Authenticated requests whose user was served from the per-process cache",
+)
+
+auth_user_cache_misses_total = Counter(
+    "auth_user_cache_misses_total",
+    "Authenticated requests that had to look up the token and user",
+)
+
+notification_emails_saved_total = Counter(
+    "notification_emails_saved_total",
+    "Notification emails not sent because they were coalesced into a digest",
+)
+
+board_snapshot_requests_total = Counter(
+    "board_snapshot_requests_total",
+    "Snapshot cache lookups for read endpoints",
+    ["snapshot", "result"],
+)
+
+board_event_subscribers = Gauge(
+    "board_event_subscribers",
+    "Open event stream subscriptions in this process",
 )
 
+board_events_dropped_total = Counter(
+    "board_events_dropped_total",
+    "Event stream subscribers disconnected for falling behind",
+)
+
+
+class QueryRecorder:
+    """Queries of one request: their count and time, and optionally the statements."""
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # [(duration, sql, params, alias)] once keep_statements() is called
+        self.statements = None
+
+    def keep_statements(self):
+        if self.statements is None:
+            self.statements = []
+
+
+# Recorder of the request being handled, None outside requests
+_recorder = ContextVar("query_recorder", default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        recorder.count += 1
+        recorder.duration += duration
+        if recorder.statements is not None:
+            recorder.statements.append((duration, sql, None if many else params, context["connection"].alias))
+
+
+def _install_query_wrapper(sender, connection, **kwargs):
+    # Fires again when a closed connection reconnects
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_wrapper)
+
+
+@contextmanager
+def recording_queries(statements=False):
+    """
+    Record the queries run inside the block and yield the QueryRecorder.
+    Nested blocks share the outermost recorder, so the metrics and the
+    profilers of one request count its queries once.
+    """
+    recorder = _recorder.get()
+    token = None
+    if recorder is None:
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+    if statements:
+        recorder.keep_statements()
+    try:
+        yield recorder
+    finally:
+        if token is not None:
+            _recorder.reset(token)
+
+
+def view_label(request):
+    """Low-cardinality label for the view that handled `request`."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED
+    return match.url_name or match.route
+
+
+def _method_label(request):
+    return request.method if request.method in METHODS else "other"
+
+
+def _response_size(response):
+    if getattr(response, "streaming", False):
+        return None
+    return len(response.content)
+
 
 class PrometheusMiddleware:
+    # Runs natively under ASGI too, so async views (event streams) don't
+    # each get pinned to a worker thread
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
-    def __call__(self, request):
-        start = time.perf_counter()
-        response = self.get_response(request)
-        duration = time.perf_counter() - start
-
-        path = request.path
-        method = request.method
+    def _observe(self, request, response, duration, stats):
+        method = _method_label(request)
+        view = view_label(request)
         status = getattr(response, "status_code", 500)
 
-        http_request_duration_seconds.labels(method, path).observe(duration)
-        http_request_total.labels(method, path, status).inc()
+        http_request_duration_seconds.labels(method, view).observe(duration)
+        http_request_total.labels(method, view, status).inc()
+        db_queries_per_request.labels(method, view).observe(stats.count)
+        db_query_duration_seconds.labels(method, view).observe(stats.duration)
+        size = _response_size(response)
+        if size is not None:
+            http_response_size_bytes.labels(method, view).observe(size)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        in_progress = http_requests_in_progress.labels(_method_label(request))
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            with recording_queries() as stats:
+                response = self.get_response(request)
+        finally:
+            in_progress.dec()
+        self._observe(request, response, time.perf_counter() - start, stats)
+        return response
 
+    async def __acall__(self, request):
+        in_progress = http_requests_in_progress.labels(_method_label(request))
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            with recording_queries() as stats:
+                response = await self.get_response(request)
+        finally:
+            in_progress.dec()
+        self._observe(request, response, time.perf_counter() - start, stats)
         return response
 
 
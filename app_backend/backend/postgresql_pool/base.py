@@ -0,0 +1,221 @@
+"""
+PostgreSQL backend with a per-process connection pool (DATABASE_POOL=true).
+
+Django's own backend gives every thread its own connection and keeps it
+for CONN_MAX_AGE, so each worker thread holds a server connection whether
+it is busy or not, and every new one pays the TCP, TLS and auth handshake.
+Here a request checks a connection out of the pool when it first touches
+the database and hands it back when Django closes it at the end of the
+request (CONN_MAX_AGE is 0), so threads share warm connections and only
+the pool's growth pays for handshakes.
+
+The pool is configured by OPTIONS["pool"], the key Django 5.1's own pool
+reads: max_size, timeout, max_lifetime and max_idle (see settings.py).
+Connections come back rolled back if a transaction was left open; ones
+that sat idle for a while are pinged before reuse, and ones that broke or
+outlived max_lifetime are replaced.
+
+Pools are per process, so max_size x workers x pods must stay under the
+server's max_connections. To share connections across processes and pods,
+put PgBouncer in front instead (DATABASE_POOLER).
+"""
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+from django.db.backends.postgresql.base import Database, DatabaseWrapper as PostgresDatabaseWrapper
+from django.utils.asyncio import async_unsafe
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from backend.metrics import (
+    db_pool_connections,
+    db_pool_connections_closed_total,
+    db_pool_connections_opened_total,
+    db_pool_timeouts_total,
+    db_pool_wait_seconds,
+)
+
+# Connections idle for longer than this many seconds get a SELECT 1 before
+# they are handed out; fresher ones are assumed to be fine
+CHECK_AFTER_IDLE = 5
+
+# Pools inherited from a parent process. Their sockets belong to the parent:
+# keep them referenced so garbage collection never closes its sessions.
+_inherited = []
+
+
+class ConnectionPool:
+    """Thread-safe pool of open connections to one database."""
+
+    def __init__(self, alias, max_size=10, timeout=10, max_lifetime=1800, max_idle=300):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.pid = os.getpid()
+        # (connection, returned_at), most recently returned last
+        self._idle = deque()
+        # id(connection) -> opened_at of every connection the pool opened
+        self._opened = {}
+        # Open connections, idle or in use, plus those being opened
+        self._size = 0
+        self._condition = threading.Condition()
+        self._idle_gauge = db_pool_connections.labels(alias, 'idle')
+        self._in_use_gauge = db_pool_connections.labels(alias, 'in_use')
+
+    def getconn(self, connect):
+        """A connection from the pool, opened with `connect()` if none is idle."""
+        started = time.monotonic()
+        while True:
+            connection, returned_at = self._checkout(started + self.timeout)
+            if connection is None:
+                connection = self._open(connect)
+                break
+            now = time.monotonic()
+            if now - self._opened[id(connection)] > self.max_lifetime:
+                self.discard(connection, 'lifetime')
+            elif now - returned_at > CHECK_AFTER_IDLE and not self._usable(connection):
+                self.discard(connection, 'broken')
+            else:
+                break
+        db_pool_wait_seconds.labels(self.alias).observe(time.monotonic() - started)
+        return connection
+
+    def putconn(self, connection):
+        """Return a connection taken with getconn()."""
+        if connection.closed:
+            self.discard(connection, 'broken')
+            return
+        if time.monotonic() - self._opened[id(connection)] > self.max_lifetime:
+            self.discard(connection, 'lifetime')
+            return
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Database.Error:
+                self.discard(connection, 'broken')
+                return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+            self._update_gauges()
+
+    def _checkout(self, deadline):
+        """(idle connection, returned_at), or (None, None) when the caller may open one."""
+        with self._condition:
+            while True:
+                self._close_idle()
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    self._update_gauges()
+                    return connection, returned_at
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._update_gauges()
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    db_pool_timeouts_total.labels(self.alias).inc()
+                    raise Database.OperationalError(
+                        f'No connection available in the {self.alias!r} pool after '
+                        f'{self.timeout}s; all {self.max_size} are in use'
+                    )
+                self._condition.wait(remaining)
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+                self._update_gauges()
+            raise
+        self._opened[id(connection)] = time.monotonic()
+        db_pool_connections_opened_total.labels(self.alias).inc()
+        return connection
+
+    def _usable(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            # A connection returned from inside atomic() isn't in autocommit
+            # mode, so the ping opened a transaction; Django's checkout can't
+            # switch autocommit back on while one is open
+            connection.rollback()
+        except Database.Error:
+            return False
+        return True
+
+    def discard(self, connection, reason):
+        """Close a connection taken with getconn() instead of returning it."""
+        try:
+            connection.close()
+        except Database.Error:
+            pass
+        with self._condition:
+            self._opened.pop(id(connection), None)
+            self._size -= 1
+            self._condition.notify()
+            self._update_gauges()
+        db_pool_connections_closed_total.labels(self.alias, reason).inc()
+
+    def _close_idle(self):
+        # Called with the condition held; the oldest returned are on the left
+        cutoff = time.monotonic() - self.max_idle
+        while self._idle and self._idle[0][1] < cutoff:
+            connection, _ = self._idle.popleft()
+            try:
+                connection.close()
+            except Database.Error:
+                pass
+            self._opened.pop(id(connection), None)
+            self._size -= 1
+            db_pool_connections_closed_total.labels(self.alias, 'idle').inc()
+
+    def _update_gauges(self):
+        self._idle_gauge.set(len(self._idle))
+        self._in_use_gauge.set(self._size - len(self._idle))
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    # alias -> ConnectionPool, shared by the threads of this process
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        pool = self._pools.get(self.alias)
+        if pool is not None and pool.pid == os.getpid():
+            return pool
+        with self._pools_lock:
+            pool = self._pools.get(self.alias)
+            if pool is None or pool.pid != os.getpid():
+                if pool is not None:
+                    _inherited.append(pool)
+                pool = ConnectionPool(self.alias, **self.settings_dict['OPTIONS'].get('pool', {}))
+                self._pools[self.alias] = pool
+        return pool
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        return self.pool.getconn(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps using this connection until the atomic block
+                # exits, so it can't go to another thread; close it like the
+                # stock backend does, and the block's next query fails
+                # instead of running outside its transaction
+                self.pool.discard(self.connection, 'closed_in_transaction')
+            else:
+                self.pool.putconn(self.connection)
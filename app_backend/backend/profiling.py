@@ -0,0 +1,104 @@
+"""
+Opt-in per-request query profiler, enabled with QUERY_PROFILER=true.
+
+Has the request's QueryRecorder (backend/metrics.py) keep every SQL
+statement the request runs, and adds a Server-Timing header with the
+query count, database time and total time, which browser devtools show
+next to each request:
+
+    Server-Timing: db;dur=4.1;desc="12 queries", app;dur=9.8
+
+Statements are grouped by fingerprint (the SQL with literals, parameters
+and IN lists collapsed). A SELECT, UPDATE or INSERT repeated
+QUERY_PROFILER_REPEAT_THRESHOLD or more times in one request is logged as
+a probable N+1, the same statement run once per row instead of once per
+batch, and the request is counted in django_db_n_plus_one_total.
+
+Off by default: it keeps every statement of a request in memory.
+QueryBudgetTests in board/tests.py uses the same fingerprints to hold
+each endpoint to a fixed query budget.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .metrics import db_n_plus_one_total, recording_queries, view_label
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """`sql` with literals and parameters as ?, IN lists as (...) and whitespace collapsed."""
+    sql = _LITERALS.sub("?", sql)
+    sql = _LISTS.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+# Statements whose repeats are flagged. Reads and writes fan out per row
+# alike; DELETEs are left out because the deletion collector batches them.
+REPEATABLE = ("SELECT", "UPDATE", "INSERT")
+
+
+def repeated_statements(statements, threshold):
+    """[(fingerprint, count)] of statements run at least `threshold` times, most repeated first."""
+    counts = Counter(
+        fingerprint(sql) for sql in statements if sql.lstrip()[:6].upper() in REPEATABLE
+    )
+    return [(fp, count) for fp, count in counts.most_common() if count >= threshold]
+
+
+def server_timing(recorder, total):
+    count = recorder.count
+    return (
+        f'db;dur={recorder.duration * 1000:.1f};desc="{count} {"query" if count == 1 else "queries"}", '
+        f"app;dur={total * 1000:.1f}"
+    )
+
+
+class QueryProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILER:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _report(self, request, response, recorder, duration):
+        response["Server-Timing"] = server_timing(recorder, duration)
+        statements = [sql for _, sql, _, _ in recorder.statements]
+        repeats = repeated_statements(statements, settings.QUERY_PROFILER_REPEAT_THRESHOLD)
+        if not repeats:
+            return
+        view = view_label(request)
+        db_n_plus_one_total.labels(view).inc()
+        for statement, count in repeats:
+            logger.warning(
+                "Probable N+1 in %s %s (%s): %d x %s",
+                request.method, request.path, view, count, statement[:500],
+            )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with recording_queries(statements=True) as recorder:
+            response = self.get_response(request)
+        self._report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with recording_queries(statements=True) as recorder:
+            response = await self.get_response(request)
+        self._report(request, response, recorder, time.perf_counter() - start)
+        return response
@@ -0,0 +1,290 @@
+"""
+Slow request profiler, enabled with REQUEST_PROFILER=true.
+
+Captures where a request spent its time: a statistical profile of its
+Python stacks, its SQL statements with timings, and EXPLAIN plans for the
+slowest SELECTs. A request is captured when
+- it carries `X-Profile-Request: <REQUEST_PROFILER_SECRET>` (the response
+  then names the capture in X-Profile-Id),
+- it is picked by REQUEST_PROFILER_SAMPLE_RATE (0.01 = one in a hundred),
+- or it takes longer than REQUEST_PROFILER_SLOW_MS; every request is
+  watched then, and only slow ones are kept.
+
+Stacks are sampled every REQUEST_PROFILER_INTERVAL_MS by one background
+thread reading sys._current_frames(), which costs the watched request
+next to nothing, unlike a deterministic profiler. Under ASGI, requests
+sharing the event loop thread also share its samples, and queries run in
+the ORM's worker thread, so rely on the SQL section for database time.
+
+Statements come from the request's QueryRecorder (backend/metrics.py).
+Running EXPLAINs and writing the file are left to one background writer
+thread with its own database connection, so the response isn't held up;
+the file appears shortly after the response that names it. Captures
+arriving faster than they can be written are dropped.
+
+Captures are JSON files in REQUEST_PROFILER_DIR; only the newest
+REQUEST_PROFILER_KEEP are kept. SQL is stored without its parameters.
+List and read them with `manage.py list_profiles`.
+"""
+import heapq
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from .metrics import recording_queries, view_label
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'X-Profile-Request'
+# Frames kept per sampled stack, from the innermost
+MAX_DEPTH = 64
+# Statements kept per capture, slowest first, and stacks written out
+MAX_QUERIES = 50
+MAX_STACKS = 200
+# Captures waiting for the writer thread; more are dropped
+MAX_PENDING = 100
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f'{module}:{code.co_name}'
+
+
+def _fold(frame):
+    """The stack ending in `frame` as 'outer;...;inner', flame graph style."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    """Samples the stacks of watched threads while any are watched."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watched = {}
+        self._thread = None
+
+    def watch(self, thread_id):
+        """Start sampling `thread_id`; returns a key for unwatch() and the Counter of stacks."""
+        key, stacks = object(), Counter()
+        with self._lock:
+            self._watched[key] = (thread_id, stacks)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        return key, stacks
+
+    def unwatch(self, key):
+        with self._lock:
+            self._watched.pop(key, None)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._watched:
+                    # Stop while idle; the next watch() starts a new thread
+                    self._thread = None
+                    return
+                watched = list(self._watched.values())
+            frames = sys._current_frames()
+            for thread_id, stacks in watched:
+                frame = frames.get(thread_id)
+                if frame is not None and thread_id != own:
+                    stacks[_fold(frame)] += 1
+
+
+def explain(alias, sql, params):
+    """The database's plan for `sql`, one line per step."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        # Postgres returns one text column, SQLite the step's detail last
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+
+def _rotate(directory, keep):
+    files = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in files[:max(len(files) - keep, 0)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def capture(request, response, trigger, recorder, stacks, duration, started_at):
+    """
+    (profile, plans) of a finished request: the JSON document save() writes,
+    and (statement, alias, params) of the slowest SELECTs to EXPLAIN. Cheap
+    enough for the request's own thread.
+    """
+    queries = heapq.nlargest(MAX_QUERIES, recorder.statements or [], key=lambda query: query[0])
+    explained = set()
+    statements, plans = [], []
+    for query_duration, sql, params, alias in queries:
+        statement = {'sql': sql, 'duration_ms': round(query_duration * 1000, 3)}
+        if (sql not in explained and len(explained) < settings.REQUEST_PROFILER_EXPLAIN
+                and sql.lstrip()[:6].upper() == 'SELECT'):
+            explained.add(sql)
+            plans.append((statement, alias, params))
+        statements.append(statement)
+
+    profile = {
+        'id': f'{started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}',
+        'started_at': started_at.isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'view': view_label(request),
+        'status': getattr(response, 'status_code', 500),
+        'trigger': trigger,
+        'duration_ms': round(duration * 1000, 3),
+        'db': {'queries': recorder.count, 'duration_ms': round(recorder.duration * 1000, 3)},
+        'interval_ms': settings.REQUEST_PROFILER_INTERVAL_MS,
+        'samples': sum(stacks.values()),
+        'stacks': stacks.most_common(MAX_STACKS),
+        'queries': statements,
+    }
+    return profile, plans
+
+
+def save(profile, plans):
+    """Add the EXPLAIN plans to a capture and write it to REQUEST_PROFILER_DIR."""
+    for statement, alias, params in plans:
+        try:
+            statement['explain'] = explain(alias, statement['sql'], params)
+        except Exception as e:
+            statement['explain_error'] = str(e)
+    directory = settings.REQUEST_PROFILER_DIR
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'{profile["id"]}.json'), 'w') as f:
+        json.dump(profile, f, separators=(',', ':'))
+    _rotate(directory, settings.REQUEST_PROFILER_KEEP)
+
+
+class Writer:
+    """Saves captures one at a time on a background thread."""
+
+    def __init__(self, max_pending):
+        self._queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, profile, plans):
+        """Queue a capture for save(); False if the writer is too far behind to take it."""
+        try:
+            self._queue.put_nowait((profile, plans))
+        except queue.Full:
+            logger.warning('Request profiler is behind; dropped profile %s', profile['id'])
+            return False
+        with self._lock:
+            # Started on first use, so a server that forks after loading
+            # the app gets a writer in each worker
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-profile-writer', daemon=True)
+                self._thread.start()
+        return True
+
+    def _run(self):
+        while True:
+            profile, plans = self._queue.get()
+            try:
+                save(profile, plans)
+            except Exception:
+                # Profiling must never take the process down
+                logger.exception('Could not save request profile')
+            finally:
+                # Don't hold the EXPLAIN connection open between captures
+                connections.close_all()
+
+
+class RequestProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILER:
+            raise MiddlewareNotUsed()
+        self.sampler = Sampler(settings.REQUEST_PROFILER_INTERVAL_MS / 1000)
+        self.writer = Writer(MAX_PENDING)
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _trigger(self, request):
+        secret = settings.REQUEST_PROFILER_SECRET
+        if secret and request.headers.get(HEADER) == secret:
+            return 'header'
+        if random.random() < settings.REQUEST_PROFILER_SAMPLE_RATE:
+            return 'sample'
+        if settings.REQUEST_PROFILER_SLOW_MS:
+            return 'slow'
+        return None
+
+    def _should_save(self, trigger, duration):
+        return trigger != 'slow' or duration * 1000 >= settings.REQUEST_PROFILER_SLOW_MS
+
+    def _save(self, request, response, trigger, recorder, stacks, duration, started_at):
+        if not self._should_save(trigger, duration):
+            return response
+        try:
+            profile, plans = capture(request, response, trigger, recorder, stacks, duration, started_at)
+            if self.writer.submit(profile, plans):
+                response['X-Profile-Id'] = profile['id']
+        except Exception:
+            # Profiling must never fail the request it profiles
+            logger.exception('Could not capture request profile')
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        key, stacks = self.sampler.watch(threading.get_ident())
+        started_at = timezone.now()
+        start = time.perf_counter()
+        try:
+            with recording_queries(statements=True) as recorder:
+                response = self.get_response(request)
+        finally:
+            self.sampler.unwatch(key)
+        duration = time.perf_counter() - start
+        return self._save(request, response, trigger, recorder, stacks, duration, started_at)
+
+    async def __acall__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+
+        key, stacks = self.sampler.watch(threading.get_ident())
+        started_at = timezone.now()
+        start = time.perf_counter()
+        try:
+            with recording_queries(statements=True) as recorder:
+                response = await self.get_response(request)
+        finally:
+            self.sampler.unwatch(key)
+        duration = time.perf_counter() - start
+        return self._save(request, response, trigger, recorder, stacks, duration, started_at)
@@ -40,6 +40,8 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'backend.metrics.PrometheusMiddleware',
+    'backend.profiling.QueryProfilerMiddleware',
+    'backend.request_profiler.RequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -82,22 +84,214 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 USE_SQLITE = os.getenv("USE_SQLITE", "false").lower() == "true"
 
 if USE_SQLITE:
-    # CI/CD (GitHub Actions)
+    # CI/CD (GitHub Actions); SQLITE_PATH points benchmarks at a scratch file
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
         }
     }
 else:
     # Production & Local Development (PostgreSQL)
+    # Connection handling, one of:
+    # - default: each thread keeps its own connection for DATABASE_CONN_MAX_AGE
+    #   seconds, pinged before reuse by a new request (CONN_HEALTH_CHECKS)
+    # - DATABASE_POOL=true: requests borrow connections from a pool per process
+    #   (backend/postgresql_pool) and return them when they finish
+    # - DATABASE_POOLER=true: DATABASE_URL points at PgBouncer in transaction
+    #   mode, which shares server connections across processes and pods; such
+    #   a pooler can't keep a named cursor open between transactions
+    DATABASE_POOL = os.getenv("DATABASE_POOL", "false").lower() == "true"
+    DATABASE_POOLER = os.getenv("DATABASE_POOLER", "false").lower() == "true"
     DATABASES = {
         'default': dj_database_url.config(
             default=os.getenv("DATABASE_URL"),
-            conn_max_age=600,
-            ssl_require=True,
+            engine='backend.postgresql_pool' if DATABASE_POOL else None,
+            # Pooled connections go back to the pool after every request
+            conn_max_age=0 if DATABASE_POOL else int(os.getenv("DATABASE_CONN_MAX_AGE", "600")),
+            conn_health_checks=not DATABASE_POOL,
+            # false for a local server without TLS
+            ssl_require=os.getenv("DATABASE_SSL_REQUIRE", "true").lower() == "true",
+            disable_server_side_cursors=DATABASE_POOLER,
         )
     }
+    if DATABASE_POOL:
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            # Connections per process; x workers x pods must fit max_connections
+            'max_size': int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+            # Seconds a request waits for a connection before failing
+            'timeout': float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+            # Connections are replaced after this many seconds, and closed
+            # after sitting idle for DATABASE_POOL_MAX_IDLE
+            'max_lifetime': float(os.getenv("DATABASE_POOL_MAX_LIFETIME", "1800")),
+            'max_idle': float(os.getenv("DATABASE_POOL_MAX_IDLE", "300")),
+        }
+
+
+# Startup (see backend/startup.py): a server process that takes longer than
+# this from container start until it can serve logs a warning; 0 disables it
+STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', '10'))
+
+
+# Cache
+# Local memory by default; set REDIS_URL to share the cache between
+# workers and pods (required for CacheTokenBackend with more than one process).
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Versioned snapshots of serialized boards (see board/snapshots.py).
+# Version counters live in the cache, so the cache must be shared (REDIS_URL)
+# when more than one worker process serves requests; hence the default.
+BOARD_SNAPSHOT_CACHE = os.getenv('BOARD_SNAPSHOT_CACHE', 'true' if REDIS_URL else 'false').lower() == 'true'
+BOARD_SNAPSHOT_CACHE_ALIAS = os.getenv('BOARD_SNAPSHOT_CACHE_ALIAS', 'default')
+BOARD_SNAPSHOT_TTL = int(os.getenv('BOARD_SNAPSHOT_TTL', '300'))
+# ETag / If-None-Match on read endpoints, validated against the same counters
+# (see board/conditional.py); needs the same shared cache
+CONDITIONAL_GET = os.getenv('CONDITIONAL_GET', 'true' if REDIS_URL else 'false').lower() == 'true'
+
+
+# Delta sync change log (see board/changes.py)
+# Tombstones older than this are compacted away; older cursors must resync
+CHANGELOG_RETENTION = int(os.getenv('CHANGELOG_RETENTION', str(7 * 24 * 3600)))
+CHANGELOG_PAGE_SIZE = int(os.getenv('CHANGELOG_PAGE_SIZE', '500'))
+
+
+# Serve the read endpoints with async views (board/async_views.py); only
+# worthwhile under an ASGI server, so on by default with SERVER_MODE=asgi
+ASYNC_VIEWS = os.getenv(
+    'ASYNC_VIEWS', 'true' if os.getenv('SERVER_MODE') == 'asgi' else 'false'
+).lower() == 'true'
+
+
+# Server-push event streams (see board/events.py). Opt-in: the endpoint
+# needs SERVER_MODE=asgi, a Redis broker once there is more than one
+# process, and a client that authenticates with a header. While off the
+# route isn't served and writes publish nothing
+EVENT_STREAM = os.getenv('EVENT_STREAM', 'false').lower() == 'true'
+# A local broker only reaches subscribers in the same process; use Redis
+# when writes and streams are spread over several processes or pods
+EVENT_BROKER = os.getenv(
+    'EVENT_BROKER',
+    'board.events.RedisBroker' if REDIS_URL else 'board.events.LocalBroker',
+)
+EVENT_BROKER_URL = os.getenv('EVENT_BROKER_URL', REDIS_URL)
+# Events buffered per subscriber before a slow client is told to resync
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '100'))
+EVENT_HEARTBEAT_SECONDS = int(os.getenv('EVENT_HEARTBEAT_SECONDS', '15'))
+# Reconnect delay suggested to EventSource clients
+EVENT_RETRY_MS = int(os.getenv('EVENT_RETRY_MS', '3000'))
+
+
+# Token authentication (see board/token_backends.py)
+# board.token_backends.DatabaseTokenBackend | CacheTokenBackend | InMemoryTokenBackend
+AUTH_TOKEN_BACKEND = os.getenv('AUTH_TOKEN_BACKEND', 'board.token_backends.DatabaseTokenBackend')
+AUTH_TOKEN_CACHE = os.getenv('AUTH_TOKEN_CACHE', 'default')
+# Sliding lifetime in seconds: each authenticated request extends the token
+AUTH_TOKEN_TTL = int(os.getenv('AUTH_TOKEN_TTL', str(7 * 24 * 3600)))
+# Database backend only extends a token once it has aged this much (avoids a write per request)
+AUTH_TOKEN_REFRESH_INTERVAL = int(os.getenv('AUTH_TOKEN_REFRESH_INTERVAL', '300'))
+AUTH_TOKEN_MAX = int(os.getenv('AUTH_TOKEN_MAX', '100000'))
+AUTH_TOKEN_SWEEP_INTERVAL = int(os.getenv('AUTH_TOKEN_SWEEP_INTERVAL', '300'))
+# Per-process cache of authenticated users keyed by token (0 disables).
+# The TTL bounds how long a logout in another worker can go unnoticed.
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1024'))
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '30'))
+
+
+# Query profiler (see backend/profiling.py): Server-Timing headers and N+1
+# warnings per request. Keeps every statement in memory; for debugging.
+QUERY_PROFILER = os.getenv('QUERY_PROFILER', 'false').lower() == 'true'
+# A SELECT run this many times in one request is reported as a probable N+1
+QUERY_PROFILER_REPEAT_THRESHOLD = int(os.getenv('QUERY_PROFILER_REPEAT_THRESHOLD', '5'))
+
+# Slow request profiler (see backend/request_profiler.py): stack samples,
+# SQL and EXPLAIN plans of chosen requests, saved under REQUEST_PROFILER_DIR
+REQUEST_PROFILER = os.getenv('REQUEST_PROFILER', 'false').lower() == 'true'
+# Requests sending this in X-Profile-Request are profiled; empty disables the header
+REQUEST_PROFILER_SECRET = os.getenv('REQUEST_PROFILER_SECRET', '')
+# Share of requests profiled at random (0.01 = 1%)
+REQUEST_PROFILER_SAMPLE_RATE = float(os.getenv('REQUEST_PROFILER_SAMPLE_RATE', '0'))
+# Keep the profile of any request slower than this; 0 turns it off
+REQUEST_PROFILER_SLOW_MS = int(os.getenv('REQUEST_PROFILER_SLOW_MS', '0'))
+REQUEST_PROFILER_INTERVAL_MS = int(os.getenv('REQUEST_PROFILER_INTERVAL_MS', '5'))
+# Slowest SELECTs of a profile that are EXPLAINed
+REQUEST_PROFILER_EXPLAIN = int(os.getenv('REQUEST_PROFILER_EXPLAIN', '5'))
+REQUEST_PROFILER_DIR = os.getenv('REQUEST_PROFILER_DIR', str(BASE_DIR / 'profiles'))
+# Older profiles are deleted beyond this many
+REQUEST_PROFILER_KEEP = int(os.getenv('REQUEST_PROFILER_KEEP', '200'))
+
+
+# API rendering
+# 'orjson' renders JSON with board.renderers.ORJSONRenderer (same bytes,
+# several times faster); 'json' keeps DRF's JSONRenderer
+API_JSON_RENDERER = os.getenv('API_JSON_RENDERER', 'json')
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'board.renderers.ORJSONRenderer' if API_JSON_RENDERER == 'orjson'
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+
+# Pagination
+# List endpoints (/tickets, /projects, /tickets/<id>/comments) return keyset
+# pages with a "next" cursor to clients that send cursor= or limit=, and
+# the full, unpaginated lists to the others. API_PAGINATION=true pages
+# every request, once all clients follow cursors.
+API_PAGINATION = os.getenv('API_PAGINATION', 'false').lower() == 'true'
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '200'))
+
+
+# Assignee autocomplete (GET /assignees, see board/assignees.py)
+ASSIGNEE_SEARCH_LIMIT = int(os.getenv('ASSIGNEE_SEARCH_LIMIT', '10'))
+# Seconds results for a prefix are cached (0 disables); a new or renamed
+# user can take this long to show up
+ASSIGNEE_SEARCH_CACHE_TTL = int(os.getenv('ASSIGNEE_SEARCH_CACHE_TTL', '10'))
+
+
+# Bulk ticket operations (POST /tickets/bulk)
+BULK_MAX_OPERATIONS = int(os.getenv('BULK_MAX_OPERATIONS', '500'))
+
+
+# Email notifications (see board/notifications.py)
+# Queued in the notification table and delivered by `manage.py send_notifications`.
+SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY', '')
+NOTIFICATION_FROM_EMAIL = os.getenv('NOTIFICATION_FROM_EMAIL', 'ticket-update@cloud-collab.com')
+# board.notifications.SendGridTransport | board.notifications.FakeTransport
+NOTIFICATION_TRANSPORT = os.getenv('NOTIFICATION_TRANSPORT', 'board.notifications.SendGridTransport')
+NOTIFICATION_BATCH_SIZE = int(os.getenv('NOTIFICATION_BATCH_SIZE', '50'))
+NOTIFICATION_CONCURRENCY = int(os.getenv('NOTIFICATION_CONCURRENCY', '4'))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '5'))
+# Retry delay doubles from NOTIFICATION_BACKOFF_BASE up to NOTIFICATION_BACKOFF_MAX seconds
+NOTIFICATION_BACKOFF_BASE = int(os.getenv('NOTIFICATION_BACKOFF_BASE', '30'))
+NOTIFICATION_BACKOFF_MAX = int(os.getenv('NOTIFICATION_BACKOFF_MAX', '3600'))
+# Seconds a claimed notification stays hidden from other workers
+NOTIFICATION_LEASE = int(os.getenv('NOTIFICATION_LEASE', '300'))
+# Notifications wait this many seconds so others to the same recipient can
+# join one digest email (0 sends each notification as soon as possible)
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv('NOTIFICATION_DIGEST_WINDOW', '120'))
+NOTIFICATION_DIGEST_MAX_BATCH = int(os.getenv('NOTIFICATION_DIGEST_MAX_BATCH', '20'))
+# Digest per (recipient, ticket) instead of per recipient
+NOTIFICATION_DIGEST_BY_TICKET = os.getenv('NOTIFICATION_DIGEST_BY_TICKET', 'false').lower() == 'true'
+# FakeTransport tuning for local throughput tests
+FAKE_MAIL_LATENCY_MS = int(os.getenv('FAKE_MAIL_LATENCY_MS', '0'))
+FAKE_MAIL_FAILURE_RATE = float(os.getenv('FAKE_MAIL_FAILURE_RATE', '0'))
 
 
 # Password validation
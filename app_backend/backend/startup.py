@@ -0,0 +1,160 @@
+"""
+Container startup fast path (see `manage.py startup` and docker-entrypoint.sh).
+
+A no-op `migrate` still imports every migration, renders the project state
+and runs the post_migrate handlers, which dominates a restart. Instead:
+- pending_migrations() compares the migration files on disk with the rows
+  in django_migrations, one query and no imports. The full migrate only
+  runs when a name is missing; squashed migrations that aren't recorded
+  yet fall through to it too, which is merely slower.
+- migration_lock() lets one starting process (the leader) migrate while
+  the others wait for it: a Postgres advisory lock, or a lock file next
+  to the SQLite database.
+- warm_up() imports the URLconf and views while the server boots, so the
+  first request doesn't pay for it.
+- report_ready() logs how long the process took to serve, measured from
+  BOOT_STARTED_AT (set by docker-entrypoint.sh) when present, and warns
+  when that exceeds STARTUP_BUDGET_SECONDS. Workers the server respawns
+  later (max_requests, crashes) inherit BOOT_STARTED_AT from its master,
+  so one that starts loading after another process of the same boot was
+  already ready is measured from its own start instead.
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import pkgutil
+import tempfile
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from django.apps import apps
+from django.conf import settings
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key held while migrating ("board" in ASCII)
+LOCK_KEY = 0x626f617264
+
+
+def disk_migrations():
+    """{(app_label, name)} of the migration files, found without importing them."""
+    found = set()
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ModuleNotFoundError:
+            continue
+        for _, name, is_package in pkgutil.iter_modules(getattr(module, '__path__', [])):
+            if not is_package and name[0] not in '_~':
+                found.add((app_config.label, name))
+    return found
+
+
+def fingerprint(migrations):
+    """Short hash identifying a set of migrations, for the logs."""
+    return hashlib.sha1(
+        '\n'.join(f'{app}.{name}' for app, name in sorted(migrations)).encode()
+    ).hexdigest()[:12]
+
+
+def pending_migrations(connection):
+    """Migrations on disk that `connection` hasn't applied, sorted."""
+    recorder = MigrationRecorder(connection)
+    if not recorder.has_table():
+        return sorted(disk_migrations())
+    return sorted(disk_migrations() - set(recorder.applied_migrations()))
+
+
+@contextmanager
+def migration_lock(connection, timeout):
+    """Hold the migration lock, waiting up to `timeout` seconds for it."""
+    if connection.vendor == 'postgresql':
+        def acquire():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [LOCK_KEY])
+                return cursor.fetchone()[0]
+
+        def release():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [LOCK_KEY])
+    else:
+        # Processes sharing a SQLite file share its directory
+        lock_file = open(f'{connection.settings_dict["NAME"]}.migrate.lock', 'w')
+
+        def acquire():
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                return False
+
+        def release():
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    deadline = time.monotonic() + timeout
+    while not acquire():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'Another process held the migration lock for over {timeout:.0f}s')
+        time.sleep(0.5)
+    try:
+        yield
+    finally:
+        release()
+
+
+def boot_started_at():
+    """Wall-clock time the container started, if docker-entrypoint.sh recorded it."""
+    try:
+        return float(os.environ['BOOT_STARTED_AT'])
+    except (KeyError, ValueError):
+        return None
+
+
+def first_ready_at(started):
+    """
+    Wall-clock time a server process of the boot at `started` first
+    reported ready, or None if this is the first (which records it).
+    """
+    # Keyed by the boot, so a marker surviving a container restart is ignored
+    path = os.path.join(tempfile.gettempdir(), f'board-ready-{started}')
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+    return None
+
+
+def warm_up():
+    """Import the URLconf, and with it every view, now rather than on the first request."""
+    get_resolver().url_patterns
+
+
+def report_ready(server, loading_started):
+    """
+    Log the cold start of this server process, warning when over budget.
+    `loading_started` is the time.monotonic() at which it began loading the app.
+    """
+    loaded = time.monotonic() - loading_started
+    started = boot_started_at()
+    if started is not None:
+        ready_at = first_ready_at(started)
+        if ready_at is not None and ready_at < time.time() - loaded:
+            # Respawned after the boot was over: only its own load counts
+            started = None
+    total = time.time() - started if started is not None else loaded
+    budget = settings.STARTUP_BUDGET_SECONDS
+    message = f'{server} process {os.getpid()} ready: cold start {total:.2f}s (app loaded in {loaded:.2f}s)'
+    if budget and total > budget:
+        logger.warning('%s, over the %ss budget', message, budget)
+    else:
+        logger.info(message)
@@ -8,10 +8,17 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 """
 
 import os
+import time
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
+loading_started = time.monotonic()
 application = get_wsgi_application()
 
+from backend import startup  # noqa: E402 (needs the settings configured above)
+
+startup.warm_up()
+startup.report_ready('wsgi', loading_started)
+
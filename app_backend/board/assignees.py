@@ -0,0 +1,82 @@
+"""
+Assignee autocomplete for GET /assignees.
+
+Users are matched by a prefix of their name or email against the indexed
+lowercase copies (User.name_lower / User.email_lower), so each keystroke
+is an index range scan instead of a scan of the user table. The best
+`limit` matches are returned, people most recently assigned a ticket
+first, then by name, each with their open ticket count.
+
+The assignee picker sends a burst of near-identical requests while
+someone types, so results per prefix are cached for
+ASSIGNEE_SEARCH_CACHE_TTL seconds.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import User
+from .serializers import AssigneeSerializer
+
+
+def _starts_with(field, prefix):
+    if connection.vendor == 'sqlite':
+        # SQLite only uses an index for LIKE on case-insensitive columns;
+        # the same prefix as a range on the lowercase column is indexed
+        return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+    return Q(**{f'{field}__startswith': prefix})
+
+
+def _queryset(prefix, limit):
+    return User.objects.filter(
+        _starts_with('name_lower', prefix) | _starts_with('email_lower', prefix)
+    ).order_by(
+        F('last_assigned_at').desc(nulls_last=True), 'name_lower', 'id'
+    )[:limit]
+
+
+def _cache_key(prefix, limit):
+    digest = hashlib.sha1(prefix.encode()).hexdigest()
+    return f'assignees:{digest}:{limit}'
+
+
+def search(prefix, limit):
+    """Return up to `limit` serialized users whose name or email starts with `prefix`."""
+    prefix = prefix.lower()
+    ttl = settings.ASSIGNEE_SEARCH_CACHE_TTL
+    key = _cache_key(prefix, limit)
+    if ttl:
+        data = cache.get(key)
+        if data is not None:
+            return data
+    data = list(AssigneeSerializer(_queryset(prefix, limit), many=True).data)
+    if ttl:
+        cache.set(key, data, timeout=ttl)
+    return data
+
+
+async def asearch(prefix, limit):
+    """Async version of search()."""
+    prefix = prefix.lower()
+    ttl = settings.ASSIGNEE_SEARCH_CACHE_TTL
+    key = _cache_key(prefix, limit)
+    if ttl:
+        data = await cache.aget(key)
+        if data is not None:
+            return data
+    users = [user async for user in _queryset(prefix, limit)]
+    data = list(AssigneeSerializer(users, many=True).data)
+    if ttl:
+        await cache.aset(key, data, timeout=ttl)
+    return data
+
+
+def record_assignment(*user_ids):
+    """Note that tickets were just assigned to these users, for ranking."""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        # update() skips the post_save signal: ranking isn't part of any
+        # snapshot, so there is nothing to invalidate
+        User.objects.filter(id__in=user_ids).update(last_assigned_at=timezone.now())
@@ -0,0 +1,204 @@
+"""
+Async versions of the read endpoints, routed instead of the DRF views
+when ASYNC_VIEWS is enabled (the default under SERVER_MODE=asgi).
+
+Queries go through Django's async ORM, so under an ASGI server a slow
+query only holds up its own request instead of a whole worker. Each view
+returns exactly the same JSON, status codes and headers as its sync
+counterpart and shares its query builders, snapshots and ETags.
+"""
+import uuid
+from functools import wraps
+from django.conf import settings
+from .auth import async_authenticate_request
+from .conditional import conditional_get
+from .models import Project, Ticket
+from .pagination import PaginationError, apaginate, get_page_size, pagination_enabled
+from .queries import board_queryset, comment_queryset, project_queryset
+from .responses import json_response, method_not_allowed
+from .serializers import rows
+from .ticket_views import _board_scopes, _group_by_status, _ticket_fields
+from . import assignees, counters, snapshots
+
+
+def _get_only(view_func):
+    """Reject anything but GET, like @api_view(['GET'])."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            response = method_not_allowed(request)
+        else:
+            response = await view_func(request, *args, **kwargs)
+        response['Allow'] = 'GET, OPTIONS'
+        return response
+
+    return wrapper
+
+
+async def _board_page(tickets, status_filter, cursor, limit, fields):
+    """Async version of ticket_views._board_page()."""
+    grouped_tickets = {}
+    next_cursors = {}
+    for column in [status_filter] if status_filter else Ticket.Status.values:
+        page, next_cursors[column] = await apaginate(
+            rows.ticket_rows(tickets.filter(status=column), fields), ['id'], cursor, limit
+        )
+        grouped_tickets[column] = await rows.aserialize_tickets(page, fields)
+    grouped_tickets['next'] = next_cursors
+    return grouped_tickets
+
+
+@_get_only
+@async_authenticate_request
+@conditional_get(_board_scopes)
+async def get_tickets(request):
+    """Async version of ticket_views.get_tickets()."""
+    tickets = board_queryset()
+    project_id = request.GET.get('project_id')
+    if project_id:
+        try:
+            project_id = str(uuid.UUID(project_id))
+        except ValueError:
+            return json_response({'error': 'Invalid project_id'}, status=400)
+        tickets = tickets.filter(project_id=project_id)
+    try:
+        fields = _ticket_fields(request)
+    except rows.FieldsError as e:
+        return json_response({'error': str(e)}, status=400)
+    scopes = _board_scopes(request)
+
+    if not pagination_enabled(request):
+        async def build():
+            board_rows = [row async for row in rows.ticket_rows(tickets, fields)]
+            return _group_by_status(await rows.aserialize_tickets(board_rows, fields))
+
+        grouped_tickets = await snapshots.aget_or_build(
+            'tickets', scopes, {'project_id': project_id, 'fields': fields}, build
+        )
+        return json_response(grouped_tickets)
+
+    status_filter = request.GET.get('status')
+    cursor = request.GET.get('cursor')
+    if status_filter and status_filter not in Ticket.Status.values:
+        return json_response(
+            {'error': f'status must be one of {", ".join(Ticket.Status.values)}'},
+            status=400
+        )
+    if cursor and not status_filter:
+        return json_response({'error': 'status is required when cursor is provided'}, status=400)
+
+    try:
+        limit = get_page_size(request)
+        params = {'project_id': project_id, 'status': status_filter, 'cursor': cursor, 'limit': limit,
+                  'fields': fields}
+        grouped_tickets = await snapshots.aget_or_build(
+            'tickets', scopes, params,
+            lambda: _board_page(tickets, status_filter, cursor, limit, fields)
+        )
+    except PaginationError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    return json_response(grouped_tickets)
+
+
+@_get_only
+@async_authenticate_request
+@conditional_get(lambda request: [snapshots.USERS, snapshots.PROJECTS])
+async def get_projects(request):
+    """Async version of project_views.get_projects()."""
+    try:
+        fields = rows.requested_fields(request, rows.PROJECT_OUTPUT)
+    except rows.FieldsError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    projects = rows.project_rows(project_queryset(), fields)
+    if not pagination_enabled(request):
+        projects = [project async for project in projects]
+        return json_response(rows.serialize_projects(projects, fields))
+
+    try:
+        projects, next_cursor = await apaginate(
+            projects, ['id'], request.GET.get('cursor'), get_page_size(request)
+        )
+    except PaginationError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    return json_response({
+        'results': rows.serialize_projects(projects, fields),
+        'next': next_cursor
+    })
+
+
+@_get_only
+@async_authenticate_request
+@conditional_get(lambda request, project_id: [snapshots.USERS, snapshots.project_scope(project_id)])
+async def get_project(request, project_id):
+    """Async version of project_views.get_project()."""
+    try:
+        fields = rows.requested_fields(request, rows.PROJECT_OUTPUT)
+    except rows.FieldsError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    project = await rows.project_rows(project_queryset().filter(id=project_id), fields).afirst()
+    if project is None:
+        return json_response({'error': 'Project not found'}, status=404)
+
+    return json_response(rows.serialize_projects([project], fields)[0])
+
+
+@_get_only
+@async_authenticate_request
+@conditional_get(lambda request, project_id: [snapshots.project_scope(project_id)])
+async def get_project_stats(request, project_id):
+    """Async version of project_views.get_project_stats()."""
+    project = await Project.objects.filter(id=project_id).values(
+        *counters.STATUS_COUNT_FIELDS.values()
+    ).afirst()
+    if project is None:
+        return json_response({'error': 'Project not found'}, status=404)
+
+    counts = {status: project[field] for status, field in counters.STATUS_COUNT_FIELDS.items()}
+    return json_response(counters.project_stats(project_id, counts))
+
+
+@_get_only
+@async_authenticate_request
+@conditional_get(lambda request, ticket_id: [snapshots.USERS, snapshots.ticket_scope(ticket_id)])
+async def get_comments(request, ticket_id):
+    """Async version of comment_views.get_comments()."""
+    if not await Ticket.objects.filter(id=ticket_id).aexists():
+        return json_response({'error': 'Ticket not found'}, status=404)
+
+    comments = rows.comment_rows(comment_queryset().filter(ticket_id=ticket_id))
+    if not pagination_enabled(request):
+        comments = [comment async for comment in comments]
+        return json_response(rows.serialize_comments(comments))
+
+    try:
+        comments, next_cursor = await apaginate(
+            comments, ['created_at', 'id'], request.GET.get('cursor'), get_page_size(request)
+        )
+    except PaginationError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    return json_response({
+        'results': rows.serialize_comments(comments),
+        'next': next_cursor
+    })
+
+
+@_get_only
+@async_authenticate_request
+async def search_assignees(request):
+    """Async version of ticket_views.search_assignees()."""
+    prefix = request.GET.get('prefix', '').strip()
+
+    if not prefix:
+        return json_response({'error': 'prefix query parameter is required'}, status=400)
+
+    try:
+        limit = get_page_size(request, settings.ASSIGNEE_SEARCH_LIMIT)
+    except PaginationError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    return json_response(await assignees.asearch(prefix, limit))
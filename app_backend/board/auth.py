@@ -1,23 +1,107 @@
 """
-In-memory token authentication system.
-Tokens are stored in memory and will be lost on server restart.
+Token authentication system.
+Tokens are kept in a pluggable backend (see board.token_backends) chosen
+with the AUTH_TOKEN_BACKEND setting, so every worker and pod shares them.
 """
-import secrets
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
 from rest_framework.response import Response
+from backend.metrics import auth_user_cache_hits_total, auth_user_cache_misses_total
 from .models import User
+from .responses import json_response
+from .token_backends import TokenSweeper, generate_token
 
-# In-memory token storage
-# Format: {token: user_id}
-_tokens = {}
+_backend = None
+_backend_lock = threading.Lock()
 
-# Format: {user_id: token} for quick user->token lookup
-_user_tokens = {}
 
+class UserCache:
+    """
+    Per-process LRU cache of resolved users keyed by token, so the hot
+    authentication path skips the token lookup and User query.
+    Entries live for at most `ttl` seconds, which also bounds how long a
+    logout or user change made in another process can go unnoticed here.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Format: {token: (user, expires_at)}, least recently used first
+        self._entries = OrderedDict()
+        # Format: {user_id: {token, ...}} for invalidating a user's entries
+        self._user_tokens = {}
+
+    def _drop(self, token):
+        user, _ = self._entries.pop(token)
+        tokens = self._user_tokens.get(str(user.id))
+        if tokens:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[str(user.id)]
+
+    def get(self, token):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(token)
+                auth_user_cache_hits_total.inc()
+                return entry[0]
+            if entry:
+                self._drop(token)
+        auth_user_cache_misses_total.inc()
+        return None
+
+    def put(self, token, user):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (user, time.monotonic() + self.ttl)
+            self._user_tokens.setdefault(str(user.id), set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_token(self, token):
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._user_tokens.get(str(user_id), ())):
+                self._drop(token)
 
-def generate_token():
-    """Generate a secure random token."""
-    return secrets.token_urlsafe(32)
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+def get_token_backend():
+    """
+    Return the configured token backend, creating it (and its background
+    sweeper) on first use in this process.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = import_string(settings.AUTH_TOKEN_BACKEND)()
+                if backend.needs_sweeper and settings.AUTH_TOKEN_SWEEP_INTERVAL > 0:
+                    TokenSweeper(backend, settings.AUTH_TOKEN_SWEEP_INTERVAL).start()
+                _backend = backend
+    return _backend
 
 
 def create_token(user):
@@ -25,61 +109,74 @@ def create_token(user):
     Create a token for a user.
     If user already has a token, return the existing one.
     """
-    user_id = str(user.id)
-    
-    # Check if user already has a token
-    if user_id in _user_tokens:
-        return _user_tokens[user_id]
-    
-    # Generate new token
-    token = generate_token()
-    _tokens[token] = user_id
-    _user_tokens[user_id] = token
-    
-    return token
+    return get_token_backend().create(str(user.id))
 
 
 def get_user_from_token(token):
     """
     Get user from token.
-    Returns User object or None if token is invalid.
+    Returns User object or None if token is invalid or expired.
     """
-    user_id = _tokens.get(token)
+    user = user_cache.get(token)
+    if user:
+        return user
+    
+    user_id = get_token_backend().get_user_id(token)
     if not user_id:
         return None
     
     try:
-        return User.objects.get(id=user_id)
+        user = User.objects.get(id=user_id)
     except User.DoesNotExist:
         # Token exists but user doesn't - clean up
         delete_token(token)
         return None
+    user_cache.put(token, user)
+    return user
+
+
+async def aget_user_from_token(token):
+    """Async version of get_user_from_token()."""
+    user = user_cache.get(token)
+    if user:
+        return user
+    
+    # Token backends are synchronous (database or cache client)
+    user_id = await sync_to_async(get_token_backend().get_user_id)(token)
+    if not user_id:
+        return None
+    
+    try:
+        user = await User.objects.aget(id=user_id)
+    except User.DoesNotExist:
+        # Token exists but user doesn't - clean up
+        await sync_to_async(delete_token)(token)
+        return None
+    user_cache.put(token, user)
+    return user
 
 
 def delete_token(token):
     """Delete a token (logout)."""
-    user_id = _tokens.pop(token, None)
-    if user_id:
-        _user_tokens.pop(user_id, None)
+    user_cache.invalidate_token(token)
+    get_token_backend().delete(token)
 
 
 def delete_user_tokens(user_id):
     """Delete all tokens for a user."""
-    user_id = str(user_id)
-    token = _user_tokens.pop(user_id, None)
-    if token:
-        _tokens.pop(token, None)
+    user_cache.invalidate_user(user_id)
+    get_token_backend().delete_user(str(user_id))
 
 
 def get_active_tokens_count():
-    """Get count of active tokens."""
-    return len(_tokens)
+    """Get count of active tokens (None if the backend can't tell)."""
+    return get_token_backend().count()
 
 
 def clear_all_tokens():
     """Clear all tokens (for testing/admin purposes)."""
-    _tokens.clear()
-    _user_tokens.clear()
+    user_cache.clear()
+    get_token_backend().clear()
 
 
 def authenticate_request(view_func):
@@ -112,3 +209,34 @@ def authenticate_request(view_func):
     
     return wrapper
 
+
+def async_authenticate_request(view_func):
+    """
+    authenticate_request() for async views.
+    Expects 'Authorization: Token <token>' header.
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        
+        if not auth_header.startswith('Token '):
+            return json_response(
+                {'error': 'Authentication required. Provide "Authorization: Token <token>" header.'},
+                status=401
+            )
+        
+        token = auth_header.replace('Token ', '', 1).strip()
+        user = await aget_user_from_token(token)
+        
+        if not user:
+            return json_response(
+                {'error': 'Invalid or expired token.'},
+                status=401
+            )
+        
+        # Attach user to request
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+    
+    return wrapper
+
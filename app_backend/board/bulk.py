@@ -0,0 +1,200 @@
+"""
+Batched ticket writes for POST /tickets/bulk.
+
+A batch is validated and applied in one transaction: one IN-query each
+for the referenced users, projects and tickets, one bulk_create and one
+bulk_update, so creates and updates cost a fixed number of queries
+regardless of batch size. Each operation gets its own result, shaped
+like the response of the matching single-ticket endpoint.
+
+bulk_create and bulk_update don't send model signals, so the change log
+entries, counter updates and snapshot invalidations the signals would
+have made are recorded here. Deletes go through one QuerySet.delete(), which cascades
+and signals exactly like delete_ticket.
+"""
+import uuid
+from django.db import transaction
+from rest_framework import status
+from . import assignees, changes, counters, snapshots
+from .models import Change, Project, Ticket, User
+from .queries import board_queryset
+from .serializers import TicketSerializer
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+OPERATIONS = (CREATE, UPDATE, DELETE)
+
+
+def _uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _ticket_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _error(index, op, code, error):
+    return {'index': index, 'op': op, 'status': code, 'error': error}
+
+
+def apply_operations(operations, atomic=False):
+    """
+    Validate and apply a list of operations:
+        {"op": "create", "name": ..., "project_id": ..., "assignee_id": ...}
+        {"op": "update", "id": 4, "status": "DONE", ...}
+        {"op": "delete", "id": 5}
+    Invalid operations are skipped and reported; with `atomic` a single
+    invalid operation cancels the whole batch.
+    Returns (results, applied) where results has one dict per operation.
+    """
+    results = [None] * len(operations)
+
+    # Collect every referenced id so each table is read once
+    user_ids, project_ids, ticket_ids = set(), set(), set()
+    for index, item in enumerate(operations):
+        if not isinstance(item, dict) or item.get('op') not in OPERATIONS:
+            results[index] = _error(
+                index, item.get('op') if isinstance(item, dict) else None,
+                status.HTTP_400_BAD_REQUEST, f'op must be one of {", ".join(OPERATIONS)}'
+            )
+            continue
+        if item.get('assignee_id') and _uuid(item['assignee_id']):
+            user_ids.add(_uuid(item['assignee_id']))
+        if item.get('project_id') and _uuid(item['project_id']):
+            project_ids.add(_uuid(item['project_id']))
+        if item['op'] != CREATE and _ticket_id(item.get('id')) is not None:
+            ticket_ids.add(_ticket_id(item.get('id')))
+
+    with transaction.atomic():
+        users = User.objects.in_bulk(user_ids)
+        projects = Project.objects.in_bulk(project_ids)
+        # Lock the rows so concurrent single updates can't be lost
+        tickets = Ticket.objects.select_for_update().in_bulk(ticket_ids)
+
+        to_create, to_update, to_delete = [], [], []
+        update_fields = set()
+        moved = []
+        seen = set()
+        for index, item in enumerate(operations):
+            if results[index] is not None:
+                continue
+            op = item['op']
+
+            assignee = None
+            if item.get('assignee_id'):
+                assignee = users.get(_uuid(item['assignee_id']))
+                if assignee is None:
+                    results[index] = _error(index, op, status.HTTP_400_BAD_REQUEST, 'Assignee not found')
+                    continue
+            project = None
+            if item.get('project_id'):
+                project = projects.get(_uuid(item['project_id']))
+                if project is None:
+                    results[index] = _error(index, op, status.HTTP_404_NOT_FOUND, 'Project not found')
+                    continue
+
+            if op == CREATE:
+                if project is None:
+                    results[index] = _error(index, op, status.HTTP_400_BAD_REQUEST, 'project_id is required')
+                    continue
+                serializer = TicketSerializer(data=item)
+                if not serializer.is_valid():
+                    results[index] = _error(index, op, status.HTTP_400_BAD_REQUEST, serializer.errors)
+                    continue
+                to_create.append((index, Ticket(**serializer.validated_data, project=project, assignee=assignee)))
+                continue
+
+            ticket = tickets.get(_ticket_id(item.get('id')))
+            if ticket is None:
+                results[index] = _error(index, op, status.HTTP_404_NOT_FOUND, 'Ticket not found')
+                continue
+            if ticket.id in seen:
+                results[index] = _error(
+                    index, op, status.HTTP_400_BAD_REQUEST, 'Ticket appears in more than one operation'
+                )
+                continue
+            seen.add(ticket.id)
+
+            if op == DELETE:
+                to_delete.append((index, ticket))
+                continue
+
+            serializer = TicketSerializer(ticket, data=item, partial=True)
+            if not serializer.is_valid():
+                results[index] = _error(index, op, status.HTTP_400_BAD_REQUEST, serializer.errors)
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(ticket, field, value)
+                update_fields.add(field)
+            if assignee is not None:
+                ticket.assignee = assignee
+                update_fields.add('assignee')
+            if project is not None and project.id != ticket.project_id:
+                moved.append((ticket.id, ticket.project_id))
+                ticket.project = project
+                update_fields.add('project')
+            to_update.append((index, ticket))
+
+        failed = any(result is not None for result in results)
+        if atomic and failed:
+            for index, result in enumerate(results):
+                if result is None:
+                    results[index] = _error(
+                        index, operations[index]['op'], status.HTTP_424_FAILED_DEPENDENCY,
+                        'Not applied because another operation failed'
+                    )
+            return results, False
+
+        if to_create:
+            Ticket.objects.bulk_create([ticket for _, ticket in to_create])
+        if to_update and update_fields:
+            Ticket.objects.bulk_update([ticket for _, ticket in to_update], sorted(update_fields))
+        assignees.record_assignment(*{
+            ticket.assignee_id for index, ticket in to_create + to_update if operations[index].get('assignee_id')
+        })
+        counters.record_tickets(
+            [(None, ticket.counted_as()) for _, ticket in to_create]
+            + [(ticket._counted_as, ticket.counted_as()) for _, ticket in to_update]
+        )
+        if to_delete:
+            # Cascades to comments; the delete signals log and invalidate these
+            Ticket.objects.filter(id__in=[ticket.id for _, ticket in to_delete]).delete()
+
+        # What the save signals would have recorded, in the same order as
+        # update_ticket: a moved ticket leaves its old project first
+        entries = [
+            (Change.Entity.TICKET, ticket_id, old_project_id, Change.Action.DELETE)
+            for ticket_id, old_project_id in moved
+        ]
+        entries += [
+            (Change.Entity.TICKET, ticket.id, ticket.project_id, Change.Action.UPSERT)
+            for _, ticket in to_create + to_update
+        ]
+        if entries:
+            changes.record_many(entries)
+            snapshots.bump(
+                snapshots.BOARD,
+                *{snapshots.project_scope(project_id) for _, _, project_id, _ in entries},
+                *{snapshots.ticket_scope(ticket.id) for _, ticket in to_create + to_update},
+            )
+
+    # Serialize the written tickets with their relations in two queries
+    written = board_queryset().filter(id__in=[ticket.id for _, ticket in to_create + to_update])
+    data = {item['id']: item for item in TicketSerializer(written, many=True).data}
+    for index, ticket in to_create:
+        results[index] = {'index': index, 'op': CREATE, 'status': status.HTTP_201_CREATED,
+                          'ticket': data[ticket.id]}
+    for index, ticket in to_update:
+        results[index] = {'index': index, 'op': UPDATE, 'status': status.HTTP_200_OK,
+                          'ticket': data[ticket.id]}
+    for index, ticket in to_delete:
+        results[index] = {'index': index, 'op': DELETE, 'status': status.HTTP_200_OK,
+                          'message': 'Ticket deleted successfully'}
+    return results, True
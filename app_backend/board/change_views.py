@@ -0,0 +1,63 @@
+import uuid
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from .auth import authenticate_request
+from .changes import ResyncRequired, changes_since, current_cursor
+from .pagination import PaginationError
+
+
+@api_view(['GET'])
+@authenticate_request
+def get_changes(request):
+    """
+    Get the tickets, comments and projects changed since a cursor (authenticated).
+    Query parameters:
+        since (optional) - cursor from a previous response; without it only
+                           the current cursor is returned (take it before
+                           loading the full board)
+        project_id (optional) - only changes within this project
+    Returns: {
+        "cursor": "<cursor to pass as since next time>",
+        "changes": [
+            {"entity": "ticket", "id": "4", "action": "upsert", "data": {...}},
+            {"entity": "comment", "id": "uuid", "action": "delete"}
+        ],
+        "has_more": false
+    }
+    Responds 410 with "resync_required": true when the cursor is older than
+    the change log retention; reload the board and start from a new cursor.
+    """
+    project_id = request.GET.get('project_id')
+    if project_id:
+        try:
+            project_id = uuid.UUID(project_id)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid project_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    since = request.GET.get('since')
+    if not since:
+        return Response({
+            'cursor': current_cursor(),
+            'changes': [],
+            'has_more': False
+        }, status=status.HTTP_200_OK)
+    
+    try:
+        changes, cursor, has_more = changes_since(since, project_id)
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except ResyncRequired:
+        return Response(
+            {'error': 'Cursor is too old, resync required', 'resync_required': True},
+            status=status.HTTP_410_GONE
+        )
+    
+    return Response({
+        'cursor': cursor,
+        'changes': changes,
+        'has_more': has_more
+    }, status=status.HTTP_200_OK)
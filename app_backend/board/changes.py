@@ -0,0 +1,190 @@
+"""
+Change log for delta sync (GET /changes).
+
+Every ticket, comment and project create/update/delete appends a Change
+row in the same transaction (see board/signals.py). Clients keep an
+opaque cursor and ask for the entities that changed since it; the server
+collapses repeated changes to one entry per entity and returns current
+data for upserts and tombstones for deletes.
+
+Entries are handed out in (txid, id) order, txid being the transaction
+that wrote them. Ids and txids are taken when a row is written, not when
+its transaction commits, so a slow transaction (a large bulk write, a
+cascading delete) can commit after newer entries have been read. On
+Postgres only entries below the horizon, the oldest transaction still
+running, are handed out: everything under it has committed or never will,
+and anything committed later sorts after it. SQLite has one writer at a
+time, so its entries commit in id order and txid stays 0. A long-running
+write transaction anywhere on the server holds back delivery until it
+ends.
+
+Cursors carry the last (txid, id) the client saw and when the cursor was
+issued. compact() drops entries superseded by a newer one for the same
+entity and tombstones older than CHANGELOG_RETENTION, so a cursor older
+than the retention may have missed a delete and the client must resync.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from .events import publish_change
+from .models import Change
+from .pagination import PaginationError, decode_cursor, encode_cursor
+from .queries import board_queryset, comment_queryset, project_queryset
+from .serializers import CommentSerializer, ProjectSerializer, TicketSerializer
+
+
+class ResyncRequired(Exception):
+    """The cursor predates compacted history; the client must reload everything."""
+
+
+def record(entity, entity_id, project_id, action):
+    """
+    Append one change and push it to the project's event subscribers.
+    Call inside the transaction making the change.
+    """
+    Change.objects.create(
+        entity=entity,
+        entity_id=str(entity_id),
+        project_id=project_id,
+        action=action,
+    )
+    publish_change(entity, entity_id, project_id, action)
+
+
+def record_many(entries):
+    """
+    Append several changes with one INSERT, for bulk writes that bypass
+    the model signals. `entries` are (entity, entity_id, project_id, action)
+    tuples, in the order they happened.
+    """
+    Change.objects.bulk_create([
+        Change(entity=entity, entity_id=str(entity_id), project_id=project_id, action=action)
+        for entity, entity_id, project_id, action in entries
+    ])
+    for entry in entries:
+        publish_change(*entry)
+
+
+def _horizon():
+    """
+    txid below which every transaction has finished, or None where entries
+    commit in id order (SQLite).
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def current_cursor():
+    """Cursor for 'now', to take before loading the full board."""
+    horizon = _horizon()
+    if horizon is not None:
+        # Everything below the horizon has committed, so the board has it
+        position = [horizon, 0]
+    else:
+        position = [0, Change.objects.order_by('-id').values_list('id', flat=True).first() or 0]
+    return encode_cursor([*position, timezone.now().timestamp()])
+
+
+def _decode(cursor):
+    """(txid, id, issued_at) of a cursor."""
+    try:
+        values = decode_cursor(cursor, 3)
+    except PaginationError:
+        # Cursors from before entries carried a txid can't be placed
+        decode_cursor(cursor, 2)
+        raise ResyncRequired()
+    try:
+        return int(values[0]), int(values[1]), float(values[2])
+    except ValueError:
+        raise PaginationError('Invalid cursor')
+
+
+def _serialize(entity, ids):
+    """Current data for the given entity ids, keyed by str(id)."""
+    if entity == Change.Entity.TICKET:
+        rows, serializer = board_queryset().filter(id__in=ids), TicketSerializer
+    elif entity == Change.Entity.COMMENT:
+        rows, serializer = comment_queryset().filter(id__in=ids), CommentSerializer
+    else:
+        rows, serializer = project_queryset().filter(id__in=ids), ProjectSerializer
+    return {str(item['id']): item for item in serializer(rows, many=True).data}
+
+
+def changes_since(cursor, project_id=None, limit=None):
+    """
+    Return (changes, next_cursor, has_more) for entries after `cursor`.
+    Raises PaginationError for a malformed cursor and ResyncRequired for
+    one older than the retention window.
+    """
+    limit = limit or settings.CHANGELOG_PAGE_SIZE
+    txid, last_id, issued_at = _decode(cursor)
+
+    now = timezone.now()
+    retention = timedelta(seconds=settings.CHANGELOG_RETENTION)
+    issued = datetime.fromtimestamp(issued_at, tz=dt_timezone.utc)
+    if issued < now - retention:
+        raise ResyncRequired()
+
+    entries = Change.objects.filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=last_id))
+    horizon = _horizon()
+    if horizon is not None:
+        entries = entries.filter(txid__lt=horizon)
+    if project_id:
+        entries = entries.filter(project_id=project_id)
+    entries = list(entries.order_by('txid', 'id')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Keep only the latest entry per entity
+    latest = {}
+    for entry in entries:
+        latest.pop((entry.entity, entry.entity_id), None)
+        latest[(entry.entity, entry.entity_id)] = entry
+
+    upserts = {}
+    for entry in latest.values():
+        if entry.action == Change.Action.UPSERT:
+            upserts.setdefault(entry.entity, []).append(entry.entity_id)
+    data = {entity: _serialize(entity, ids) for entity, ids in upserts.items()}
+
+    changes = []
+    for (entity, entity_id), entry in latest.items():
+        item = data.get(entity, {}).get(entity_id)
+        if entry.action == Change.Action.UPSERT and item is not None:
+            changes.append({'entity': entity, 'id': entity_id, 'action': 'upsert', 'data': item})
+        else:
+            # Deleted, or deleted again by a change not yet handed out
+            changes.append({'entity': entity, 'id': entity_id, 'action': 'delete'})
+
+    if entries:
+        txid, last_id = entries[-1].txid, entries[-1].id
+    # Later pages are at least as new as the original cursor
+    next_cursor = encode_cursor([txid, last_id, issued_at if has_more else now.timestamp()])
+    return changes, next_cursor, has_more
+
+
+def compact(retention=None, now=None):
+    """
+    Delete entries superseded by a newer entry for the same entity (and
+    project), and tombstones older than the retention window.
+    Returns (superseded, expired) counts.
+    """
+    now = now or timezone.now()
+    retention = retention if retention is not None else settings.CHANGELOG_RETENTION
+    newer = Change.objects.filter(
+        entity=OuterRef('entity'),
+        entity_id=OuterRef('entity_id'),
+        project_id=OuterRef('project_id'),
+        id__gt=OuterRef('id'),
+    )
+    superseded, _ = Change.objects.filter(Exists(newer)).delete()
+    expired, _ = Change.objects.filter(
+        action=Change.Action.DELETE,
+        created_at__lt=now - timedelta(seconds=retention),
+    ).delete()
+    return superseded, expired
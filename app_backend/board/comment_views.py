@@ -1,25 +1,27 @@
+from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .models import Comment, Ticket
-from .serializers import CommentSerializer
+from .serializers import CommentSerializer, rows
+from . import snapshots
 from .auth import authenticate_request
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-import os
-import logging
+from .conditional import conditional_get
+from .queries import comment_queryset
+from .pagination import PaginationError, get_page_size, paginate, pagination_enabled
+from .notifications import queue_comment_notification
 
-# Get SendGrid API key from environment variable
-SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY', '')
-
-# Set up logger
-logger = logging.getLogger(__name__)
 
 @api_view(['GET'])
 @authenticate_request
+@conditional_get(lambda request, ticket_id: [snapshots.USERS, snapshots.ticket_scope(ticket_id)])
 def get_comments(request, ticket_id):
     """
     Get all comments for a specific ticket (authenticated).
+
+    When pagination is enabled returns {"results": [...], "next": "<cursor>" | null},
+    ordered by (created_at, id).
+    Query parameters: cursor (optional), limit (optional)
     """
     try:
         ticket = Ticket.objects.get(id=ticket_id)
@@ -29,9 +31,22 @@ def get_comments(request, ticket_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    comments = Comment.objects.filter(ticket=ticket)
-    serializer = CommentSerializer(comments, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Serialized from values() rows, see board/serializers/rows.py
+    comments = rows.comment_rows(comment_queryset().filter(ticket=ticket))
+    if not pagination_enabled(request):
+        return Response(rows.serialize_comments(comments), status=status.HTTP_200_OK)
+    
+    try:
+        comments, next_cursor = paginate(
+            comments, ['created_at', 'id'], request.GET.get('cursor'), get_page_size(request)
+        )
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'results': rows.serialize_comments(comments),
+        'next': next_cursor
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -43,7 +58,7 @@ def create_comment(request, ticket_id):
     Required fields: content
     """
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
+        ticket = Ticket.objects.select_related('assignee').get(id=ticket_id)
     except Ticket.DoesNotExist:
         return Response(
             {'error': 'Ticket not found'},
@@ -57,46 +72,16 @@ def create_comment(request, ticket_id):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Create comment with authenticated user as commentor
-    comment = Comment.objects.create(
-        ticket=ticket,
-        commentor=request.user,
-        content=content.strip()
-    )
-
-    # Send email notification if ticket has an assignee
-    if ticket.assignee:
-        # Check if SendGrid API key is configured
-        if not SENDGRID_API_KEY:
-            logger.warning("⚠️ SENDGRID_API_KEY not set - email notification skipped")
-        else:
-            # Truncate comment content to 10 words
-            comment_words = content.strip().split()
-            truncated_comment = ' '.join(comment_words[:10])
-            if len(comment_words) > 10:
-                truncated_comment += '...'
-
-            message = Mail(
-                from_email='ticket-update@cloud-collab.com',
-                to_emails=ticket.assignee.email,
-                subject='New comment on your ticket',
-                html_content=f'<strong>{request.user.name}</strong> commented on your ticket <strong>{ticket.name}</strong>:<br><br>"{truncated_comment}"',
-            )
-            try:
-                logger.info(f"📧 Sending email to {ticket.assignee.email}")
-                logger.debug(f"API Key: {SENDGRID_API_KEY[:20]}..." if SENDGRID_API_KEY else "Not set")
-                
-                sg = SendGridAPIClient(SENDGRID_API_KEY)
-                response = sg.send(message)
-                
-                logger.info(f"✅ Email sent successfully! Status: {response.status_code}")
-                logger.debug(f"Response body: {response.body}")
-                logger.debug(f"Response headers: {response.headers}")
-            except Exception as e:
-                logger.error(f"❌ Failed to send email: {str(e)}")
-                logger.exception(e)  # This logs the full traceback
-    else:
-        logger.info(f"ℹ️ Ticket {ticket.id} has no assignee - email notification skipped")
+    # Create comment with authenticated user as commentor. The email to the
+    # assignee is queued in the same transaction and sent by the
+    # send_notifications worker, off the request path.
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            ticket=ticket,
+            commentor=request.user,
+            content=content.strip()
+        )
+        queue_comment_notification(ticket, comment, request.user)
 
     serializer = CommentSerializer(comment)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
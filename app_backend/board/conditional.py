@@ -0,0 +1,83 @@
+"""
+Conditional GET support (ETag / If-None-Match) for read endpoints.
+
+The ETag is derived from the version counters in board.snapshots and the
+request URL, so it is computed before the view runs, without touching the
+database or the serializers. A matching If-None-Match is answered with
+304 Not Modified straight away.
+"""
+import hashlib
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from . import snapshots
+
+
+def _etag(request, scopes, versions):
+    validator = repr((request.get_full_path(), [(scope, versions[scope]) for scope in scopes]))
+    return quote_etag(hashlib.sha1(validator.encode()).hexdigest())
+
+
+def _not_modified(request, etag):
+    return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+
+def _finish(response, etag):
+    response['ETag'] = etag
+    # Let browsers store the body but always revalidate it
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def conditional_get(scopes_func):
+    """
+    Decorator for GET views, sync or async. `scopes_func(request, *args, **kwargs)`
+    returns the snapshot scopes the response depends on.
+    Apply below @authenticate_request so unauthenticated requests never
+    receive a 304.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not settings.CONDITIONAL_GET or request.method != 'GET':
+                    return await view_func(request, *args, **kwargs)
+                
+                scopes = scopes_func(request, *args, **kwargs)
+                versions = await sync_to_async(snapshots.get_versions)(scopes)
+                etag = _etag(request, scopes, versions)
+                if _not_modified(request, etag):
+                    return _finish(HttpResponseNotModified(), etag)
+                response = await view_func(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                return _finish(response, etag)
+            
+            return async_wrapper
+        
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not settings.CONDITIONAL_GET or request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+            
+            # Read the versions before building the response: a write racing
+            # with this request can only make the ETag older than the body,
+            # which costs the client a 200 later, never a stale 304
+            scopes = scopes_func(request, *args, **kwargs)
+            etag = _etag(request, scopes, snapshots.get_versions(scopes))
+            if _not_modified(request, etag):
+                return _finish(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            return _finish(response, etag)
+        
+        return wrapper
+    
+    return decorator
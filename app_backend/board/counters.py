@@ -0,0 +1,138 @@
+"""
+Denormalized counters, so cards and board columns can show totals
+without downloading what they count:
+- Ticket.comment_count                       comments on the ticket
+- Project.todo_count ... Project.wont_do_count  tickets per status
+- User.open_ticket_count                     TODO / IN_PROGRESS tickets assigned
+
+They are adjusted with F() expressions (UPDATE ... SET n = n + 1), so
+concurrent writers never lose each other's increments. Single writes go
+through the model signals (board/signals.py), which run inside the
+write's transaction; POST /tickets/bulk calls record_tickets() itself
+because bulk_create/bulk_update don't send signals. Anything that
+bypasses both (raw SQL, QuerySet.update() of status/project/assignee)
+leaves them off until `manage.py reconcile_counters` recomputes them
+from the tables. They are plain (signed) integers so that decrementing a
+drifted counter never fails the write that does it.
+"""
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from . import snapshots
+from .models import Comment, Project, Ticket, User
+
+# Project column counting each status, in board order
+STATUS_COUNT_FIELDS = {status: f'{status.lower()}_count' for status in Ticket.Status.values}
+
+OPEN_STATUSES = (Ticket.Status.TODO, Ticket.Status.IN_PROGRESS)
+
+
+def ticket_counts(project):
+    """{status: tickets} of a Project instance."""
+    return {status: getattr(project, field) for status, field in STATUS_COUNT_FIELDS.items()}
+
+
+def project_stats(project_id, counts):
+    """GET /projects/<id>/stats payload from a project's {status: tickets}."""
+    return {
+        'id': str(project_id),
+        'ticket_counts': counts,
+        'total': sum(counts.values()),
+        'open': sum(counts[status] for status in OPEN_STATUSES),
+    }
+
+
+def record_comments(ticket_id, delta):
+    """Add `delta` comments to a ticket's comment_count."""
+    Ticket.objects.filter(id=ticket_id).update(comment_count=F('comment_count') + delta)
+
+
+def record_tickets(transitions):
+    """
+    Apply ticket writes to the project and assignee counters.
+    `transitions` holds one (before, after) pair per written ticket, each a
+    Ticket.counted_as() tuple, or None when the ticket didn't exist before
+    (created) or doesn't any more (deleted). A project_id of None leaves
+    the project counts alone.
+    """
+    projects, users = defaultdict(Counter), Counter()
+    for before, after in transitions:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            project_id, status, assignee_id = state
+            if project_id is not None:
+                projects[project_id][STATUS_COUNT_FIELDS[status]] += sign
+            if assignee_id and status in OPEN_STATUSES:
+                users[assignee_id] += sign
+
+    changed = False
+    for project_id, deltas in projects.items():
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if updates:
+            Project.objects.filter(id=project_id).update(**updates)
+            changed = True
+    # One UPDATE per distinct delta, usually +1 and -1
+    by_delta = defaultdict(list)
+    for user_id, delta in users.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        User.objects.filter(id__in=user_ids).update(open_ticket_count=F('open_ticket_count') + delta)
+
+    if changed:
+        # Counts are part of the project list; project scopes are already
+        # bumped by whoever wrote the tickets
+        snapshots.bump(snapshots.PROJECTS)
+
+
+def _count(queryset, group_by):
+    """Correlated COUNT(*) of `queryset` rows per `group_by`, 0 when there are none."""
+    counted = queryset.order_by().values(group_by).annotate(n=Count('*')).values('n')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def _drifted(model, counts):
+    """Rows of `model` where any field differs from its recomputed count."""
+    return model.objects.filter(
+        Q(*[~Q(**{field: count}) for field, count in counts.items()], _connector=Q.OR)
+    )
+
+
+def reconcile(check=False):
+    """
+    Recompute every counter from the tables with one set-based UPDATE per
+    table, touching only rows that drifted.
+    Returns {'tickets': n, 'projects': n, 'users': n}: the rows corrected,
+    or with `check` the rows that would be.
+    """
+    counts = {
+        Ticket: {
+            'comment_count': _count(Comment.objects.filter(ticket=OuterRef('pk')), 'ticket'),
+        },
+        Project: {
+            field: _count(Ticket.objects.filter(project=OuterRef('pk'), status=status), 'project')
+            for status, field in STATUS_COUNT_FIELDS.items()
+        },
+        User: {
+            'open_ticket_count': _count(
+                Ticket.objects.filter(assignee=OuterRef('pk'), status__in=OPEN_STATUSES), 'assignee'
+            ),
+        },
+    }
+    if check:
+        drifted = {model: _drifted(model, fields).count() for model, fields in counts.items()}
+    else:
+        # The projects whose boards show corrected counts
+        project_ids = {
+            *_drifted(Ticket, counts[Ticket]).values_list('project_id', flat=True).distinct(),
+            *_drifted(Project, counts[Project]).values_list('id', flat=True),
+        }
+        with transaction.atomic():
+            drifted = {model: _drifted(model, fields).update(**fields) for model, fields in counts.items()}
+            snapshots.bump(
+                snapshots.BOARD, snapshots.PROJECTS,
+                *[snapshots.project_scope(project_id) for project_id in project_ids],
+            )
+    return {'tickets': drifted[Ticket], 'projects': drifted[Project], 'users': drifted[User]}
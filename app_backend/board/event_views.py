@@ -0,0 +1,90 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .auth import aget_user_from_token
+from .changes import current_cursor
+from .events import OVERFLOW, format_event, get_broker
+from .models import Project
+from .responses import json_response, method_not_allowed
+
+
+def _request_token(request):
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Token '):
+        return auth_header.replace('Token ', '', 1).strip()
+    return ''
+
+
+async def _event_stream(broker, subscription, cursor):
+    try:
+        yield f'retry: {settings.EVENT_RETRY_MS}\n'.encode()
+        yield format_event('ready', json.dumps({'cursor': cursor}))
+        while True:
+            try:
+                frame = await subscription.get(settings.EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the idle connection
+                yield b': heartbeat\n\n'
+                continue
+            if frame is OVERFLOW:
+                yield format_event('resync', json.dumps({'reason': 'Subscriber fell behind'}))
+                return
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def stream_project_events(request, project_id):
+    """
+    Stream change events for a project as Server-Sent Events (authenticated).
+    Requires the ASGI server (SERVER_MODE=asgi); answers 501 under WSGI.
+    Authenticate with 'Authorization: Token <token>'.
+    Events:
+        ready   - {"cursor": "<cursor>"} sent once; pass it to GET /changes
+        change  - {"entity": "ticket", "id": "4", "action": "upsert", "project_id": "uuid"}
+        resync  - the client fell behind and is disconnected; reconnect and
+                  catch up through GET /changes
+    """
+    if request.method != 'GET':
+        return method_not_allowed(request)
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker drains the endless stream through async_to_sync and
+        # would never get back to serving other requests
+        return json_response(
+            {'error': 'Event streams need the ASGI server (SERVER_MODE=asgi).'},
+            status=501
+        )
+    
+    token = _request_token(request)
+    if not token:
+        return json_response(
+            {'error': 'Authentication required. Provide "Authorization: Token <token>" header.'},
+            status=401
+        )
+    user = await aget_user_from_token(token)
+    if not user:
+        return json_response({'error': 'Invalid or expired token.'}, status=401)
+    
+    if not await Project.objects.filter(id=project_id).aexists():
+        return json_response({'error': 'Project not found'}, status=404)
+    
+    broker = get_broker()
+    # Subscribe before taking the cursor so nothing falls between the two
+    subscription = broker.subscribe(str(project_id))
+    try:
+        cursor = await sync_to_async(current_cursor)()
+    except BaseException:
+        broker.unsubscribe(subscription)
+        raise
+    
+    response = StreamingHttpResponse(
+        _event_stream(broker, subscription, cursor),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,200 @@
+"""
+Server-push board events (GET /projects/<id>/events).
+
+Every recorded change (see board/changes.py) is published, once its
+transaction commits, to the channel of its project. Subscribers are
+asyncio queues owned by streaming responses under ASGI; an event is
+encoded once per process and the same bytes are handed to every
+subscriber of the channel.
+
+Brokers (EVENT_BROKER setting):
+- LocalBroker: in-process fan-out only; fine for a single ASGI process
+  that also handles every write
+- RedisBroker: publishes through Redis pub/sub (EVENT_BROKER_URL) and
+  fans each message out locally, so writes on any pod reach subscribers
+  on every pod
+
+Each subscriber has a bounded queue (EVENT_QUEUE_SIZE). A client too slow
+to drain it is sent a 'resync' event and disconnected rather than letting
+its backlog grow; it reconnects and catches up through GET /changes.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from backend.metrics import board_event_subscribers, board_events_dropped_total
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of further events once a subscriber falls behind
+OVERFLOW = object()
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Events frame."""
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+class Subscription:
+    """One subscriber's queue, bound to the event loop that reads it."""
+
+    def __init__(self, channel, queue_size):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, frame):
+        """Enqueue a frame. Must run on self.loop."""
+        if self.overflowed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            # Drop the backlog; the client resyncs from the change log
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+            board_events_dropped_total.inc()
+            return
+        self.queue.put_nowait(frame)
+
+    async def get(self, timeout):
+        """Next frame or OVERFLOW; raises asyncio.TimeoutError when idle for `timeout`."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+def _deliver(subscriptions, frame):
+    for subscription in subscriptions:
+        subscription.put(frame)
+
+
+class LocalBroker:
+    """In-process pub/sub. publish() may be called from any thread."""
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or settings.EVENT_QUEUE_SIZE
+        self._lock = threading.Lock()
+        # Format: {channel: set of Subscription}
+        self._channels = {}
+
+    def subscribe(self, channel):
+        """Subscribe the running event loop to `channel`."""
+        subscription = Subscription(channel, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        board_event_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if not subscribers or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[subscription.channel]
+        board_event_subscribers.dec()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+    def publish(self, channel, payload):
+        """Send a JSON `payload` string to every subscriber of `channel`."""
+        self.dispatch(channel, payload)
+
+    def dispatch(self, channel, payload):
+        """Fan a payload out to this process's subscribers."""
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        if not subscribers:
+            return
+        frame = format_event('change', payload)
+        # One callback per event loop rather than one per subscriber
+        by_loop = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, subscriptions, frame)
+            except RuntimeError:
+                # The loop has shut down; its subscribers are gone
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Fans out across processes through Redis pub/sub. Publishing goes to
+    Redis only; a listener thread per process, started on the first
+    subscription, dispatches incoming messages to local subscribers.
+    """
+    prefix = 'board:events:'
+
+    def __init__(self, queue_size=None, url=None):
+        super().__init__(queue_size)
+        import redis
+
+        self.redis = redis.Redis.from_url(url or settings.EVENT_BROKER_URL)
+        self._listener = None
+
+    def subscribe(self, channel):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(
+                        target=self._listen, name='event-listener', daemon=True
+                    )
+                    self._listener.start()
+        return super().subscribe(channel)
+
+    def publish(self, channel, payload):
+        try:
+            self.redis.publish(f'{self.prefix}{channel}', payload)
+        except Exception as e:
+            # Streams are best effort; clients catch up through GET /changes
+            logger.error(f"Failed to publish board event: {str(e)}")
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{self.prefix}*')
+                for message in pubsub.listen():
+                    channel = message['channel'].decode()[len(self.prefix):]
+                    self.dispatch(channel, message['data'].decode())
+            except Exception as e:
+                logger.error(f"Board event listener lost Redis, reconnecting: {str(e)}")
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured by EVENT_BROKER."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENT_BROKER)()
+    return _broker
+
+
+def publish_change(entity, entity_id, project_id, action):
+    """Publish a change event to the project's subscribers once the transaction commits."""
+    if not settings.EVENT_STREAM or not project_id:
+        return
+    payload = json.dumps({
+        'entity': entity,
+        'id': str(entity_id),
+        'action': action,
+        'project_id': str(project_id),
+    })
+    channel = str(project_id)
+    transaction.on_commit(lambda: get_broker().publish(channel, payload))
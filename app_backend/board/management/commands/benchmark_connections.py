@@ -0,0 +1,171 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from board.management.commands.benchmark_reads import MODES as SERVERS, _percentile, _request, start_server, stop_server
+
+# Server environment per connection handling mode (see DATABASES in settings.py)
+MODES = {
+    # A new connection, and handshake, for every request
+    'direct': {'DATABASE_POOL': 'false', 'DATABASE_POOLER': 'false', 'DATABASE_CONN_MAX_AGE': '0'},
+    # The default: one connection per thread, kept between requests
+    'persistent': {'DATABASE_POOL': 'false', 'DATABASE_POOLER': 'false', 'DATABASE_CONN_MAX_AGE': '600'},
+    'pool': {'DATABASE_POOL': 'true', 'DATABASE_POOLER': 'false'},
+    # Needs --pooler-url
+    'pooler': {'DATABASE_POOL': 'false', 'DATABASE_POOLER': 'true', 'DATABASE_CONN_MAX_AGE': '600'},
+}
+PATHS = ['/tickets', '/projects', '/assignees?prefix=a']
+
+
+class Command(BaseCommand):
+    help = ('Measures what opening a PostgreSQL connection costs, then compares request latency '
+            'and server connections used with per-request connections, persistent connections, '
+            'the connection pool and an external pooler')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='direct,persistent,pool',
+                            help=f'Comma-separated modes to run ({", ".join(MODES)})')
+        parser.add_argument('--pooler-url',
+                            help='DATABASE_URL of a transaction-mode PgBouncer for the pooler mode')
+        parser.add_argument('--server', choices=SERVERS, default='asgi',
+                            help='Server to run (default asgi, whose sync views run on many threads)')
+        parser.add_argument('--workers', type=int, default=2, help='Server processes (default 2)')
+        parser.add_argument('--clients', type=int, default=16, help='Concurrent clients (default 16)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mode')
+        parser.add_argument('--connects', type=int, default=50,
+                            help='Connections opened to measure the handshake (default 50)')
+        parser.add_argument('--port', type=int, default=8803, help='Port for the server')
+        parser.add_argument('--email', default='alice@example.com')
+        parser.add_argument('--password', default='password123')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Connection pooling is PostgreSQL only; set DATABASE_URL')
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        unknown = [m for m in modes if m not in MODES]
+        if unknown:
+            raise CommandError(f'Unknown mode(s): {", ".join(unknown)}')
+        if 'pooler' in modes and not options['pooler_url']:
+            raise CommandError('The pooler mode needs --pooler-url')
+
+        handshakes = self.measure_handshake(options['connects'])
+        self.stdout.write(
+            f'Opening a connection takes {statistics.mean(handshakes):.2f}ms on average, '
+            f'p95 {_percentile(handshakes, 95):.2f}ms ({len(handshakes)} connections)'
+        )
+
+        results = {}
+        for mode in modes:
+            self.stdout.write(f'Benchmarking {mode} connections with {options["clients"]} clients '
+                              f'for {options["duration"]:.0f}s...')
+            results[mode] = self.run_mode(mode, options)
+
+        self.stdout.write('')
+        self.stdout.write(f'{"mode":<12}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+                          f'{"server conns":>14}{"errors":>8}')
+        for mode, r in results.items():
+            self.stdout.write(
+                f'{mode:<12}{r["rps"]:>10.0f}{r["p50"]:>10.1f}{r["p95"]:>10.1f}{r["p99"]:>10.1f}'
+                f'{r["connections"]:>14}{r["errors"]:>8}'
+            )
+        if 'direct' in results and len(results) > 1:
+            self.stdout.write('')
+            for mode, r in results.items():
+                if mode != 'direct':
+                    saved = results['direct']['p50'] - r['p50']
+                    self.stdout.write(f'{mode}: {saved:.1f}ms less per request than direct at the median')
+
+    def measure_handshake(self, count):
+        conn_params = connection.get_connection_params()
+        conn_params.pop('pool', None)
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            raw = connection.Database.connect(**conn_params)
+            with raw.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            timings.append((time.perf_counter() - started) * 1000)
+            raw.close()
+        return timings
+
+    def run_mode(self, mode, options):
+        env = dict(MODES[mode])
+        if mode == 'pooler':
+            env['DATABASE_URL'] = options['pooler_url']
+        port = options['port']
+        server = start_server(options['server'], port, options['workers'], env)
+        peak = [0]
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            status, body = _request(conn, 'POST', '/login',
+                                    {'email': options['email'], 'password': options['password']})
+            conn.close()
+            if status != 200:
+                raise CommandError(f'Login failed ({status}); run seed_data first')
+            token = json.loads(body)['token']
+
+            latencies = []
+            errors = [0]
+            lock = threading.Lock()
+            stop_at = time.monotonic() + options['duration']
+
+            def client(offset):
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                mine = []
+                failed = 0
+                i = offset
+                while time.monotonic() < stop_at:
+                    path = PATHS[i % len(PATHS)]
+                    i += 1
+                    started = time.perf_counter()
+                    try:
+                        status, _ = _request(conn, 'GET', path, token=token)
+                    except (OSError, http.client.HTTPException):
+                        failed += 1
+                        conn.close()
+                        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                        continue
+                    if status != 200:
+                        failed += 1
+                    mine.append((time.perf_counter() - started) * 1000)
+                conn.close()
+                with lock:
+                    latencies.extend(mine)
+                    errors[0] += failed
+
+            def watch_connections():
+                # Server connections open to this database, other than our own
+                while time.monotonic() < stop_at:
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            'SELECT count(*) FROM pg_stat_activity '
+                            'WHERE datname = current_database() AND pid <> pg_backend_pid()'
+                        )
+                        peak[0] = max(peak[0], cursor.fetchone()[0])
+                    time.sleep(0.2)
+                connections.close_all()
+
+            started = time.monotonic()
+            threads = [threading.Thread(target=client, args=(n,)) for n in range(options['clients'])]
+            threads.append(threading.Thread(target=watch_connections))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+        finally:
+            stop_server(server)
+
+        if not latencies:
+            raise CommandError(f'No successful requests in {mode} mode')
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': _percentile(latencies, 95),
+            'p99': _percentile(latencies, 99),
+            'connections': peak[0],
+            'errors': errors[0],
+        }
@@ -0,0 +1,131 @@
+import statistics
+import time
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from board.models import Comment, Ticket
+
+# Refresh the planner's statistics after seeding
+ANALYZE = {
+    'postgresql': ['ANALYZE ticket', 'ANALYZE comment'],
+    'sqlite': ['ANALYZE'],
+}
+
+
+class Command(BaseCommand):
+    help = ('Shows query plans and timings of the board, per-user and comment queries '
+            'with and without the composite indexes, optionally after seeding a large '
+            'synthetic dataset (use a scratch database)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true',
+                            help='Generate synthetic rows first with seed_data (1M tickets / 10M comments by default)')
+        parser.add_argument('--scratch-database', metavar='NAME',
+                            help='Name of the default database, confirming that --seed may write to it')
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tickets', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=10_000_000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+        parser.add_argument('--limit', type=int, default=50, help='Page size of the measured queries')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ANALYZE:
+            raise CommandError(f'Unsupported database: {vendor}')
+        if options['seed']:
+            self.seed(options)
+
+        queries = self.queries(options['limit'])
+        if not queries:
+            raise CommandError('No tickets to query; run with --seed first')
+        indexes = [
+            index.name for model in (Ticket, Comment) for index in model._meta.indexes
+        ]
+
+        self.stdout.write(f'Tickets: {Ticket.objects.count()}, comments: {Comment.objects.count()}')
+        # Drop the indexes inside a transaction that is rolled back, so
+        # "before" never touches the real schema. On Postgres the DROP locks
+        # the tables until the rollback.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            before = self.measure(queries, options['repeat'])
+            transaction.set_rollback(True)
+        after = self.measure(queries, options['repeat'])
+
+        for name in queries:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write('  Without composite indexes:')
+            self.stdout.write(self._indent(before[name][1]))
+            self.stdout.write('  With composite indexes:')
+            self.stdout.write(self._indent(after[name][1]))
+
+        self.stdout.write('')
+        self.stdout.write(f'{"query":<28}{"before ms":>12}{"after ms":>12}{"speedup":>10}')
+        for name in queries:
+            was, now = before[name][0], after[name][0]
+            speedup = f'{was / now:.1f}x' if now else '-'
+            self.stdout.write(f'{name:<28}{was:>12.2f}{now:>12.2f}{speedup:>10}')
+
+    def _indent(self, plan):
+        return '\n'.join(f'    {line}' for line in plan.splitlines())
+
+    def queries(self, limit):
+        """The access patterns the indexes are for, against sample rows."""
+        project_id = Ticket.objects.values_list('project_id', flat=True).first()
+        if project_id is None:
+            return {}
+        assignee_id = Ticket.objects.exclude(assignee=None).values_list('assignee_id', flat=True).first()
+        ticket_id = Comment.objects.values_list('ticket_id', flat=True).first()
+        open_statuses = [Ticket.Status.TODO, Ticket.Status.IN_PROGRESS]
+
+        queries = {
+            'board column': Ticket.objects.filter(status=Ticket.Status.TODO).order_by('id')[:limit],
+            'project board column': Ticket.objects.filter(
+                project_id=project_id, status=Ticket.Status.TODO
+            ).order_by('id')[:limit],
+        }
+        if assignee_id:
+            queries["user's open tickets"] = Ticket.objects.filter(
+                assignee_id=assignee_id, status__in=open_statuses
+            ).order_by('id')[:limit]
+        if ticket_id:
+            queries['ticket comments'] = Comment.objects.filter(
+                ticket_id=ticket_id
+            ).order_by('created_at', 'id')[:limit]
+        return queries
+
+    def measure(self, queries, repeat):
+        """Return {name: (median ms, plan)}."""
+        results = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            if connection.vendor == 'postgresql':
+                plan = queryset.explain(analyze=True)
+            else:
+                plan = queryset.explain()
+            results[name] = (statistics.median(timings), plan)
+        return results
+
+    def seed(self, options):
+        name = str(connection.settings_dict['NAME'])
+        if options['scratch_database'] != name:
+            raise CommandError(
+                f'--seed writes millions of rows into the default database ({name}); '
+                f'pass --scratch-database {name} to confirm it is a scratch database'
+            )
+        # seed_data also refuses a database with real users in it
+        call_command(
+            'seed_data', users=options['users'], projects=options['projects'],
+            tickets=options['tickets'], comments=options['comments'], stdout=self.stdout,
+        )
+        with connection.cursor() as cursor:
+            for statement in ANALYZE[connection.vendor]:
+                cursor.execute(statement)
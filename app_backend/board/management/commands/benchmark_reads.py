@@ -0,0 +1,192 @@
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Server command and extra environment per mode
+MODES = {
+    'wsgi': (['gunicorn', 'backend.wsgi:application', '--bind', '127.0.0.1:{port}',
+              '--workers', '{workers}', '--log-level', 'warning'], {}),
+    'asgi': (['uvicorn', 'backend.asgi:application', '--host', '127.0.0.1', '--port', '{port}',
+              '--workers', '{workers}', '--log-level', 'warning'], {'ASYNC_VIEWS': 'false'}),
+    'asgi-async': (['uvicorn', 'backend.asgi:application', '--host', '127.0.0.1', '--port', '{port}',
+                    '--workers', '{workers}', '--log-level', 'warning'], {'ASYNC_VIEWS': 'true'}),
+}
+
+
+def _request(conn, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Token {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def start_server(mode, port, workers, extra_env=None):
+    """Start the server of `mode` on `port` and wait until /healthz answers."""
+    command, mode_env = MODES[mode]
+    command = [part.format(port=port, workers=workers) for part in command]
+    env = {**os.environ, **mode_env, **(extra_env or {}), 'DJANGO_SETTINGS_MODULE': os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'backend.settings')}
+    try:
+        server = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=sys.stderr,
+        )
+    except FileNotFoundError:
+        raise CommandError(f'{command[0]} is not installed')
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise CommandError(f'{mode} server exited with code {server.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            status, _ = _request(conn, 'GET', '/healthz')
+            conn.close()
+            if status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(server)
+    raise CommandError(f'{mode} server did not start')
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+class Command(BaseCommand):
+    help = ('Compares concurrent-client throughput of the read endpoints under the '
+            'WSGI server, the ASGI server with sync views, and the ASGI server with async views')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi,asgi-async',
+                            help=f'Comma-separated modes to run ({", ".join(MODES)})')
+        parser.add_argument('--clients', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mode')
+        parser.add_argument('--workers', type=int, default=1, help='Server processes per mode')
+        parser.add_argument('--port', type=int, default=8801, help='Port for the servers')
+        parser.add_argument('--email', default='alice@example.com')
+        parser.add_argument('--password', default='password123')
+
+    def handle(self, *args, **options):
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        unknown = [m for m in modes if m not in MODES]
+        if unknown:
+            raise CommandError(f'Unknown mode(s): {", ".join(unknown)}')
+
+        results = {}
+        for mode in modes:
+            self.stdout.write(f'Benchmarking {mode} with {options["clients"]} clients '
+                              f'for {options["duration"]:.0f}s...')
+            results[mode] = self.run_mode(mode, options)
+            r = results[mode]
+            self.stdout.write(
+                f'  {r["rps"]:.0f} req/s, p50 {r["p50"]:.1f}ms, p95 {r["p95"]:.1f}ms, '
+                f'p99 {r["p99"]:.1f}ms, {r["errors"]} errors'
+            )
+
+        baseline = results.get('wsgi')
+        self.stdout.write('')
+        self.stdout.write(f'{"mode":<12}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"vs wsgi":>10}')
+        for mode, r in results.items():
+            ratio = f'{r["rps"] / baseline["rps"]:.2f}x' if baseline and baseline['rps'] else '-'
+            self.stdout.write(
+                f'{mode:<12}{r["rps"]:>10.0f}{r["p50"]:>10.1f}{r["p95"]:>10.1f}{r["p99"]:>10.1f}{ratio:>10}'
+            )
+
+    def _paths(self, port, token):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        _, body = _request(conn, 'GET', '/tickets', token=token)
+        board = json.loads(body)
+        tickets = [t for column in board.values() if isinstance(column, list) for t in column]
+        _, body = _request(conn, 'GET', '/projects', token=token)
+        projects = json.loads(body)
+        projects = projects['results'] if isinstance(projects, dict) else projects
+        conn.close()
+        paths = ['/tickets', '/projects', '/assignees?prefix=a']
+        if tickets:
+            paths.append(f'/tickets/{tickets[0]["id"]}/comments')
+        if projects:
+            paths.append(f'/projects/{projects[0]["id"]}')
+            paths.append(f'/tickets?project_id={projects[0]["id"]}')
+        return paths
+
+    def run_mode(self, mode, options):
+        port = options['port']
+        server = start_server(mode, port, options['workers'])
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            status, body = _request(conn, 'POST', '/login',
+                                    {'email': options['email'], 'password': options['password']})
+            conn.close()
+            if status != 200:
+                raise CommandError(f'Login failed ({status}); run seed_data first')
+            token = json.loads(body)['token']
+            paths = self._paths(port, token)
+
+            latencies = []
+            errors = [0]
+            lock = threading.Lock()
+            stop_at = time.monotonic() + options['duration']
+
+            def client(offset):
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                mine = []
+                failed = 0
+                i = offset
+                while time.monotonic() < stop_at:
+                    path = paths[i % len(paths)]
+                    i += 1
+                    started = time.perf_counter()
+                    try:
+                        status, _ = _request(conn, 'GET', path, token=token)
+                    except (OSError, http.client.HTTPException):
+                        failed += 1
+                        conn.close()
+                        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                        continue
+                    if status != 200:
+                        failed += 1
+                    mine.append((time.perf_counter() - started) * 1000)
+                conn.close()
+                with lock:
+                    latencies.extend(mine)
+                    errors[0] += failed
+
+            started = time.monotonic()
+            threads = [threading.Thread(target=client, args=(n,)) for n in range(options['clients'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+        finally:
+            stop_server(server)
+
+        if not latencies:
+            raise CommandError(f'No successful requests in {mode} mode')
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': _percentile(latencies, 95),
+            'p99': _percentile(latencies, 99),
+            'errors': errors[0],
+        }
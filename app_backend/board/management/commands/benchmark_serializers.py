@@ -0,0 +1,79 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from board.models import Ticket
+from board.queries import board_queryset, comment_queryset, project_queryset
+from board.renderers import ORJSONRenderer
+from board.serializers import CommentSerializer, ProjectSerializer, TicketSerializer, rows
+
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = ('Compares the DRF serializers with the values()-based list serialization, '
+            'and DRF\'s JSON renderer with orjson, on the current database; '
+            'fails if any output differs')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=1000,
+                            help='Tickets on the measured board (seed_data or benchmark_indexes --seed first)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the median is reported')
+
+    def handle(self, *args, **options):
+        limit, repeat = options['tickets'], options['repeat']
+        ids = list(Ticket.objects.order_by('id').values_list('id', flat=True)[:limit])
+        if not ids:
+            raise CommandError('No tickets; run seed_data first')
+        busiest = (Ticket.objects.filter(id__in=ids).annotate(n=Count('comments'))
+                   .order_by('-n').values_list('id', flat=True).first())
+
+        # Each list endpoint's data through DRF and through board/serializers/rows.py
+        tickets = board_queryset().filter(id__in=ids)
+        projects = project_queryset()
+        comments = comment_queryset().filter(ticket_id=busiest)
+        cases = {
+            f'tickets ({len(ids)})': (
+                lambda: TicketSerializer(tickets.all(), many=True).data,
+                lambda: rows.serialize_tickets(rows.ticket_rows(tickets.all())),
+            ),
+            f'projects ({projects.count()})': (
+                lambda: ProjectSerializer(projects.all(), many=True).data,
+                lambda: rows.serialize_projects(rows.project_rows(projects.all())),
+            ),
+            f'comments ({comments.count()})': (
+                lambda: CommentSerializer(comments.all(), many=True).data,
+                lambda: rows.serialize_comments(rows.comment_rows(comments.all())),
+            ),
+        }
+
+        drf_json, orjson = JSONRenderer(), ORJSONRenderer()
+        self.stdout.write(
+            f'{"endpoint":<22}{"DRF ms":>10}{"rows ms":>10}{"speedup":>9}'
+            f'{"json ms":>10}{"orjson ms":>11}{"speedup":>9}'
+        )
+        for name, (drf, lean) in cases.items():
+            expected = drf_json.render(drf())
+            data = lean()
+            if drf_json.render(data) != expected:
+                raise CommandError(f'{name}: values() serialization differs from the DRF serializers')
+            if orjson.render(data) != expected:
+                raise CommandError(f'{name}: orjson output differs from JSONRenderer')
+
+            drf_ms = _median_ms(drf, repeat)
+            lean_ms = _median_ms(lean, repeat)
+            json_ms = _median_ms(lambda: drf_json.render(data), repeat)
+            orjson_ms = _median_ms(lambda: orjson.render(data), repeat)
+            self.stdout.write(
+                f'{name:<22}{drf_ms:>10.1f}{lean_ms:>10.1f}{drf_ms / lean_ms:>8.1f}x'
+                f'{json_ms:>10.2f}{orjson_ms:>11.2f}{json_ms / orjson_ms:>8.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS('✓ Output is byte-identical on every path'))
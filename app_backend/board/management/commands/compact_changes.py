@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from board.changes import compact
+
+
+class Command(BaseCommand):
+    help = 'Compacts the change log: drops superseded entries and expired tombstones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention', type=int, default=settings.CHANGELOG_RETENTION,
+                            help='Seconds to keep tombstones (cursors older than this must resync)')
+
+    def handle(self, *args, **options):
+        superseded, expired = compact(options['retention'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Removed {superseded} superseded entries and {expired} expired tombstones'
+        ))
@@ -0,0 +1,127 @@
+import json
+import os
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def load_profiles(directory):
+    profiles = []
+    if not os.path.isdir(directory):
+        return profiles
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            # Being written or rotated away
+            continue
+    return profiles
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Lists the requests captured by the slow request profiler (REQUEST_PROFILER), '
+            'slowest first, or shows where one of them spent its time')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.REQUEST_PROFILER_DIR,
+                            help='Directory of the profiles (default REQUEST_PROFILER_DIR)')
+        parser.add_argument('--limit', type=int, default=20, help='Profiles listed (default 20)')
+        parser.add_argument('--view', help='Only list requests to this url name')
+        parser.add_argument('--by-view', action='store_true',
+                            help='Summarize the profiles per view instead of listing them')
+        parser.add_argument('--show', metavar='ID', help='Print the stacks and SQL of one profile')
+
+    def handle(self, *args, **options):
+        profiles = load_profiles(options['dir'])
+        if options['show']:
+            matches = [profile for profile in profiles if profile['id'].startswith(options['show'])]
+            if len(matches) != 1:
+                raise CommandError(f'{len(matches)} profiles match {options["show"]!r} in {options["dir"]}')
+            self.show(matches[0])
+            return
+
+        if options['view']:
+            profiles = [profile for profile in profiles if profile['view'] == options['view']]
+        if not profiles:
+            self.stdout.write(f'No profiles in {options["dir"]}')
+            return
+        if options['by_view']:
+            self.by_view(profiles)
+        else:
+            self.list(profiles, options['limit'])
+
+    def list(self, profiles, limit):
+        profiles = sorted(profiles, key=lambda profile: profile['duration_ms'], reverse=True)[:limit]
+        self.stdout.write(
+            f'{"id":<25}{"method":<8}{"view":<24}{"status":>7}{"total ms":>10}'
+            f'{"db ms":>9}{"queries":>9}  trigger'
+        )
+        for profile in profiles:
+            self.stdout.write(
+                f'{profile["id"]:<25}{profile["method"]:<8}{profile["view"]:<24}{profile["status"]:>7}'
+                f'{profile["duration_ms"]:>10.1f}{profile["db"]["duration_ms"]:>9.1f}'
+                f'{profile["db"]["queries"]:>9}  {profile["trigger"]}'
+            )
+
+    def by_view(self, profiles):
+        views = defaultdict(list)
+        for profile in profiles:
+            views[profile['view']].append(profile)
+        self.stdout.write(
+            f'{"view":<24}{"count":>7}{"p50 ms":>10}{"max ms":>10}{"db share":>10}{"queries":>9}'
+        )
+        rows = sorted(views.items(), key=lambda item: max(p['duration_ms'] for p in item[1]), reverse=True)
+        for view, captured in rows:
+            durations = [profile['duration_ms'] for profile in captured]
+            db = sum(profile['db']['duration_ms'] for profile in captured)
+            queries = sum(profile['db']['queries'] for profile in captured) / len(captured)
+            self.stdout.write(
+                f'{view:<24}{len(captured):>7}{_percentile(durations, 0.5):>10.1f}{max(durations):>10.1f}'
+                f'{db / max(sum(durations), 1e-9):>10.0%}{queries:>9.1f}'
+            )
+
+    def show(self, profile):
+        self.stdout.write(
+            f'{profile["method"]} {profile["path"]} ({profile["view"]}) -> {profile["status"]} '
+            f'at {profile["started_at"]}, trigger {profile["trigger"]}'
+        )
+        self.stdout.write(
+            f'{profile["duration_ms"]:.1f} ms, of which {profile["db"]["duration_ms"]:.1f} ms in '
+            f'{profile["db"]["queries"]} queries; {profile["samples"]} samples every '
+            f'{profile["interval_ms"]} ms'
+        )
+
+        stacks = profile['stacks']
+        samples = sum(count for _, count in stacks) or 1
+        own, total = Counter(), Counter()
+        for stack, count in stacks:
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        for title, counts in (('Self time', own), ('Total time', total)):
+            self.stdout.write(f'\n{title} (share of samples):')
+            for frame, count in counts.most_common(15):
+                self.stdout.write(f'  {count / samples:>6.1%}  {frame}')
+
+        self.stdout.write('\nHottest stacks:')
+        for stack, count in stacks[:5]:
+            frames = stack.split(';')
+            self.stdout.write(f'  {count / samples:>6.1%}  ' + ' > '.join(frames[-8:]))
+
+        self.stdout.write('\nSlowest queries:')
+        for query in profile['queries'][:10]:
+            self.stdout.write(f'  {query["duration_ms"]:>8.2f} ms  {query["sql"][:300]}')
+            if 'explain' in query:
+                for line in query['explain'].splitlines():
+                    self.stdout.write(f'               {line}')
+            elif 'explain_error' in query:
+                self.stdout.write(f'               EXPLAIN failed: {query["explain_error"]}')
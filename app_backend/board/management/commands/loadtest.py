@@ -0,0 +1,403 @@
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+import psycopg2
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from board.models import Ticket
+from .benchmark_reads import MODES, start_server, stop_server
+from .seed_data import FIXTURE_EMAILS, SEED_EMAIL, SEED_PASSWORD
+
+# Rows generated by seed_data per scale: users, projects, tickets, comments
+SCALES = {
+    'small': (50, 5, 2_000, 10_000),
+    'medium': (500, 50, 50_000, 250_000),
+    'large': (5_000, 200, 1_000_000, 5_000_000),
+}
+
+# Actions each client picks from, by weight
+WORKLOADS = {
+    'mixed': {'poll_board': 55, 'open_board': 5, 'drag_ticket': 15, 'comment_burst': 10,
+              'autocomplete': 10, 'login': 5},
+    'polling': {'poll_board': 1},
+    'drags': {'drag_ticket': 1},
+    'comments': {'comment_burst': 1},
+    'autocomplete': {'autocomplete': 1},
+    'login-storm': {'login': 1},
+}
+
+# Regressions smaller than this are noise, whatever the tolerance
+MIN_REGRESSION_MS = 2.0
+
+_SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) quer')
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _stats(samples, elapsed):
+    latencies = [ms for ms, _, _ in samples]
+    queries = [count for _, _, count in samples if count is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _ in samples if status >= 400),
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(_percentile(latencies, 95), 2),
+        'p99_ms': round(_percentile(latencies, 99), 2),
+        'queries': round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+class Client:
+    """One simulated user: a keep-alive connection, a token and its own random stream."""
+
+    def __init__(self, port, rng, token, board):
+        self.port = port
+        self.rng = rng
+        self.token = token
+        self.board = board
+        self.etags = {}
+        self.samples = []
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    def call(self, endpoint, method, path, body=None, headers=None, record=True):
+        headers = {'Content-Type': 'application/json', **(headers or {})}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                              headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            if record:
+                self.samples.append((endpoint, time.perf_counter() - started, 599, None, started))
+            return 599, {}, b''
+        elapsed = time.perf_counter() - started
+        if record:
+            match = _SERVER_TIMING_QUERIES.search(response.getheader('Server-Timing') or '')
+            self.samples.append(
+                (endpoint, elapsed, response.status, int(match.group(1)) if match else None, started)
+            )
+        return response.status, response, payload
+
+    def _project(self):
+        # A few busy projects get most of the traffic
+        return self.rng.choices(self.board.projects, weights=self.board.project_weights)[0]
+
+    def poll_board(self):
+        project = self._project()
+        path = f'/tickets?project_id={project}'
+        headers = {'If-None-Match': self.etags[path]} if path in self.etags else None
+        status, response, _ = self.call('get_tickets', 'GET', path, headers=headers)
+        if status == 200 and response.getheader('ETag'):
+            self.etags[path] = response.getheader('ETag')
+
+    def open_board(self):
+        self.call('get_projects', 'GET', '/projects')
+        self.call('get_tickets', 'GET', f'/tickets?project_id={self._project()}')
+
+    def drag_ticket(self):
+        ticket = self.rng.choice(self.board.tickets)
+        self.call('update_ticket', 'PATCH', f'/tickets/{ticket}',
+                  {'status': self.rng.choice(Ticket.Status.values)})
+
+    def comment_burst(self):
+        ticket = self.rng.choice(self.board.tickets)
+        for n in range(self.rng.randint(2, 5)):
+            self.call('create_comment', 'POST', f'/tickets/{ticket}/comments/create',
+                      {'content': f'Load test comment {n}'})
+        self.call('get_comments', 'GET', f'/tickets/{ticket}/comments')
+
+    def autocomplete(self):
+        # One request per keystroke, as the assignee picker sends them
+        name = self.rng.choice(self.board.names).lower()
+        for length in range(1, min(len(name), 4) + 1):
+            self.call('search_assignees', 'GET', f'/assignees?prefix={quote(name[:length])}')
+
+    def login(self):
+        n = self.rng.randrange(self.board.users)
+        self.call('login', 'POST', '/login', {'email': SEED_EMAIL.format(n=n), 'password': SEED_PASSWORD})
+
+
+class Board:
+    """What the clients act on, read from the server before the run."""
+
+    def __init__(self, projects, tickets, users, tokens, names):
+        self.projects = projects
+        self.project_weights = [1 / (rank + 1) for rank in range(len(projects))]
+        self.tickets = tickets
+        self.users = users
+        # One logged-in user per client
+        self.tokens = tokens
+        self.names = names
+
+
+class Command(BaseCommand):
+    help = ('Boots the backend against a scratch SQLite file or a Postgres database, seeds it, '
+            'replays mixed workloads with concurrent clients and reports latency percentiles, '
+            'throughput and queries per endpoint, optionally against a JSON baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', choices=('sqlite', 'postgres'), default='sqlite',
+                            help='sqlite uses a fresh temporary file; postgres uses --database-url')
+        # Deliberately not DATABASE_URL, which usually points at real data
+        parser.add_argument('--database-url',
+                            help='Scratch Postgres database to migrate, seed and test (required for postgres)')
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Use the data already in the database (postgres only)')
+        parser.add_argument('--scale', choices=SCALES, default='small', help='Data seeded (default small)')
+        parser.add_argument('--server', choices=MODES, default='wsgi')
+        parser.add_argument('--workers', type=int,
+                            help='Server processes (default 1 on SQLite, which locks on concurrent writers; 2 on Postgres)')
+        parser.add_argument('--port', type=int, default=8802)
+        parser.add_argument('--workloads', default='mixed',
+                            help=f'Comma-separated workloads to run in turn ({", ".join(WORKLOADS)})')
+        parser.add_argument('--clients', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=20.0, help='Measured seconds per workload')
+        parser.add_argument('--warmup', type=float, default=3.0, help='Unmeasured seconds before each workload')
+        parser.add_argument('--seed', type=int, default=1779,
+                            help='Random seed of the generated data and of the clients')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as a JSON baseline')
+        parser.add_argument('--baseline', metavar='PATH', help='Compare with a saved baseline and fail on regressions')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p95 increase and throughput drop against the baseline (default 0.2)')
+
+    def handle(self, *args, **options):
+        workloads = [w.strip() for w in options['workloads'].split(',') if w.strip()]
+        unknown = [w for w in workloads if w not in WORKLOADS]
+        if unknown:
+            raise CommandError(f'Unknown workload(s): {", ".join(unknown)}')
+        if options['workers'] is None:
+            options['workers'] = 1 if options['database'] == 'sqlite' else 2
+        elif options['workers'] > 1 and options['database'] == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite lets one process write at a time; expect "database is locked" errors with --workers > 1'
+            ))
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        scratch = tempfile.mkdtemp(prefix='loadtest-') if options['database'] == 'sqlite' else None
+        try:
+            env = self.database_env(options, scratch)
+            self.prepare(env, options)
+            server = start_server(options['server'], options['port'], options['workers'], {
+                **env,
+                # Query counts come from the Server-Timing header
+                'QUERY_PROFILER': 'true',
+            })
+            try:
+                board = self.discover(options)
+                results = {name: self.run(name, board, options) for name in workloads}
+            finally:
+                stop_server(server)
+        finally:
+            if scratch:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+        report = {
+            'meta': {key: options[key] for key in
+                     ('database', 'scale', 'server', 'workers', 'clients', 'duration', 'seed')},
+            'workloads': results,
+        }
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Saved results to {options["save"]}')
+        if baseline is not None:
+            self.compare(report, baseline, options['tolerance'])
+        errors = sum(result['total']['errors'] for result in results.values())
+        if errors:
+            raise CommandError(f'{errors} request(s) failed; the numbers above are not a valid measurement')
+
+    def database_env(self, options, scratch):
+        if options['database'] == 'sqlite':
+            return {'USE_SQLITE': 'true', 'SQLITE_PATH': os.path.join(scratch, 'loadtest.sqlite3')}
+        if not options['database_url']:
+            raise CommandError('--database postgres needs --database-url')
+        self.refuse_real_users(options['database_url'])
+        return {
+            'USE_SQLITE': 'false',
+            'DATABASE_URL': options['database_url'],
+            'DATABASE_SSL_REQUIRE': os.getenv('DATABASE_SSL_REQUIRE', 'false'),
+        }
+
+    def refuse_real_users(self, database_url):
+        """Fail before migrating, seeding or writing to a database with users seed_data didn't create."""
+        try:
+            conn = psycopg2.connect(database_url)
+        except psycopg2.Error as e:
+            raise CommandError(f'Cannot connect to --database-url: {e}')
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('\"user\"')")
+                if cursor.fetchone()[0] is None:
+                    return
+                cursor.execute('SELECT count(*) FROM "user" WHERE email <> ALL(%s) AND email NOT LIKE %s',
+                               [list(FIXTURE_EMAILS), SEED_EMAIL.format(n='%')])
+                real = cursor.fetchone()[0]
+        finally:
+            conn.close()
+        if real:
+            raise CommandError(f'--database-url has {real} real user(s); load test a scratch database')
+
+    def _manage(self, env, *args):
+        result = subprocess.run(
+            [sys.executable, 'manage.py', *args], cwd=settings.BASE_DIR,
+            env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'manage.py {args[0]} failed:\n{result.stderr}')
+
+    def prepare(self, env, options):
+        started = time.monotonic()
+        self._manage(env, 'migrate', '--noinput')
+        if options['no_seed'] and options['database'] == 'postgres':
+            return
+        users, projects, tickets, comments = SCALES[options['scale']]
+        self.stdout.write(f'Seeding {options["scale"]}: {users} users, {projects} projects, '
+                          f'{tickets} tickets, {comments} comments...')
+        self._manage(env, 'seed_data', '--seed', str(options['seed']),
+                     '--users', str(users), '--projects', str(projects),
+                     '--tickets', str(tickets), '--comments', str(comments))
+        self.stdout.write(f'  ready in {time.monotonic() - started:.0f}s')
+
+    def discover(self, options):
+        """Log in every client's user and collect the projects and tickets to act on."""
+        users = SCALES[options['scale']][0]
+        probe = Client(options['port'], random.Random(options['seed']), None, None)
+        status, _, body = probe.call('login', 'POST', '/login', {
+            'email': SEED_EMAIL.format(n=0), 'password': SEED_PASSWORD,
+        }, record=False)
+        if status != 200:
+            raise CommandError(f'Login failed ({status}); was the database seeded?')
+        probe.token = json.loads(body)['token']
+
+        _, _, body = probe.call('get_projects', 'GET', '/projects', record=False)
+        projects = json.loads(body)
+        projects = [p['id'] for p in (projects['results'] if isinstance(projects, dict) else projects)]
+        tickets = []
+        for project in projects[:20]:
+            _, _, body = probe.call('get_tickets', 'GET', f'/tickets?project_id={project}', record=False)
+            tickets += [t['id'] for column in json.loads(body).values() if isinstance(column, list)
+                        for t in column]
+        if not projects or not tickets:
+            raise CommandError('No projects or tickets to load; was the database seeded?')
+
+        tokens, names = [], []
+        for n in range(options['clients']):
+            _, _, body = probe.call('login', 'POST', '/login', {
+                'email': SEED_EMAIL.format(n=n % users), 'password': SEED_PASSWORD,
+            }, record=False)
+            login = json.loads(body)
+            tokens.append(login['token'])
+            names.append(login['user']['name'])
+        probe.conn.close()
+        return Board(projects, tickets, users, tokens, names)
+
+    def run(self, workload, board, options):
+        actions = WORKLOADS[workload]
+        names, weights = list(actions), list(actions.values())
+        self.stdout.write(f'Running {workload} with {options["clients"]} clients for '
+                          f'{options["warmup"]:.0f}s + {options["duration"]:.0f}s...')
+        measure_from = time.perf_counter() + options['warmup']
+        stop_at = measure_from + options['duration']
+        clients = [
+            Client(options['port'], random.Random(f'{options["seed"]}-{workload}-{n}'), token, board)
+            for n, token in enumerate(board.tokens)
+        ]
+
+        def drive(client):
+            while time.perf_counter() < stop_at:
+                getattr(client, client.rng.choices(names, weights=weights)[0])()
+            client.conn.close()
+
+        threads = [threading.Thread(target=drive, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        samples = {}
+        for client in clients:
+            for endpoint, seconds, status, queries, started in client.samples:
+                if measure_from <= started < stop_at:
+                    samples.setdefault(endpoint, []).append((seconds * 1000, status, queries))
+        if not samples:
+            raise CommandError(f'No requests completed in {workload}')
+        every = [sample for endpoint in samples.values() for sample in endpoint]
+        result = {
+            'total': _stats(every, options['duration']),
+            'endpoints': {endpoint: _stats(s, options['duration']) for endpoint, s in sorted(samples.items())},
+        }
+        self.print_result(result)
+        return result
+
+    def print_result(self, result):
+        self.stdout.write(
+            f'  {"endpoint":<20}{"requests":>9}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}'
+            f'{"p99 ms":>9}{"queries":>9}{"errors":>8}'
+        )
+        for endpoint, stats in [*result['endpoints'].items(), ('total', result['total'])]:
+            queries = f'{stats["queries"]:.1f}' if stats['queries'] is not None else '-'
+            line = (
+                f'  {endpoint:<20}{stats["requests"]:>9}{stats["rps"]:>9.0f}{stats["p50_ms"]:>9.1f}'
+                f'{stats["p95_ms"]:>9.1f}{stats["p99_ms"]:>9.1f}{queries:>9}{stats["errors"]:>8}'
+            )
+            self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+
+    def compare(self, report, baseline, tolerance):
+        changed = [
+            key for key, value in report['meta'].items()
+            if key != 'duration' and baseline.get('meta', {}).get(key) != value
+        ]
+        if changed:
+            self.stdout.write(self.style.WARNING(
+                f'Baseline was recorded with different {", ".join(changed)}; comparing anyway'
+            ))
+        regressions = []
+        for workload, result in report['workloads'].items():
+            was = baseline.get('workloads', {}).get(workload)
+            if was is None:
+                continue
+            if result['total']['rps'] < was['total']['rps'] * (1 - tolerance):
+                regressions.append(
+                    f'{workload}: {was["total"]["rps"]:.0f} -> {result["total"]["rps"]:.0f} req/s'
+                )
+            for endpoint, stats in result['endpoints'].items():
+                before = was['endpoints'].get(endpoint)
+                if before is None:
+                    continue
+                if (stats['p95_ms'] > before['p95_ms'] * (1 + tolerance)
+                        and stats['p95_ms'] - before['p95_ms'] > MIN_REGRESSION_MS):
+                    regressions.append(
+                        f'{workload}/{endpoint}: p95 {before["p95_ms"]:.1f} -> {stats["p95_ms"]:.1f} ms'
+                    )
+                if (stats['queries'] is not None and before['queries'] is not None
+                        and stats['queries'] > before['queries'] + 0.5):
+                    regressions.append(
+                        f'{workload}/{endpoint}: {before["queries"]:.1f} -> {stats["queries"]:.1f} queries'
+                    )
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f'  {regression}'))
+            raise CommandError(f'{len(regressions)} regression(s) against the baseline')
+        self.stdout.write(self.style.SUCCESS(f'✓ Within {tolerance:.0%} of the baseline'))
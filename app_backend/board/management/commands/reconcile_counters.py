@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from board.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the comment, ticket-per-status and open-ticket counters from the tables, '
+            'correcting any that drifted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drifted rows, and fail if there are any')
+
+    def handle(self, *args, **options):
+        drifted = reconcile(check=options['check'])
+        summary = ', '.join(f'{count} {table}' for table, count in drifted.items())
+        if options['check']:
+            if any(drifted.values()):
+                raise CommandError(f'Counters drifted on {summary}')
+            self.stdout.write(self.style.SUCCESS('✓ Counters are consistent'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'✓ Corrected counters on {summary}'))
@@ -1,9 +1,94 @@
-from django.core.management.base import BaseCommand
+import random
+import time
+import uuid
+from array import array
+from datetime import timedelta
+from itertools import accumulate
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import DateTimeField, Max, UUIDField
+from django.utils import timezone
+from board import snapshots
+from board.counters import OPEN_STATUSES, STATUS_COUNT_FIELDS
 from board.models import User, Project, Ticket, Comment
 
+# Generated users log in with these
+SEED_EMAIL = 'user{n}@example.com'
+SEED_PASSWORD = 'password'
+# The fixture users handle() creates. With the generated SEED_EMAIL users
+# they are all the users seed_data makes; anyone else is a real user
+FIXTURE_EMAILS = ('alice@example.com', 'bob@example.com', 'zyjnflsic@gmail.com')
+
+# Share of generated tickets per status, and of unassigned tickets
+STATUS_WEIGHTS = {
+    Ticket.Status.TODO: 30, Ticket.Status.IN_PROGRESS: 15, Ticket.Status.DONE: 48, Ticket.Status.WONT_DO: 7,
+}
+UNASSIGNED = 0.1
+# Skew of projects and assignees: the n-th most popular is picked 1 / n ** ZIPF as often as the first
+ZIPF = 1.1
+# Share of tickets nobody comments on, and the shape of the other threads'
+# lengths (Pareto; lower gives a longer tail)
+EMPTY_THREADS = 0.3
+THREAD_PARETO = 1.6
+# Share of a ticket's comments written by its assignee
+ASSIGNEE_COMMENTS = 0.4
+# Comment threads start up to this many seconds ago
+THREAD_SPAN = 365 * 24 * 3600
+
+FIRST_NAMES = (
+    'Ada', 'Alan', 'Amara', 'Ben', 'Chen', 'Dana', 'Diego', 'Elena', 'Farah', 'Grace', 'Hiro',
+    'Ines', 'Ivan', 'Jamal', 'Julia', 'Kofi', 'Lena', 'Liam', 'Maya', 'Mei', 'Noah', 'Olga',
+    'Omar', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Sofia', 'Tariq', 'Uma', 'Victor', 'Wen', 'Yara', 'Zoe',
+)
+LAST_NAMES = (
+    'Abbott', 'Baker', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jensen',
+    'Khan', 'Larsen', 'Moreau', 'Nakamura', 'Okafor', 'Patel', 'Quintero', 'Rossi', 'Singh',
+    'Tanaka', 'Usman', 'Vargas', 'Wang', 'Xu', 'Yilmaz', 'Zhang',
+)
+WORDS = (
+    'add', 'api', 'auth', 'board', 'bug', 'cache', 'check', 'cleanup', 'client', 'comment',
+    'config', 'crash', 'dashboard', 'data', 'deploy', 'docs', 'email', 'endpoint', 'error',
+    'export', 'fix', 'flaky', 'form', 'import', 'index', 'login', 'logs', 'migrate', 'mobile',
+    'notify', 'page', 'query', 'refactor', 'release', 'report', 'review', 'search', 'server',
+    'settings', 'slow', 'sync', 'test', 'ticket', 'timeout', 'token', 'update', 'upload', 'user',
+)
+
+
+def _zipf(n):
+    """Cumulative weights for picking among n items with a Zipf skew."""
+    return list(accumulate(1 / (rank + 1) ** ZIPF for rank in range(n)))
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+class _Text:
+    """Random text, cut from one long run of random words (cheaper than drawing every word)."""
+
+    def __init__(self, rng, length=100_000):
+        self.rng = rng
+        self.words = rng.choices(WORDS, k=length)
+
+    def __call__(self, low, high):
+        count = self.rng.randint(low, high)
+        start = self.rng.randrange(len(self.words) - count)
+        return ' '.join(self.words[start:start + count]).capitalize()
+
 
 class Command(BaseCommand):
-    help = 'Seeds the database with test users, projects, tickets, and comments'
+    help = ('Seeds the database with test users, projects, tickets, and comments, and '
+            'optionally with a large synthetic dataset (--users/--projects/--tickets/--comments)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=0, help='Synthetic users to generate')
+        parser.add_argument('--projects', type=int, default=0, help='Synthetic projects to generate')
+        parser.add_argument('--tickets', type=int, default=0, help='Synthetic tickets to generate')
+        parser.add_argument('--comments', type=int, default=0, help='Synthetic comments to generate')
+        parser.add_argument('--seed', type=int, default=1779,
+                            help='Random seed; the same seed generates the same rows')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction')
 
     def handle(self, *args, **options):
         self.stdout.write('Seeding database with test data...\n')
@@ -129,3 +214,175 @@ class Command(BaseCommand):
         self.stdout.write(f'  - Tickets: {Ticket.objects.count()} total')
         self.stdout.write(f'  - Comments: {Comment.objects.count()} total')
 
+        if any(options[name] for name in ('users', 'projects', 'tickets', 'comments')):
+            self.generate(options)
+
+    def generate(self, options):
+        """
+        Insert synthetic rows in batches, skipping the model signals, so the
+        counters are computed here and inserted with the rows. Every choice
+        comes from one random stream seeded by --seed, so the same options
+        generate the same rows; only timestamps move with the current time.
+        """
+        users, projects = options['users'], options['projects']
+        tickets, comments = options['tickets'], options['comments']
+        if projects and users < 1:
+            raise CommandError('--projects needs --users to create them')
+        if tickets and projects < 1:
+            raise CommandError('--tickets needs --projects to put them in')
+        if comments and tickets < 1:
+            raise CommandError('--comments needs --tickets to comment on')
+        if User.objects.filter(email=SEED_EMAIL.format(n=0)).exists():
+            raise CommandError('Synthetic data is already seeded; use a fresh database')
+        prefix, suffix = SEED_EMAIL.split('{n}')
+        real = User.objects.exclude(email__in=FIXTURE_EMAILS).exclude(email__startswith=prefix, email__endswith=suffix)
+        if real.exists():
+            raise CommandError('The database has real users; generate synthetic data in a scratch database')
+
+        rng = random.Random(options['seed'])
+        text = _Text(rng)
+        self.batch_size = options['batch_size']
+        self.stdout.write(f'\nGenerating {users} users, {projects} projects, {tickets} tickets, '
+                          f'{comments} comments...')
+        started = time.monotonic()
+
+        # Draw every ticket first, so the counters are known before any insert
+        user_weights, project_weights = _zipf(users), _zipf(projects)
+        statuses, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        ticket_projects, ticket_statuses, ticket_assignees = array('i'), array('b'), array('i')
+        project_counts = [[0] * len(statuses) for _ in range(projects)]
+        open_counts = [0] * users
+        for _ in range(tickets):
+            project = rng.choices(range(projects), cum_weights=project_weights)[0]
+            status = rng.choices(range(len(statuses)), weights=status_weights)[0]
+            assignee = -1
+            if rng.random() >= UNASSIGNED:
+                assignee = rng.choices(range(users), cum_weights=user_weights)[0]
+            ticket_projects.append(project)
+            ticket_statuses.append(status)
+            ticket_assignees.append(assignee)
+            project_counts[project][status] += 1
+            if assignee >= 0 and statuses[status] in OPEN_STATUSES:
+                open_counts[assignee] += 1
+        thread_lengths = self._thread_lengths(rng, tickets, comments)
+
+        user_ids = [_uuid(rng) for _ in range(users)]
+        names = [f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}' for _ in range(users)]
+        self._insert(User, users, (
+            (user_ids[n], SEED_EMAIL.format(n=n), SEED_PASSWORD, names[n], names[n].lower(),
+             SEED_EMAIL.format(n=n), open_counts[n])
+            for n in range(users)
+        ), ('id', 'email', 'password', 'name', 'name_lower', 'email_lower', 'open_ticket_count'))
+
+        project_ids = [_uuid(rng) for _ in range(projects)]
+        count_fields = tuple(STATUS_COUNT_FIELDS[status] for status in statuses)
+        self._insert(Project, projects, (
+            (project_ids[n], f'{text(1, 3)} {n}',
+             user_ids[rng.choices(range(users), cum_weights=user_weights)[0]], *project_counts[n])
+            for n in range(projects)
+        ), ('id', 'name', 'created_by', *count_fields))
+
+        # Ticket ids are assigned here, so comments can refer to them
+        first_ticket = (Ticket.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        self._insert(Ticket, tickets, (
+            (first_ticket + n, text(3, 7), text(8, 30), statuses[ticket_statuses[n]],
+             project_ids[ticket_projects[n]],
+             user_ids[ticket_assignees[n]] if ticket_assignees[n] >= 0 else None, thread_lengths[n])
+            for n in range(tickets)
+        ), ('id', 'name', 'description', 'status', 'project', 'assignee', 'comment_count'))
+        with connection.cursor() as cursor:
+            # Continue the id sequence (Postgres) after the explicit ids
+            for statement in connection.ops.sequence_reset_sql(no_style(), [Ticket]):
+                cursor.execute(statement)
+
+        now = timezone.now()
+
+        def thread_comments():
+            for n, length in enumerate(thread_lengths):
+                assignee = ticket_assignees[n]
+                # Threads start within the last year and run to now
+                at = now - timedelta(seconds=rng.uniform(0, THREAD_SPAN))
+                gap = (now - at) / (length + 1)
+                for _ in range(length):
+                    at += gap
+                    if assignee >= 0 and rng.random() < ASSIGNEE_COMMENTS:
+                        commentor = assignee
+                    else:
+                        commentor = rng.choices(range(users), cum_weights=user_weights)[0]
+                    yield _uuid(rng), first_ticket + n, user_ids[commentor], text(5, 40), at
+        self._insert(Comment, comments, thread_comments(),
+                     ('id', 'ticket', 'commentor', 'content', 'created_at'))
+
+        snapshots.bump(snapshots.USERS, snapshots.BOARD, snapshots.PROJECTS)
+        with connection.cursor() as cursor:
+            # Fresh statistics for the query planner
+            cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Generated synthetic data in {time.monotonic() - started:.0f}s '
+            f'(users log in as {SEED_EMAIL.format(n=0)} / {SEED_PASSWORD})'
+        ))
+
+    def _thread_lengths(self, rng, tickets, comments):
+        """Comments per ticket: a few long threads and many short or empty ones."""
+        if not tickets:
+            return []
+        weights = [
+            0 if rng.random() < EMPTY_THREADS else rng.paretovariate(THREAD_PARETO) for _ in range(tickets)
+        ]
+        total = sum(weights)
+        lengths = [int(comments * weight / total) for weight in weights]
+        for n in rng.choices(range(tickets), weights=weights, k=comments - sum(lengths)):
+            lengths[n] += 1
+        return lengths
+
+    def _insert(self, model, count, rows, field_names):
+        """
+        INSERT `rows` (tuples of `field_names` values) with multi-row
+        statements, committing every --batch-size rows. Values are adapted
+        per column here rather than through model instances, whose per-field
+        preparation costs more than the database's insert.
+        """
+        if not count:
+            return
+        label = model._meta.db_table
+        fields = [model._meta.get_field(name) for name in field_names]
+        adapters = [self._adapter(field) for field in fields]
+        # Rows per statement, within the database's limit on parameters
+        per_statement = connection.ops.bulk_batch_size(fields, [None] * self.batch_size)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        placeholders = f'({", ".join(["%s"] * len(fields))})'
+        insert = f'INSERT INTO {connection.ops.quote_name(label)} ({columns}) VALUES '
+
+        started = time.monotonic()
+        # About ten progress lines per table
+        step = max(count // 10, self.batch_size)
+        batch, done, reported = [], 0, 0
+        for row in rows:
+            batch.append([adapt(value) if adapt else value for adapt, value in zip(adapters, row)])
+            if len(batch) == self.batch_size:
+                self._execute(insert, placeholders, batch, per_statement)
+                done += len(batch)
+                batch = []
+                if done - reported >= step and done < count:
+                    reported = done
+                    self.stdout.write(f'  {label}: {done}/{count} ({time.monotonic() - started:.0f}s)')
+        if batch:
+            self._execute(insert, placeholders, batch, per_statement)
+            done += len(batch)
+        self.stdout.write(f'  {label}: {done}/{count} ({time.monotonic() - started:.0f}s)')
+
+    def _execute(self, insert, placeholders, rows, per_statement):
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(rows), per_statement):
+                chunk = rows[start:start + per_statement]
+                cursor.execute(insert + ', '.join([placeholders] * len(chunk)),
+                               [value for row in chunk for value in row])
+
+    def _adapter(self, field):
+        """The value conversion `field` needs before reaching the driver, or None."""
+        target = field.target_field if field.is_relation else field
+        if isinstance(target, UUIDField) and not connection.features.has_native_uuid_field:
+            return lambda value: value.hex if value is not None else None
+        if isinstance(target, DateTimeField):
+            return connection.ops.adapt_datetimefield_value
+        return None
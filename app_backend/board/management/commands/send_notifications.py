@@ -0,0 +1,77 @@
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from board.notifications import OutboxWorker, get_transport
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued email notifications from the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the currently due notifications and exit')
+        parser.add_argument('--batch-size', type=int, help='Rows claimed per batch')
+        parser.add_argument('--concurrency', type=int, help='Concurrent sends')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when the outbox is first found empty')
+        parser.add_argument('--max-poll-interval', type=float, default=30.0,
+                            help='Longest sleep while the outbox stays empty or the database is unreachable')
+        parser.add_argument('--transport', help='Dotted path overriding NOTIFICATION_TRANSPORT')
+
+    def handle(self, *args, **options):
+        transport = get_transport(options['transport'])
+        if not transport.is_configured():
+            self.stdout.write(self.style.WARNING(
+                '⚠️ Mail transport is not configured (SENDGRID_API_KEY not set) - notifications stay queued'
+            ))
+            return
+
+        worker = OutboxWorker(
+            transport,
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+        )
+        self.stdout.write(f'Sending notifications with {type(transport).__name__} '
+                          f'(batch {worker.batch_size}, concurrency {worker.concurrency})')
+        total_sent = total_failed = total_saved = 0
+        started = time.perf_counter()
+        # Sleep between polls doubles while there is nothing to do, up to
+        # max_poll_interval, and starts over as soon as a batch goes out
+        idle = options['poll_interval']
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    sent, failed, saved = worker.run_once()
+                except Exception:
+                    if options['once']:
+                        raise
+                    # Keep the long-lived worker up through database outages
+                    logger.exception(f'❌ Outbox batch failed, retrying in {idle:.0f}s')
+                    sent = failed = saved = 0
+                else:
+                    total_sent += sent
+                    total_failed += failed
+                    total_saved += saved
+                if sent or failed:
+                    self.stdout.write(f'  Sent {sent}, failed {failed}, {saved} emails saved by digesting')
+                    idle = options['poll_interval']
+                    continue
+                if options['once']:
+                    break
+                time.sleep(idle)
+                idle = min(idle * 2, options['max_poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            worker.close()
+
+        elapsed = time.perf_counter() - started
+        rate = total_sent / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Sent {total_sent}, failed {total_failed} in {elapsed:.1f}s ({rate:.1f} msg/s), '
+            f'{total_saved} emails saved by digesting'
+        ))
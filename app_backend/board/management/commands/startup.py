@@ -0,0 +1,72 @@
+import time
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from backend import startup
+from board.models import User
+
+
+class Command(BaseCommand):
+    help = ('Prepares the database for a starting container: migrates only when migrations are '
+            'pending, with one process migrating while the others wait, then seeds an empty database. '
+            'Run by docker-entrypoint.sh instead of migrate and seed_data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-migrate', action='store_true',
+                            help='Never migrate here; wait for another process (or a job) to do it')
+        parser.add_argument('--seed', action='store_true',
+                            help='Run seed_data when the database has no users yet')
+        parser.add_argument('--timeout', type=float, default=300,
+                            help='Seconds to wait for another process to migrate (default 300)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        phases = []
+
+        pending = startup.pending_migrations(connection)
+        phases.append(('check', time.monotonic() - started))
+        if pending:
+            self.stdout.write(f'{len(pending)} pending migration(s), first {pending[0][0]}.{pending[0][1]}')
+            mark = time.monotonic()
+            if options['no_migrate']:
+                self.wait_for_migrations(options['timeout'])
+            else:
+                self.migrate(options['timeout'])
+            phases.append(('migrate', time.monotonic() - mark))
+        self.stdout.write(f'Schema {startup.fingerprint(startup.disk_migrations())} is up to date')
+
+        if options['seed']:
+            mark = time.monotonic()
+            if User.objects.exists():
+                self.stdout.write('Database has users; not seeding')
+            else:
+                try:
+                    call_command('seed_data')
+                    self.stdout.write('Seeded the empty database')
+                except Exception as e:
+                    # Sample data is optional; don't keep the server down for it
+                    self.stderr.write(f'Seeding failed: {e}')
+            phases.append(('seed', time.monotonic() - mark))
+
+        timings = ', '.join(f'{name} {seconds:.2f}s' for name, seconds in phases)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Database ready in {time.monotonic() - started:.2f}s ({timings})'
+        ))
+
+    def migrate(self, timeout):
+        try:
+            with startup.migration_lock(connection, timeout):
+                # The previous holder may have applied them already
+                if startup.pending_migrations(connection):
+                    call_command('migrate', interactive=False, verbosity=1)
+                else:
+                    self.stdout.write('Migrated by another process')
+        except TimeoutError as e:
+            raise CommandError(str(e))
+
+    def wait_for_migrations(self, timeout):
+        deadline = time.monotonic() + timeout
+        while startup.pending_migrations(connection):
+            if time.monotonic() > deadline:
+                raise CommandError(f'Migrations still pending after {timeout:.0f}s')
+            time.sleep(1)
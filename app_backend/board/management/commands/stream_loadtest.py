@@ -0,0 +1,204 @@
+import asyncio
+import json
+import resource
+import statistics
+import time
+import urllib.request
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _api(base_url, method, path, body=None, token=None):
+    request = urllib.request.Request(
+        f'{base_url}{path}',
+        data=json.dumps(body).encode() if body is not None else None,
+        method=method,
+        headers={'Content-Type': 'application/json'},
+    )
+    if token:
+        request.add_header('Authorization', f'Token {token}')
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def _rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class Subscriber:
+    def __init__(self):
+        self.ready = False
+        self.received = []
+        self.error = None
+
+
+class Command(BaseCommand):
+    help = ('Opens many idle event stream subscribers against a running ASGI server '
+            'and measures connection cost and fan-out latency')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL')
+        parser.add_argument('--email', default='alice@example.com')
+        parser.add_argument('--password', default='password123')
+        parser.add_argument('--project', help='Project id to subscribe to (default: first project)')
+        parser.add_argument('--subscribers', type=int, default=2000)
+        parser.add_argument('--connect-concurrency', type=int, default=200,
+                            help='Connections opened at once')
+        parser.add_argument('--events', type=int, default=5,
+                            help='Ticket updates to publish once everyone is connected')
+        parser.add_argument('--hold', type=float, default=5.0,
+                            help='Seconds to keep the idle subscribers open before publishing')
+        parser.add_argument('--server-pid', type=int,
+                            help='Server process id, to report its memory per subscriber')
+
+    def handle(self, *args, **options):
+        # Each subscriber is one socket
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = options['subscribers'] + 100
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+        try:
+            asyncio.run(self.run(options))
+        except OSError as e:
+            raise CommandError(f'Load test failed: {e}')
+
+    async def _subscribe(self, host, port, path, token, subscriber, limit):
+        async with limit:
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write((
+                    f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+                    f'Accept: text/event-stream\r\nAuthorization: Token {token}\r\n\r\n'
+                ).encode())
+                await writer.drain()
+                status_line = await reader.readline()
+                if b' 200 ' not in status_line:
+                    subscriber.error = status_line.decode().strip() or 'connection closed'
+                    writer.close()
+                    return None
+            except OSError as e:
+                subscriber.error = str(e)
+                return None
+        return reader, writer
+
+    async def _read(self, reader, subscriber):
+        event = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                # Chunked transfer framing lines carry no "field:" prefix we use
+                line = line.decode(errors='replace').strip()
+                if line.startswith('event: '):
+                    event = line[len('event: '):]
+                elif line.startswith('data: ') and event:
+                    if event == 'ready':
+                        subscriber.ready = True
+                    elif event == 'change':
+                        subscriber.received.append((time.perf_counter(), json.loads(line[len('data: '):])))
+                    event = None
+        except (OSError, asyncio.CancelledError):
+            return
+
+    async def run(self, options):
+        base_url = options['url'].rstrip('/')
+        parts = urlsplit(base_url)
+        host, port = parts.hostname, parts.port or 80
+        loop = asyncio.get_running_loop()
+
+        login = await loop.run_in_executor(None, lambda: _api(
+            base_url, 'POST', '/login', {'email': options['email'], 'password': options['password']}
+        ))
+        token = login['token']
+        project_id = options['project']
+        if not project_id:
+            projects = await loop.run_in_executor(None, lambda: _api(base_url, 'GET', '/projects', token=token))
+            projects = projects['results'] if isinstance(projects, dict) else projects
+            if not projects:
+                raise CommandError('No projects to subscribe to; run seed_data first')
+            project_id = projects[0]['id']
+        board = await loop.run_in_executor(None, lambda: _api(
+            base_url, 'GET', f'/tickets?project_id={project_id}', token=token
+        ))
+        # Columns are lists keyed by status; skip the 'next' cursors
+        tickets = [t for column in board.values() if isinstance(column, list) for t in column]
+        if not tickets:
+            raise CommandError(f'Project {project_id} has no tickets to update')
+        ticket = tickets[0]
+
+        rss_before = _rss_mb(options['server_pid']) if options['server_pid'] else None
+        count = options['subscribers']
+        self.stdout.write(f'Opening {count} subscribers to project {project_id}...')
+        subscribers = [Subscriber() for _ in range(count)]
+        limit = asyncio.Semaphore(options['connect_concurrency'])
+        path = f'/projects/{project_id}/events'
+        started = time.perf_counter()
+        connections = await asyncio.gather(*(
+            self._subscribe(host, port, path, token, subscriber, limit) for subscriber in subscribers
+        ))
+        readers = [
+            asyncio.ensure_future(self._read(connection[0], subscriber))
+            for connection, subscriber in zip(connections, subscribers) if connection
+        ]
+        # Wait for the ready event on every open stream
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline:
+            open_count = sum(1 for c in connections if c)
+            if sum(1 for s in subscribers if s.ready) >= open_count:
+                break
+            await asyncio.sleep(0.1)
+        connect_time = time.perf_counter() - started
+        ready = sum(1 for s in subscribers if s.ready)
+        errors = [s.error for s in subscribers if s.error]
+        self.stdout.write(f'  {ready} ready, {len(errors)} failed in {connect_time:.1f}s')
+        if errors:
+            self.stdout.write(self.style.WARNING(f'  First error: {errors[0]}'))
+
+        await asyncio.sleep(options['hold'])
+        rss_idle = _rss_mb(options['server_pid']) if options['server_pid'] else None
+
+        latencies = []
+        for i in range(options['events']):
+            expected = i + 1
+            published = time.perf_counter()
+            await loop.run_in_executor(None, lambda: _api(
+                base_url, 'PUT', f'/tickets/{ticket["id"]}',
+                {'description': f'Load test update {expected}'}, token=token
+            ))
+            deadline = time.perf_counter() + 30
+            while time.perf_counter() < deadline:
+                if all(len(s.received) >= expected for s in subscribers if s.ready):
+                    break
+                await asyncio.sleep(0.01)
+            arrivals = [s.received[i][0] - published for s in subscribers if len(s.received) > i]
+            latencies.append(arrivals)
+            delivered = len(arrivals)
+            if arrivals:
+                self.stdout.write(
+                    f'  Event {expected}: delivered to {delivered}/{ready}, '
+                    f'p50 {statistics.median(arrivals) * 1000:.0f}ms, max {max(arrivals) * 1000:.0f}ms'
+                )
+            else:
+                self.stdout.write(self.style.WARNING(f'  Event {expected}: not delivered'))
+
+        for reader in readers:
+            reader.cancel()
+        for connection in connections:
+            if connection:
+                connection[1].close()
+
+        delivered = sum(len(a) for a in latencies)
+        wanted = ready * options['events']
+        summary = f'✓ {ready} idle subscribers, {delivered}/{wanted} events delivered'
+        if rss_before is not None and rss_idle is not None and ready:
+            summary += (f'; server RSS {rss_before:.0f}MB -> {rss_idle:.0f}MB '
+                        f'({(rss_idle - rss_before) * 1024 / ready:.1f}KB per subscriber)')
+        self.stdout.write(self.style.SUCCESS(summary))
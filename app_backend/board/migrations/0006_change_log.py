@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0005_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('ticket', 'Ticket'), ('comment', 'Comment'), ('project', 'Project')], max_length=20)),
+                ('entity_id', models.CharField(max_length=64)),
+                ('project_id', models.UUIDField(blank=True, null=True)),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'change_log',
+                'indexes': [models.Index(fields=['project_id', 'id'], name='change_log_project_idx'), models.Index(fields=['entity', 'entity_id', 'project_id', 'id'], name='change_log_entity_idx'), models.Index(fields=['created_at'], name='change_log_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+from django.db import migrations
+from board.search import SQLITE_TRIGGERS
+
+# Full-text index for GET /search (see board/search.py). The database
+# keeps it up to date on every write, including bulk writes and raw SQL.
+# The SQLite triggers are shared with board.search, which restores them
+# after migrations that rebuild the ticket or comment table.
+
+POSTGRES_FORWARDS = [
+    # Generated columns are recomputed by Postgres whenever the row changes
+    """
+    ALTER TABLE ticket ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ticket_search_idx ON ticket USING GIN (search_vector)",
+    """
+    ALTER TABLE comment ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(content, ''))
+    ) STORED
+    """,
+    "CREATE INDEX comment_search_idx ON comment USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS comment_search_idx",
+    "ALTER TABLE comment DROP COLUMN IF EXISTS search_vector",
+    "DROP INDEX IF EXISTS ticket_search_idx",
+    "ALTER TABLE ticket DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARDS = [
+    # External-content index over ticket, keyed by its integer id
+    """
+    CREATE VIRTUAL TABLE ticket_fts USING fts5(
+        name, description, content='ticket', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    "INSERT INTO ticket_fts(ticket_fts) VALUES ('rebuild')",
+    # Comments have UUID keys, so their index stores its own copy
+    """
+    CREATE VIRTUAL TABLE comment_fts USING fts5(
+        content, comment_id UNINDEXED, tokenize='porter unicode61'
+    )
+    """,
+    *SQLITE_TRIGGERS,
+    "INSERT INTO comment_fts(content, comment_id) SELECT content, id FROM comment",
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS comment_fts_update",
+    "DROP TRIGGER IF EXISTS comment_fts_delete",
+    "DROP TRIGGER IF EXISTS comment_fts_insert",
+    "DROP TABLE IF EXISTS comment_fts",
+    "DROP TRIGGER IF EXISTS ticket_fts_update",
+    "DROP TRIGGER IF EXISTS ticket_fts_delete",
+    "DROP TRIGGER IF EXISTS ticket_fts_insert",
+    "DROP TABLE IF EXISTS ticket_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0006_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARDS, 'sqlite': SQLITE_FORWARDS}),
+            _run({'postgresql': POSTGRES_BACKWARDS, 'sqlite': SQLITE_BACKWARDS}),
+        ),
+    ]
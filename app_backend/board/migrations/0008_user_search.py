@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+def fill_lowercase(apps, schema_editor):
+    # In Python rather than SQL LOWER(), which on SQLite only folds ASCII
+    User = apps.get_model('board', 'User')
+    users = list(User.objects.only('id', 'name', 'email'))
+    for user in users:
+        user.name_lower = user.name.lower()
+        user.email_lower = user.email.lower()
+    User.objects.bulk_update(users, ['name_lower', 'email_lower'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_lower',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_assigned_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='name_lower',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_lowercase, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['name_lower'], name='user_name_lower_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email_lower'], name='user_email_lower_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    AddIndex that builds with CREATE INDEX CONCURRENTLY on Postgres, so the
+    table stays writable while a large index builds; a plain AddIndex on
+    other databases.
+    """
+
+    def _drop_invalid(self, schema_editor):
+        # A failed concurrent build leaves an INVALID index behind that
+        # would make the retry fail with "already exists"
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+                "WHERE pg_class.relname = %s AND NOT pg_index.indisvalid",
+                [self.index.name],
+            )
+            if cursor.fetchone():
+                cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(self.index.name)}')
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            self._drop_invalid(schema_editor)
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('board', '0008_user_search'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='comment',
+            index=models.Index(fields=['ticket', 'created_at', 'id'], name='comment_ticket_created_idx'),
+        ),
+        AddIndexOnline(
+            model_name='ticket',
+            index=models.Index(fields=['project', 'status', 'id'], name='ticket_project_status_idx'),
+        ),
+        AddIndexOnline(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'id'], name='ticket_status_idx'),
+        ),
+        AddIndexOnline(
+            model_name='ticket',
+            index=models.Index(fields=['assignee', 'status', 'id'], name='ticket_assignee_status_idx'),
+        ),
+    ]
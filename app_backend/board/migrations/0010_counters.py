@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:40
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+STATUSES = ('TODO', 'IN_PROGRESS', 'DONE', 'WONT_DO')
+
+
+def _count(queryset, group_by):
+    counted = queryset.order_by().values(group_by).annotate(n=Count('*')).values('n')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    # One set-based UPDATE per table, like reconcile_counters
+    Ticket = apps.get_model('board', 'Ticket')
+    Comment = apps.get_model('board', 'Comment')
+    Project = apps.get_model('board', 'Project')
+    User = apps.get_model('board', 'User')
+    Ticket.objects.update(comment_count=_count(Comment.objects.filter(ticket=OuterRef('pk')), 'ticket'))
+    Project.objects.update(**{
+        f'{status.lower()}_count': _count(Ticket.objects.filter(project=OuterRef('pk'), status=status), 'project')
+        for status in STATUSES
+    })
+    User.objects.update(open_ticket_count=_count(
+        Ticket.objects.filter(assignee=OuterRef('pk'), status__in=['TODO', 'IN_PROGRESS']), 'assignee'
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0009_board_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='done_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='todo_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='wont_do_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='open_ticket_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
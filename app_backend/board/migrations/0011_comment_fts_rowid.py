@@ -0,0 +1,167 @@
+from django.db import migrations
+
+# Corrections to the search index of 0007.
+#
+# SQLite: comment_fts was keyed by an UNINDEXED comment_id column, so
+# every comment edit or delete scanned the whole index, and deleting a
+# ticket or project with many comments took quadratic time. Rows are now
+# keyed by an integer rowid, handed out by comment_fts_key, so the
+# triggers find their row directly.
+#
+# Postgres: 0007 added search_vector as GENERATED STORED columns, which
+# Postgres recomputes on every UPDATE of the row, so each status change
+# re-parsed the ticket's text. Dropping the expression keeps the column
+# and its GIN index as they are (a catalog-only change, Postgres 13+), and
+# a trigger then recomputes the vector only when the text changes.
+
+TICKET_VECTOR = (
+    "setweight(to_tsvector('english', coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}description, '')), 'B')"
+)
+COMMENT_VECTOR = "to_tsvector('english', coalesce({row}content, ''))"
+
+# table -> (vector, columns it is computed from)
+POSTGRES_VECTORS = {
+    'ticket': (TICKET_VECTOR, 'name, description'),
+    'comment': (COMMENT_VECTOR, 'content'),
+}
+
+SQLITE_FORWARDS = [
+    "DROP TRIGGER IF EXISTS comment_fts_update",
+    "DROP TRIGGER IF EXISTS comment_fts_delete",
+    "DROP TRIGGER IF EXISTS comment_fts_insert",
+    "DROP TABLE IF EXISTS comment_fts",
+    """
+    CREATE TABLE comment_fts_key (
+        id INTEGER PRIMARY KEY,
+        comment_id char(32) NOT NULL UNIQUE
+    )
+    """,
+    "CREATE VIRTUAL TABLE comment_fts USING fts5(content, tokenize='porter unicode61')",
+    "INSERT INTO comment_fts_key(comment_id) SELECT id FROM comment",
+    """
+    INSERT INTO comment_fts(rowid, content)
+    SELECT k.id, c.content FROM comment_fts_key k JOIN comment c ON c.id = k.comment_id
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_insert AFTER INSERT ON comment BEGIN
+        INSERT INTO comment_fts_key(comment_id) VALUES (new.id);
+        INSERT INTO comment_fts(rowid, content)
+        VALUES ((SELECT id FROM comment_fts_key WHERE comment_id = new.id), new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_delete AFTER DELETE ON comment BEGIN
+        DELETE FROM comment_fts WHERE rowid = (SELECT id FROM comment_fts_key WHERE comment_id = old.id);
+        DELETE FROM comment_fts_key WHERE comment_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_update AFTER UPDATE OF content ON comment BEGIN
+        UPDATE comment_fts SET content = new.content
+        WHERE rowid = (SELECT id FROM comment_fts_key WHERE comment_id = old.id);
+    END
+    """,
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS comment_fts_update",
+    "DROP TRIGGER IF EXISTS comment_fts_delete",
+    "DROP TRIGGER IF EXISTS comment_fts_insert",
+    "DROP TABLE IF EXISTS comment_fts",
+    "DROP TABLE IF EXISTS comment_fts_key",
+    """
+    CREATE VIRTUAL TABLE comment_fts USING fts5(
+        content, comment_id UNINDEXED, tokenize='porter unicode61'
+    )
+    """,
+    "INSERT INTO comment_fts(content, comment_id) SELECT content, id FROM comment",
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_insert AFTER INSERT ON comment BEGIN
+        INSERT INTO comment_fts(content, comment_id) VALUES (new.content, new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_delete AFTER DELETE ON comment BEGIN
+        DELETE FROM comment_fts WHERE comment_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_update AFTER UPDATE OF content ON comment BEGIN
+        UPDATE comment_fts SET content = new.content WHERE comment_id = old.id;
+    END
+    """,
+]
+
+
+def _generated(cursor, table):
+    cursor.execute(
+        "SELECT is_generated FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'search_vector'",
+        [table],
+    )
+    return cursor.fetchone()[0] == 'ALWAYS'
+
+
+def postgres_forwards(cursor):
+    for table, (vector, columns) in POSTGRES_VECTORS.items():
+        if _generated(cursor, table):
+            if cursor.db.pg_version < 130000:
+                # No DROP EXPRESSION before 13; the generated column keeps working
+                continue
+            cursor.execute(f'ALTER TABLE {table} ALTER COLUMN search_vector DROP EXPRESSION')
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {vector.format(row='NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        cursor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}')
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {columns} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()
+        """)
+
+
+def postgres_backwards(cursor):
+    # Back to 0007's generated columns, which rewrites both tables
+    for table, (vector, _) in POSTGRES_VECTORS.items():
+        if _generated(cursor, table):
+            continue
+        cursor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}')
+        cursor.execute(f'DROP FUNCTION IF EXISTS {table}_search_vector()')
+        cursor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+        cursor.execute(f'ALTER TABLE {table} DROP COLUMN search_vector')
+        cursor.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({vector.format(row="")}) STORED'
+        )
+        cursor.execute(f'CREATE INDEX {table}_search_idx ON {table} USING GIN (search_vector)')
+
+
+def _run(sqlite, postgres):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            for sql in sqlite:
+                schema_editor.execute(sql)
+        elif vendor == 'postgresql':
+            with schema_editor.connection.cursor() as cursor:
+                postgres(cursor)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run(SQLITE_FORWARDS, postgres_forwards),
+            _run(SQLITE_BACKWARDS, postgres_backwards),
+        ),
+    ]
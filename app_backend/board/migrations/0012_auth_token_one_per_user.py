@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:33
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Q
+
+
+def drop_duplicate_tokens(apps, schema_editor):
+    # Keep each user's longest-lived token; racing logins may have left more
+    AuthToken = apps.get_model('board', 'AuthToken')
+    newer = AuthToken.objects.filter(user=OuterRef('user')).filter(
+        Q(expires_at__gt=OuterRef('expires_at')) | Q(expires_at=OuterRef('expires_at'), key__gt=OuterRef('key'))
+    )
+    AuthToken.objects.filter(Exists(newer)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0011_comment_fts_rowid'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_tokens, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='authtoken',
+            constraint=models.UniqueConstraint(fields=('user',), name='auth_token_one_per_user'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+# Postgres only: stamp every change log row with the id of the transaction
+# writing it, so GET /changes can hold back rows until every transaction
+# before theirs has finished (see board/changes.py). Existing rows keep 0
+# and sort before everything written from now on.
+POSTGRES_FORWARDS = [
+    """
+    CREATE OR REPLACE FUNCTION change_log_txid() RETURNS trigger AS $$
+    BEGIN
+        NEW.txid := txid_current();
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS change_log_txid ON change_log",
+    """
+    CREATE TRIGGER change_log_txid BEFORE INSERT ON change_log
+    FOR EACH ROW EXECUTE FUNCTION change_log_txid()
+    """,
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS change_log_txid ON change_log",
+    "DROP FUNCTION IF EXISTS change_log_txid()",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0012_auth_token_one_per_user'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='change',
+            name='change_log_project_idx',
+        ),
+        migrations.AddField(
+            model_name='change',
+            name='txid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(_run(POSTGRES_FORWARDS), _run(POSTGRES_BACKWARDS)),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['txid', 'id'], name='change_log_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['project_id', 'txid', 'id'], name='change_log_project_pos_idx'),
+        ),
+    ]
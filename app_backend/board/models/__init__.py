@@ -2,6 +2,9 @@ from .user import User
 from .project import Project
 from .ticket import Ticket
 from .comment import Comment
+from .token import AuthToken
+from .notification import Notification
+from .change import Change
 
-__all__ = ['User', 'Project', 'Ticket', 'Comment']
+__all__ = ['User', 'Project', 'Ticket', 'Comment', 'AuthToken', 'Notification', 'Change']
 
@@ -0,0 +1,41 @@
+from django.db import models
+
+
+class Change(models.Model):
+    """
+    Append-only log of ticket, comment and project mutations, read by
+    GET /changes so polling clients only download what changed.
+    (txid, id) is the sync position; see board/changes.py.
+    """
+    class Entity(models.TextChoices):
+        TICKET = 'ticket', 'Ticket'
+        COMMENT = 'comment', 'Comment'
+        PROJECT = 'project', 'Project'
+
+    class Action(models.TextChoices):
+        UPSERT = 'upsert', 'Created or updated'
+        DELETE = 'delete', 'Deleted'
+
+    entity = models.CharField(max_length=20, choices=Entity.choices)
+    entity_id = models.CharField(max_length=64)
+    # Project the entity belonged to when it changed (a project's own id for projects)
+    project_id = models.UUIDField(null=True, blank=True)
+    action = models.CharField(max_length=20, choices=Action.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Transaction that wrote the entry: txid_current(), set by a trigger on
+    # Postgres; 0 on SQLite, whose single writer commits in id order
+    txid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        db_table = 'change_log'
+        indexes = [
+            # Sync: WHERE (txid, id) > (?, ?) ORDER BY txid, id
+            models.Index(fields=['txid', 'id'], name='change_log_position_idx'),
+            models.Index(fields=['project_id', 'txid', 'id'], name='change_log_project_pos_idx'),
+            # Compaction: newer entry for the same entity
+            models.Index(fields=['entity', 'entity_id', 'project_id', 'id'], name='change_log_entity_idx'),
+            models.Index(fields=['created_at'], name='change_log_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.entity} {self.entity_id}"
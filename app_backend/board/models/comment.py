@@ -22,6 +22,10 @@ class Comment(models.Model):
     class Meta:
         db_table = 'comment'
         ordering = ['created_at']  # Order comments by creation time (oldest first)
+        indexes = [
+            # A ticket's comments in order, paged by (created_at, id)
+            models.Index(fields=['ticket', 'created_at', 'id'], name='comment_ticket_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.commentor.name} on Ticket #{self.ticket.id}"
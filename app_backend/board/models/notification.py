@@ -0,0 +1,46 @@
+from django.db import models
+from django.utils import timezone
+from .ticket import Ticket
+
+
+class Notification(models.Model):
+    """
+    Outbox row for an email notification. Written in the same transaction
+    as the change that triggers it and delivered later by the
+    send_notifications worker.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    recipient = models.CharField(max_length=255)
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notifications'
+    )
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'notification'
+        indexes = [
+            # The worker polls for due pending rows
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notification to {self.recipient} ({self.status})"
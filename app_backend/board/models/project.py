@@ -11,6 +11,11 @@ class Project(models.Model):
         related_name='created_projects'
     )
     name = models.CharField(max_length=255)
+    # Tickets per status, maintained by board/counters.py
+    todo_count = models.IntegerField(default=0, editable=False)
+    in_progress_count = models.IntegerField(default=0, editable=False)
+    done_count = models.IntegerField(default=0, editable=False)
+    wont_do_count = models.IntegerField(default=0, editable=False)
 
     class Meta:
         db_table = 'project'
@@ -30,10 +30,31 @@ class Ticket(models.Model):
         blank=True,
         related_name='assigned_tickets'
     )
+    # Maintained by board/counters.py
+    comment_count = models.IntegerField(default=0, editable=False)
 
     class Meta:
         db_table = 'ticket'
+        indexes = [
+            # Board columns, paged by id: WHERE [project_id = ? AND] status = ? AND id > ? ORDER BY id
+            models.Index(fields=['project', 'status', 'id'], name='ticket_project_status_idx'),
+            models.Index(fields=['status', 'id'], name='ticket_status_idx'),
+            # A user's tickets by status
+            models.Index(fields=['assignee', 'status', 'id'], name='ticket_assignee_status_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        ticket = super().from_db(db, field_names, values)
+        # Remember what the counters count this row as, so a save can move it
+        if not {'project_id', 'status', 'assignee_id'} & ticket.get_deferred_fields():
+            ticket._counted_as = ticket.counted_as()
+        return ticket
+
+    def counted_as(self):
+        """(project_id, status, assignee_id): the counters this ticket adds to."""
+        return (self.project_id, self.status, self.assignee_id)
+
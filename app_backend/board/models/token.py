@@ -0,0 +1,23 @@
+from django.db import models
+from .user import User
+
+
+class AuthToken(models.Model):
+    key = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='auth_tokens'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'auth_token'
+        constraints = [
+            # One token per user, so concurrent logins can't both create one
+            models.UniqueConstraint(fields=['user'], name='auth_token_one_per_user'),
+        ]
+
+    def __str__(self):
+        return f"Token for {self.user_id}"
@@ -7,10 +7,36 @@ class User(models.Model):
     email = models.CharField(max_length=255, unique=True)
     password = models.CharField(max_length=255)
     name = models.CharField(max_length=255)
+    # Lowercase copies for indexed prefix search (see board/assignees.py);
+    # kept in step by save(), so set them yourself with bulk_create/update()
+    name_lower = models.CharField(max_length=255, default='', editable=False)
+    email_lower = models.CharField(max_length=255, default='', editable=False)
+    # Last time a ticket was assigned to the user; ranks assignee search
+    last_assigned_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # TODO and IN_PROGRESS tickets assigned, maintained by board/counters.py
+    open_ticket_count = models.IntegerField(default=0, editable=False)
 
     class Meta:
         db_table = 'user'
+        indexes = [
+            # varchar_pattern_ops lets Postgres use the index for LIKE 'prefix%'
+            # under any collation; other databases ignore the opclass
+            models.Index(fields=['name_lower'], name='user_name_lower_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['email_lower'], name='user_email_lower_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        self.name_lower = self.name.lower()
+        self.email_lower = self.email.lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'name' in update_fields:
+                update_fields.add('name_lower')
+            if 'email' in update_fields:
+                update_fields.add('email_lower')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
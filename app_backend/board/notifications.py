@@ -0,0 +1,306 @@
+"""
+Email notifications via a transactional outbox.
+
+Views call queue_comment_notification() inside their transaction, which
+only writes a Notification row, and only when the mail transport is
+configured. The send_notifications management command
+runs an OutboxWorker that claims due rows, coalesces them into digests per
+recipient, delivers them through a mail transport with bounded
+concurrency, and retries failures with exponential backoff, so a slow mail
+provider never stalls a request.
+
+Transports (NOTIFICATION_TRANSPORT setting):
+- SendGridTransport: SendGrid v3 API over one kept-alive HTTPS connection
+  per sending thread
+- FakeTransport: local sink that records messages in memory, with optional
+  simulated latency and failures, for throughput tests without network
+"""
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from backend.metrics import notification_emails_saved_total
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """Raised by a transport when a message could not be delivered."""
+
+
+def queue_comment_notification(ticket, comment, author):
+    """
+    Queue an email to the ticket's assignee about a new comment.
+    Call inside the transaction that creates the comment.
+    """
+    if not ticket.assignee:
+        logger.info(f"ℹ️ Ticket {ticket.id} has no assignee - email notification skipped")
+        return None
+    if not get_transport().is_configured():
+        # Nothing would ever send it, so don't let the outbox grow
+        logger.debug(f"ℹ️ Mail transport is not configured - email notification for ticket {ticket.id} skipped")
+        return None
+
+    # Truncate comment content to 10 words
+    comment_words = comment.content.split()
+    truncated_comment = ' '.join(comment_words[:10])
+    if len(comment_words) > 10:
+        truncated_comment += '...'
+
+    # Hold the notification for the digest window so later comments to the
+    # same assignee can be coalesced into one email
+    return Notification.objects.create(
+        recipient=ticket.assignee.email,
+        ticket=ticket,
+        subject='New comment on your ticket',
+        html_content=f'<strong>{author.name}</strong> commented on your ticket <strong>{ticket.name}</strong>:<br><br>"{truncated_comment}"',
+        next_attempt_at=timezone.now() + timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW),
+    )
+
+
+class SendGridTransport:
+    """
+    Sends through the SendGrid v3 mail API. Each sending thread keeps its
+    own HTTPS connection alive across messages, so the TLS handshake is
+    paid once per thread rather than once per email.
+    """
+    host = 'api.sendgrid.com'
+    path = '/v3/mail/send'
+
+    def __init__(self, api_key=None, timeout=10):
+        self.api_key = api_key if api_key is not None else settings.SENDGRID_API_KEY
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def is_configured(self):
+        return bool(self.api_key)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def send(self, message):
+        from sendgrid.helpers.mail import Mail
+
+        payload = Mail(
+            from_email=message['from_email'],
+            to_emails=message['to'],
+            subject=message['subject'],
+            html_content=message['html_content'],
+        ).get()
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+        }
+        conn = self._connection()
+        try:
+            conn.request('POST', self.path, body=json.dumps(payload), headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            # Drop the broken connection; the next message reconnects
+            self._reset()
+            raise DeliveryError(str(e))
+        if response.status >= 300:
+            raise DeliveryError(f"SendGrid returned {response.status}: {body[:200]!r}")
+
+
+class FakeTransport:
+    """
+    Local mail sink. Keeps delivered messages in `sent` and can simulate
+    provider latency (FAKE_MAIL_LATENCY_MS) and a failure rate
+    (FAKE_MAIL_FAILURE_RATE, 0-1).
+    """
+
+    def __init__(self, latency_ms=None, failure_rate=None):
+        self.latency = (
+            latency_ms if latency_ms is not None else settings.FAKE_MAIL_LATENCY_MS
+        ) / 1000
+        self.failure_rate = (
+            failure_rate if failure_rate is not None else settings.FAKE_MAIL_FAILURE_RATE
+        )
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def is_configured(self):
+        return True
+
+    def send(self, message):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise DeliveryError('Simulated delivery failure')
+        with self._lock:
+            self.sent.append(message)
+        logger.debug(f"📭 Fake mail to {message['to']}: {message['subject']}")
+
+
+def get_transport(path=None):
+    """Instantiate the configured mail transport."""
+    return import_string(path or settings.NOTIFICATION_TRANSPORT)()
+
+
+class OutboxWorker:
+    """
+    Drains the notification outbox: claims due PENDING rows, coalesces
+    them into per-recipient digests, sends the digests concurrently and
+    records the outcome on every row.
+
+    New notifications wait NOTIFICATION_DIGEST_WINDOW seconds before they
+    are due. When one falls due, the recipient's other pending rows are
+    claimed with it (up to digest_max_batch per message), so a busy thread
+    produces one email per window instead of one per comment.
+    """
+
+    def __init__(self, transport, batch_size=None, concurrency=None, max_attempts=None,
+                 backoff_base=None, backoff_max=None, lease=None,
+                 digest_max_batch=None, digest_by_ticket=None):
+        self.transport = transport
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.concurrency = concurrency or settings.NOTIFICATION_CONCURRENCY
+        self.max_attempts = max_attempts or settings.NOTIFICATION_MAX_ATTEMPTS
+        self.backoff_base = backoff_base or settings.NOTIFICATION_BACKOFF_BASE
+        self.backoff_max = backoff_max or settings.NOTIFICATION_BACKOFF_MAX
+        # How long a claimed row stays hidden from other workers
+        self.lease = lease or settings.NOTIFICATION_LEASE
+        self.digest_max_batch = digest_max_batch or settings.NOTIFICATION_DIGEST_MAX_BATCH
+        self.digest_by_ticket = (
+            digest_by_ticket if digest_by_ticket is not None
+            else settings.NOTIFICATION_DIGEST_BY_TICKET
+        )
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='mail')
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def _digest_key(self, notification):
+        if self.digest_by_ticket:
+            return notification.recipient, notification.ticket_id
+        return notification.recipient
+
+    def claim(self):
+        """
+        Claim up to batch_size due rows, plus the not-yet-due pending rows
+        that can join their digests, by pushing next_attempt_at past the
+        lease so concurrent workers skip them.
+        Returns a list of digests (lists of notifications).
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            pending = Notification.objects.select_for_update(skip_locked=True).filter(
+                status=Notification.Status.PENDING
+            )
+            due = list(pending.filter(next_attempt_at__lte=now).order_by('next_attempt_at')[:self.batch_size])
+            if not due:
+                return []
+            recipients = {n.recipient for n in due}
+            waiting = list(
+                pending.filter(recipient__in=recipients, next_attempt_at__gt=now)
+                .exclude(id__in=[n.id for n in due])
+                .order_by('created_at')[:len(due) * self.digest_max_batch]
+            )
+
+            groups = {}
+            for notification in due:
+                groups.setdefault(self._digest_key(notification), []).append(notification)
+            for notification in waiting:
+                group = groups.get(self._digest_key(notification))
+                # Only join digests that are going out now and still have room
+                if group is not None and len(group) % self.digest_max_batch:
+                    group.append(notification)
+
+            digests = []
+            for group in groups.values():
+                for start in range(0, len(group), self.digest_max_batch):
+                    digests.append(group[start:start + self.digest_max_batch])
+            Notification.objects.filter(id__in=[n.id for d in digests for n in d]).update(
+                next_attempt_at=now + timedelta(seconds=self.lease)
+            )
+        return digests
+
+    def backoff(self, attempts):
+        """Exponential backoff with jitter, capped at backoff_max seconds."""
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _message(self, digest):
+        first = digest[0]
+        if len(digest) == 1:
+            subject, html_content = first.subject, first.html_content
+        else:
+            subject = f'{len(digest)} new comments on your tickets'
+            html_content = '<hr>'.join(n.html_content for n in digest)
+        return {
+            'from_email': settings.NOTIFICATION_FROM_EMAIL,
+            'to': first.recipient,
+            'subject': subject,
+            'html_content': html_content,
+        }
+
+    def _send(self, digest):
+        try:
+            self.transport.send(self._message(digest))
+            return None
+        except Exception as e:
+            return e
+
+    def _record_failure(self, notification, error):
+        notification.attempts += 1
+        notification.last_error = str(error)[:1000]
+        if notification.attempts >= self.max_attempts:
+            notification.status = Notification.Status.FAILED
+            logger.error(f"❌ Giving up on notification {notification.id} to {notification.recipient}: {error}")
+        else:
+            notification.next_attempt_at = timezone.now() + timedelta(
+                seconds=self.backoff(notification.attempts)
+            )
+        notification.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+    def deliver(self, digests):
+        """
+        Send digests concurrently and record each outcome.
+        Returns (notifications sent, notifications failed, emails saved).
+        """
+        results = list(self._pool.map(self._send, digests))
+        sent = failed = saved = 0
+        for digest, error in zip(digests, results):
+            if error is None:
+                Notification.objects.filter(id__in=[n.id for n in digest]).update(
+                    status=Notification.Status.SENT,
+                    sent_at=timezone.now(),
+                )
+                sent += len(digest)
+                saved += len(digest) - 1
+                continue
+            failed += len(digest)
+            logger.warning(f"⚠️ Digest of {len(digest)} to {digest[0].recipient} failed: {error}")
+            for notification in digest:
+                self._record_failure(notification, error)
+        if saved:
+            notification_emails_saved_total.inc(saved)
+        return sent, failed, saved
+
+    def run_once(self):
+        """Claim and deliver one batch. Returns (sent, failed, saved)."""
+        digests = self.claim()
+        if not digests:
+            return 0, 0, 0
+        return self.deliver(digests)
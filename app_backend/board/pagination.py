@@ -0,0 +1,126 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are fetched with an indexed range scan on the ordering columns
+(``WHERE (a, b) > (last_a, last_b) ORDER BY a, b LIMIT n``) instead of
+OFFSET, so every page costs the same no matter how deep the client is.
+Cursors are opaque to clients: base64-encoded JSON of the last row's
+ordering values.
+"""
+import base64
+import binascii
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed cursor or page size."""
+
+
+def pagination_enabled(request):
+    """
+    Whether a list endpoint answers `request` with a page: when the client
+    asks for one with ``cursor`` or ``limit``, or always with
+    API_PAGINATION. Other requests get the full, unpaginated list.
+    """
+    if getattr(settings, 'API_PAGINATION', False):
+        return True
+    return 'cursor' in request.GET or 'limit' in request.GET
+
+
+def encode_cursor(values):
+    """Encode ordering values into an opaque URL-safe cursor."""
+    raw = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor produced by encode_cursor into a list of values."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise PaginationError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError('Invalid cursor')
+    return values
+
+
+def get_page_size(request, default=None):
+    """
+    Read the ``limit`` query parameter, defaulting to `default` (or
+    API_PAGE_SIZE) and capped at API_MAX_PAGE_SIZE.
+    """
+    limit = request.GET.get('limit')
+    if limit is None:
+        return default or settings.API_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, settings.API_MAX_PAGE_SIZE)
+
+
+def _after(keys, values):
+    """
+    Build the row-value comparison ``(k1, k2, ...) > (v1, v2, ...)``
+    as an OR of prefix equalities, which every backend can index.
+    """
+    condition = Q()
+    for i, key in enumerate(keys):
+        term = Q(**{f'{key}__gt': values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            term &= Q(**{prev_key: prev_value})
+        condition |= term
+    return condition
+
+
+def _key_value(row, key):
+    # Model instances, or values() rows
+    value = row[key] if isinstance(row, dict) else getattr(row, key)
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _page_queryset(queryset, keys, cursor, limit):
+    if cursor:
+        try:
+            queryset = queryset.filter(_after(keys, decode_cursor(cursor, len(keys))))
+        except (TypeError, ValueError, ValidationError):
+            # Well-formed cursor whose values don't fit the key columns
+            raise PaginationError('Invalid cursor')
+    # Fetch one extra row to learn whether another page exists
+    return queryset.order_by(*keys)[:limit + 1]
+
+
+def _page(rows, keys, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(_key_value(last, key) for key in keys)
+    return rows, next_cursor
+
+
+def paginate(queryset, keys, cursor=None, limit=None):
+    """
+    Return ``(rows, next_cursor)`` for one page of ``queryset``.
+
+    ``keys`` must form a unique ordering (end with the primary key).
+    ``next_cursor`` is None on the last page.
+    """
+    if limit is None:
+        limit = settings.API_PAGE_SIZE
+    rows = list(_page_queryset(queryset, keys, cursor, limit))
+    return _page(rows, keys, limit)
+
+
+async def apaginate(queryset, keys, cursor=None, limit=None):
+    """Async version of paginate()."""
+    if limit is None:
+        limit = settings.API_PAGE_SIZE
+    rows = [row async for row in _page_queryset(queryset, keys, cursor, limit)]
+    return _page(rows, keys, limit)
@@ -2,20 +2,47 @@ from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .models import Project, User
-from .serializers import ProjectSerializer
+from .serializers import ProjectSerializer, rows
+from . import counters, snapshots
 from .auth import authenticate_request
+from .conditional import conditional_get
+from .queries import project_queryset
+from .pagination import PaginationError, get_page_size, paginate, pagination_enabled
 
 
 @api_view(['GET'])
 @authenticate_request
+@conditional_get(lambda request: [snapshots.USERS, snapshots.PROJECTS])
 def get_projects(request):
     """
     Get all projects (authenticated).
     Returns a list of all projects with their details.
+
+    When pagination is enabled returns {"results": [...], "next": "<cursor>" | null}.
+    Query parameters: cursor (optional), limit (optional),
+        fields (optional) - comma-separated project fields to return (id always is)
     """
-    projects = Project.objects.all()
-    serializer = ProjectSerializer(projects, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    try:
+        fields = rows.requested_fields(request, rows.PROJECT_OUTPUT)
+    except rows.FieldsError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Serialized from values() rows, see board/serializers/rows.py
+    projects = rows.project_rows(project_queryset(), fields)
+    if not pagination_enabled(request):
+        return Response(rows.serialize_projects(projects, fields), status=status.HTTP_200_OK)
+    
+    try:
+        projects, next_cursor = paginate(
+            projects, ['id'], request.GET.get('cursor'), get_page_size(request)
+        )
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'results': rows.serialize_projects(projects, fields),
+        'next': next_cursor
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -110,18 +137,49 @@ def delete_project(request, project_id):
 
 @api_view(['GET'])
 @authenticate_request
+@conditional_get(lambda request, project_id: [snapshots.USERS, snapshots.project_scope(project_id)])
 def get_project(request, project_id):
     """
     Get a single project by ID (authenticated).
+    Query parameter: fields (optional) - comma-separated project fields to return
     """
     try:
-        project = Project.objects.get(id=project_id)
-    except Project.DoesNotExist:
+        fields = rows.requested_fields(request, rows.PROJECT_OUTPUT)
+    except rows.FieldsError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    project = rows.project_rows(project_queryset().filter(id=project_id), fields).first()
+    if project is None:
         return Response(
             {'error': 'Project not found'},
             status=status.HTTP_404_NOT_FOUND
         )
     
-    serializer = ProjectSerializer(project)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(rows.serialize_projects([project], fields)[0], status=status.HTTP_200_OK)
+
+
 
+@api_view(['GET'])
+@authenticate_request
+@conditional_get(lambda request, project_id: [snapshots.project_scope(project_id)])
+def get_project_stats(request, project_id):
+    """
+    Get a project's ticket counts (authenticated).
+    Returns: {
+        "id": "uuid",
+        "ticket_counts": {"TODO": 3, "IN_PROGRESS": 1, "DONE": 7, "WONT_DO": 0},
+        "total": 11,
+        "open": 4
+    }
+    Read from the counters kept on the project row (see board/counters.py),
+    so it costs one primary-key lookup however many tickets there are.
+    """
+    project = Project.objects.filter(id=project_id).values(*counters.STATUS_COUNT_FIELDS.values()).first()
+    if project is None:
+        return Response(
+            {'error': 'Project not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    counts = {status: project[field] for status, field in counters.STATUS_COUNT_FIELDS.items()}
+    return Response(counters.project_stats(project_id, counts), status=status.HTTP_200_OK)
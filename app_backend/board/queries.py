@@ -0,0 +1,32 @@
+"""
+Query builders shared by the read endpoints.
+
+Each builder returns a lazy queryset that loads every relation its
+serializer walks up front, so serializing N rows costs a fixed number
+of queries instead of several per row.
+"""
+from django.db.models import Prefetch
+from .models import Comment, Project, Ticket
+
+
+def comment_queryset():
+    """Comments with their commentor joined in."""
+    return Comment.objects.select_related('commentor')
+
+
+def project_queryset():
+    """Projects with their creator joined in."""
+    return Project.objects.select_related('created_by')
+
+
+def board_queryset():
+    """
+    Tickets with project, project creator, assignee and comments loaded.
+    Costs two queries regardless of the number of tickets or comments.
+    """
+    return Ticket.objects.select_related(
+        'project__created_by',
+        'assignee',
+    ).prefetch_related(
+        Prefetch('comments', queryset=comment_queryset()),
+    ).order_by('id')
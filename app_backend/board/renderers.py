@@ -0,0 +1,29 @@
+"""
+JSON renderer backed by orjson, enabled with API_JSON_RENDERER=orjson.
+
+Renders the API's payloads several times faster than DRF's JSONRenderer
+and to the same bytes: compact separators, UTF-8 without \\u escapes,
+and U+2028/U+2029 escaped so the output is also valid JavaScript.
+Datetimes, decimals and other types orjson doesn't handle the way DRF
+does are passed to DRF's encoder. Float formatting can differ in
+exponent notation (1e-05 vs 1e-5); both parse to the same value.
+
+Requests for indented output (Accept: application/json; indent=4) are
+rendered by DRF.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_encoder.default, option=_OPTIONS)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
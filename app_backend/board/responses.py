@@ -0,0 +1,25 @@
+"""
+JSON responses for views that run outside DRF's @api_view (async views).
+
+Bodies are rendered with DRF's default renderer (API_JSON_RENDERER), so
+they are byte-identical to what the equivalent DRF view returns.
+"""
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.settings import api_settings
+
+
+def json_response(data, status=200):
+    """Render `data` like rest_framework.response.Response would."""
+    response = HttpResponse(
+        api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data),
+        status=status,
+        content_type='application/json',
+    )
+    # DRF negotiates the renderer from Accept and says so
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def method_not_allowed(request):
+    return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
@@ -0,0 +1,277 @@
+"""
+Full-text search over ticket names, ticket descriptions and comments.
+
+The index lives in the database (migration 0007) and is maintained by the
+database itself on every write:
+- Postgres: a tsvector column on ticket and comment, recomputed by a
+  trigger when the text changes (migration 0011), each with a GIN index;
+  ranked with ts_rank and highlighted with ts_headline.
+- SQLite (USE_SQLITE=true): FTS5 tables ticket_fts and comment_fts, kept
+  in sync by triggers; ranked with bm25() and highlighted with snippet().
+  Both are keyed by an integer rowid: the ticket id, and for comments,
+  which have UUID keys, an id handed out by comment_fts_key.
+
+Every word of the query must match, and each word also matches as a
+prefix ("auth" finds "authentication"). Words are stemmed, so "deploying"
+finds "deploy". Ticket names weigh more than descriptions.
+
+Highlights are HTML: the matched text is escaped and each hit wrapped in
+<mark></mark>.
+"""
+import html
+import re
+import uuid
+from django.db import connection
+from .models import Ticket
+
+# Cap on query words, which bounds the cost of a single search
+MAX_TERMS = 16
+
+# Highlight delimiters that can't appear in escaped text
+_START, _STOP = '\x02', '\x03'
+
+# Keep ticket_fts and comment_fts in step with their tables. Migrations
+# that rebuild a table on SQLite drop its triggers, so these are restored
+# after every migrate (see ensure_triggers).
+TICKET_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS ticket_fts_insert AFTER INSERT ON ticket BEGIN
+        INSERT INTO ticket_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ticket_fts_delete AFTER DELETE ON ticket BEGIN
+        INSERT INTO ticket_fts(ticket_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ticket_fts_update AFTER UPDATE OF name, description ON ticket BEGIN
+        INSERT INTO ticket_fts(ticket_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO ticket_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+# Comment rows are found by their rowid in comment_fts_key (migration 0011)
+COMMENT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_insert AFTER INSERT ON comment BEGIN
+        INSERT INTO comment_fts_key(comment_id) VALUES (new.id);
+        INSERT INTO comment_fts(rowid, content)
+        VALUES ((SELECT id FROM comment_fts_key WHERE comment_id = new.id), new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_delete AFTER DELETE ON comment BEGIN
+        DELETE FROM comment_fts WHERE rowid = (SELECT id FROM comment_fts_key WHERE comment_id = old.id);
+        DELETE FROM comment_fts_key WHERE comment_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_update AFTER UPDATE OF content ON comment BEGIN
+        UPDATE comment_fts SET content = new.content
+        WHERE rowid = (SELECT id FROM comment_fts_key WHERE comment_id = old.id);
+    END
+    """,
+]
+
+# The triggers migration 0007 imports and ran, when comment_fts was still
+# keyed by comment_id. Kept as they were so 0007 keeps doing what it did.
+SQLITE_TRIGGERS = [
+    *TICKET_TRIGGERS,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_insert AFTER INSERT ON comment BEGIN
+        INSERT INTO comment_fts(content, comment_id) VALUES (new.content, new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_delete AFTER DELETE ON comment BEGIN
+        DELETE FROM comment_fts WHERE comment_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comment_fts_update AFTER UPDATE OF content ON comment BEGIN
+        UPDATE comment_fts SET content = new.content WHERE comment_id = old.id;
+    END
+    """,
+]
+
+
+class SearchError(ValueError):
+    """Raised for a query with nothing to search for."""
+
+
+def ensure_triggers(using_connection):
+    """Re-create any missing SQLite index triggers (no-op elsewhere)."""
+    if using_connection.vendor != 'sqlite':
+        return
+    with using_connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('ticket_fts', 'comment_fts', 'comment_fts_key')"
+        )
+        tables = {row[0] for row in cursor.fetchall()}
+        if 'comment_fts_key' in tables:
+            statements = [*TICKET_TRIGGERS, *COMMENT_TRIGGERS]
+        elif tables:
+            # Migrated to 0007 but not yet, or back past, 0011
+            statements = SQLITE_TRIGGERS
+        else:
+            return
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def _terms(q):
+    terms = re.findall(r'\w+', q)[:MAX_TERMS]
+    if not terms:
+        raise SearchError('q must contain at least one word')
+    return terms
+
+
+def _highlight(text):
+    if text is None:
+        return ''
+    return html.escape(text).replace(_START, '<mark>').replace(_STOP, '</mark>')
+
+
+def _uuid(value):
+    return str(value if isinstance(value, uuid.UUID) else uuid.UUID(value))
+
+
+def _project_param(project_id):
+    # Stored as hex on SQLite and as uuid on Postgres
+    return Ticket._meta.get_field('project').get_db_prep_value(project_id, connection)
+
+
+def _postgres_sql(project_id):
+    scope = 'AND t.project_id = %s' if project_id else ''
+    tickets = f"""
+        SELECT id, name, status, project_id, score,
+               ts_headline('english', name, q, %s),
+               ts_headline('english', description, q, %s)
+        FROM (
+            SELECT t.id, t.name, t.description, t.status, t.project_id, q,
+                   ts_rank(t.search_vector, q) AS score
+            FROM ticket t, to_tsquery('english', %s) AS q
+            WHERE t.search_vector @@ q {scope}
+            ORDER BY score DESC, t.id
+            LIMIT %s
+        ) hits
+        ORDER BY score DESC, id
+    """
+    comments = f"""
+        SELECT id, ticket_id, ticket_name, project_id, score,
+               ts_headline('english', content, q, %s)
+        FROM (
+            SELECT c.id, c.ticket_id, t.name AS ticket_name, t.project_id, c.content, q,
+                   ts_rank(c.search_vector, q) AS score
+            FROM comment c JOIN ticket t ON t.id = c.ticket_id, to_tsquery('english', %s) AS q
+            WHERE c.search_vector @@ q {scope}
+            ORDER BY score DESC, c.created_at
+            LIMIT %s
+        ) hits
+        ORDER BY score DESC
+    """
+    return tickets, comments
+
+
+def _postgres_params(terms, project_id, limit):
+    query = ' & '.join(f'{term}:*' for term in terms)
+    whole = f'StartSel={_START}, StopSel={_STOP}, HighlightAll=true'
+    fragments = f'StartSel={_START}, StopSel={_STOP}, MaxFragments=2, MaxWords=20, MinWords=5'
+    scope = [_project_param(project_id)] if project_id else []
+    return (
+        [whole, fragments, query, *scope, limit],
+        [fragments, query, *scope, limit],
+    )
+
+
+def _sqlite_sql(project_id):
+    scope = 'AND t.project_id = %s' if project_id else ''
+    # bm25() is lower for better matches; a name hit counts ten times a
+    # description hit
+    tickets = f"""
+        SELECT t.id, t.name, t.status, t.project_id, -bm25(ticket_fts, 10.0, 1.0) AS score,
+               highlight(ticket_fts, 0, %s, %s),
+               snippet(ticket_fts, 1, %s, %s, '…', 20)
+        FROM ticket_fts JOIN ticket t ON t.id = ticket_fts.rowid
+        WHERE ticket_fts MATCH %s {scope}
+        ORDER BY score DESC, t.id
+        LIMIT %s
+    """
+    comments = f"""
+        SELECT c.id, c.ticket_id, t.name, t.project_id, -bm25(comment_fts) AS score,
+               snippet(comment_fts, 0, %s, %s, '…', 20)
+        FROM comment_fts
+        JOIN comment_fts_key k ON k.id = comment_fts.rowid
+        JOIN comment c ON c.id = k.comment_id
+        JOIN ticket t ON t.id = c.ticket_id
+        WHERE comment_fts MATCH %s {scope}
+        ORDER BY score DESC, c.created_at
+        LIMIT %s
+    """
+    return tickets, comments
+
+
+def _sqlite_params(terms, project_id, limit):
+    # Quoted so words are never read as FTS5 operators
+    query = ' '.join(f'"{term}"*' for term in terms)
+    scope = [_project_param(project_id)] if project_id else []
+    return (
+        [_START, _STOP, _START, _STOP, query, *scope, limit],
+        [_START, _STOP, query, *scope, limit],
+    )
+
+
+def search(q, project_id=None, limit=20):
+    """
+    Find the best `limit` tickets and the best `limit` comments for `q`,
+    optionally within one project. Returns:
+        {
+            "tickets": [{"id", "name", "status", "project_id", "rank",
+                         "highlights": {"name", "description"}}],
+            "comments": [{"id", "ticket_id", "ticket_name", "project_id", "rank",
+                          "highlights": {"content"}}]
+        }
+    Both lists are ordered best match first. Raises SearchError for a
+    query without words.
+    """
+    terms = _terms(q)
+    if connection.vendor == 'postgresql':
+        ticket_sql, comment_sql = _postgres_sql(project_id)
+        ticket_params, comment_params = _postgres_params(terms, project_id, limit)
+    else:
+        ticket_sql, comment_sql = _sqlite_sql(project_id)
+        ticket_params, comment_params = _sqlite_params(terms, project_id, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(ticket_sql, ticket_params)
+        tickets = [
+            {
+                'id': ticket_id,
+                'name': name,
+                'status': ticket_status,
+                'project_id': _uuid(ticket_project_id),
+                'rank': round(score, 6),
+                'highlights': {'name': _highlight(name_hl), 'description': _highlight(description_hl)},
+            }
+            for ticket_id, name, ticket_status, ticket_project_id, score, name_hl, description_hl
+            in cursor.fetchall()
+        ]
+        cursor.execute(comment_sql, comment_params)
+        comments = [
+            {
+                'id': _uuid(comment_id),
+                'ticket_id': ticket_id,
+                'ticket_name': ticket_name,
+                'project_id': _uuid(comment_project_id),
+                'rank': round(score, 6),
+                'highlights': {'content': _highlight(content_hl)},
+            }
+            for comment_id, ticket_id, ticket_name, comment_project_id, score, content_hl
+            in cursor.fetchall()
+        ]
+    return {'tickets': tickets, 'comments': comments}
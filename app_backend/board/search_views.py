@@ -0,0 +1,53 @@
+import uuid
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from .auth import authenticate_request
+from .pagination import PaginationError, get_page_size
+from .search import SearchError, search as run_search
+
+
+@api_view(['GET'])
+@authenticate_request
+def search(request):
+    """
+    Full-text search over tickets and comments (authenticated).
+    Query parameters:
+        q (required) - words to find in ticket names, descriptions and
+                       comments; every word must match, as a prefix
+        project_id (optional) - only search within this project
+        limit (optional) - results per list (default API_PAGE_SIZE)
+    Returns: {
+        "tickets": [
+            {"id": 4, "name": "...", "status": "TODO", "project_id": "uuid", "rank": 0.6,
+             "highlights": {"name": "Add <mark>auth</mark>entication", "description": "..."}}
+        ],
+        "comments": [
+            {"id": "uuid", "ticket_id": 4, "ticket_name": "...", "project_id": "uuid", "rank": 0.3,
+             "highlights": {"content": "..."}}
+        ]
+    }
+    """
+    q = request.GET.get('q', '').strip()
+    if not q:
+        return Response(
+            {'error': 'q query parameter is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    project_id = request.GET.get('project_id')
+    if project_id:
+        try:
+            project_id = uuid.UUID(project_id)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid project_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    try:
+        results = run_search(q, project_id, get_page_size(request))
+    except (SearchError, PaginationError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(results, status=status.HTTP_200_OK)
@@ -1,7 +1,7 @@
-from .user import UserSerializer
-from .project import ProjectSerializer
+from .user import AssigneeSerializer, UserSerializer
+from .project import ProjectSerializer, TicketProjectSerializer
 from .ticket import TicketSerializer
 from .comment import CommentSerializer
 
-__all__ = ['UserSerializer', 'ProjectSerializer', 'TicketSerializer', 'CommentSerializer']
+__all__ = ['UserSerializer', 'AssigneeSerializer', 'ProjectSerializer', 'TicketProjectSerializer', 'TicketSerializer', 'CommentSerializer']
 
@@ -1,12 +1,22 @@
 from rest_framework import serializers
+from ..counters import ticket_counts
 from ..models import Project
 from .user import UserSerializer
 
 
 class ProjectSerializer(serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
+    ticket_counts = serializers.SerializerMethodField()
     
     class Meta:
         model = Project
-        fields = ['id', 'name', 'created_by']
+        fields = ['id', 'name', 'created_by', 'ticket_counts']
+
+    def get_ticket_counts(self, project):
+        return ticket_counts(project)
 
+
+class TicketProjectSerializer(ProjectSerializer):
+    """A ticket's project, without the ticket counts."""
+    class Meta(ProjectSerializer.Meta):
+        fields = ['id', 'name', 'created_by']
@@ -0,0 +1,201 @@
+"""
+Lean serialization for the list endpoints (get_tickets, get_projects,
+get_project, get_comments).
+
+Builds the same data as TicketSerializer, ProjectSerializer and
+CommentSerializer straight from values() rows, skipping model instances
+and DRF's field-by-field serialization, which dominate CPU time on large
+boards. The JSON rendered from either is byte-identical; keep the two in
+step when a serializer changes (`manage.py benchmark_serializers` checks).
+
+Tickets and projects can be narrowed to some of their fields
+(?fields=, ?include=, see requested_fields()). Only the columns and joins
+those fields need are selected, and a ticket's comments are only loaded
+when they are asked for.
+"""
+from rest_framework import serializers
+from ..counters import STATUS_COUNT_FIELDS
+from ..models import Comment
+
+# Output fields, in serializer order
+TICKET_OUTPUT = ('id', 'name', 'description', 'status', 'project', 'assignee', 'comment_count', 'comments')
+PROJECT_OUTPUT = ('id', 'name', 'created_by', 'ticket_counts')
+
+COMMENT_FIELDS = (
+    'id', 'ticket_id', 'commentor_id', 'commentor__email', 'commentor__name', 'content', 'created_at',
+)
+
+# Columns each output field is built from
+_TICKET_COLUMNS = {
+    'id': ('id',),
+    'name': ('name',),
+    'description': ('description',),
+    'status': ('status',),
+    'project': (
+        'project_id', 'project__name', 'project__created_by_id',
+        'project__created_by__email', 'project__created_by__name',
+    ),
+    'assignee': ('assignee_id', 'assignee__email', 'assignee__name'),
+    'comment_count': ('comment_count',),
+    # Loaded by serialize_tickets() with one more query
+    'comments': (),
+}
+_PROJECT_COLUMNS = {
+    'id': ('id',),
+    'name': ('name',),
+    'created_by': ('created_by_id', 'created_by__email', 'created_by__name'),
+    'ticket_counts': tuple(STATUS_COUNT_FIELDS.values()),
+}
+
+# Formats datetimes exactly like the serializers' DateTimeField
+_datetime = serializers.DateTimeField()
+
+
+class FieldsError(ValueError):
+    """Raised for an unknown name in ?fields= or ?include=."""
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def requested_fields(request, output, embeds=(), required=('id',)):
+    """
+    Read ?fields= and ?include= into the output fields to return, in
+    serializer order.
+    Without ?fields= every field in `output` is returned. Otherwise only
+    the `required` fields, the listed ones and the `embeds` (relations only
+    loaded on request) named in ?include=.
+    """
+    include = _names(request.GET.get('include'))
+    unknown = [name for name in include if name not in embeds]
+    if unknown and not embeds:
+        raise FieldsError('include is not supported on this endpoint')
+    if unknown:
+        raise FieldsError(f'Unknown include: {", ".join(unknown)} (can include {", ".join(embeds)})')
+
+    fields = request.GET.get('fields')
+    if fields is None:
+        return output
+    fields = _names(fields)
+    selectable = [field for field in output if field not in embeds]
+    unknown = [name for name in fields if name not in selectable]
+    if unknown:
+        raise FieldsError(
+            f'Unknown field: {", ".join(unknown)} (fields can be {", ".join(selectable)})'
+        )
+    wanted = {*required, *fields, *include}
+    return tuple(field for field in output if field in wanted)
+
+
+def _columns(column_map, fields):
+    # id is always selected: it keys comments and pagination cursors
+    columns = ['id']
+    for field in fields:
+        columns += [column for column in column_map[field] if column not in columns]
+    return columns
+
+
+def project_rows(queryset, fields=PROJECT_OUTPUT):
+    return queryset.values(*_columns(_PROJECT_COLUMNS, fields))
+
+
+def comment_rows(queryset):
+    return queryset.values(*COMMENT_FIELDS)
+
+
+def ticket_rows(queryset, fields=TICKET_OUTPUT):
+    # Comments are loaded by serialize_tickets() instead of a prefetch
+    return queryset.prefetch_related(None).values(*_columns(_TICKET_COLUMNS, fields))
+
+
+def _user(user_id, email, name):
+    if user_id is None:
+        return None
+    return {'id': str(user_id), 'email': email, 'name': name}
+
+
+_PROJECT_VALUES = {
+    'id': lambda row: str(row['id']),
+    'name': lambda row: row['name'],
+    'created_by': lambda row: _user(row['created_by_id'], row['created_by__email'], row['created_by__name']),
+    'ticket_counts': lambda row: {status: row[field] for status, field in STATUS_COUNT_FIELDS.items()},
+}
+
+_TICKET_VALUES = {
+    'id': lambda row: row['id'],
+    'name': lambda row: row['name'],
+    'description': lambda row: row['description'],
+    'status': lambda row: row['status'],
+    'project': lambda row: {
+        'id': str(row['project_id']),
+        'name': row['project__name'],
+        'created_by': _user(
+            row['project__created_by_id'],
+            row['project__created_by__email'],
+            row['project__created_by__name'],
+        ),
+    },
+    'assignee': lambda row: _user(row['assignee_id'], row['assignee__email'], row['assignee__name']),
+    'comment_count': lambda row: row['comment_count'],
+}
+
+
+def serialize_projects(rows, fields=PROJECT_OUTPUT):
+    """Serialize project_rows() like ProjectSerializer(many=True)."""
+    values = [(field, _PROJECT_VALUES[field]) for field in fields]
+    return [{field: value(row) for field, value in values} for row in rows]
+
+
+def serialize_comments(rows):
+    """Serialize comment_rows() like CommentSerializer(many=True)."""
+    return [
+        {
+            'id': str(row['id']),
+            'ticket': row['ticket_id'],
+            'commentor': _user(row['commentor_id'], row['commentor__email'], row['commentor__name']),
+            'content': row['content'],
+            'created_at': _datetime.to_representation(row['created_at']),
+        }
+        for row in rows
+    ]
+
+
+def _comments_for(rows):
+    # Same query the board's comment prefetch runs
+    return comment_rows(Comment.objects.filter(ticket_id__in=[row['id'] for row in rows]))
+
+
+def _tickets(rows, fields, comments):
+    values = [(field, _TICKET_VALUES[field]) for field in fields if field != 'comments']
+    tickets = [{field: value(row) for field, value in values} for row in rows]
+    if comments is not None:
+        by_ticket = {}
+        for comment in serialize_comments(comments):
+            by_ticket.setdefault(comment['ticket'], []).append(comment)
+        # comments is the last field, so appending keeps serializer order
+        for row, ticket in zip(rows, tickets):
+            ticket['comments'] = by_ticket.get(row['id'], [])
+    return tickets
+
+
+def serialize_tickets(rows, fields=TICKET_OUTPUT):
+    """
+    Serialize ticket_rows() like TicketSerializer(many=True), loading
+    every ticket's comments in one more query if they are wanted.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    comments = _comments_for(rows) if 'comments' in fields else None
+    return _tickets(rows, fields, comments)
+
+
+async def aserialize_tickets(rows, fields=TICKET_OUTPUT):
+    """Async version of serialize_tickets(); `rows` is a list."""
+    if not rows:
+        return []
+    comments = None
+    if 'comments' in fields:
+        comments = [comment async for comment in _comments_for(rows)]
+    return _tickets(rows, fields, comments)
@@ -1,16 +1,16 @@
 from rest_framework import serializers
 from ..models import Ticket
 from .user import UserSerializer
-from .project import ProjectSerializer
+from .project import TicketProjectSerializer
 from .comment import CommentSerializer
 
 
 class TicketSerializer(serializers.ModelSerializer):
     assignee = UserSerializer(read_only=True)
-    project = ProjectSerializer(read_only=True)
+    project = TicketProjectSerializer(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Ticket
-        fields = ['id', 'name', 'description', 'status', 'project', 'assignee', 'comments']
+        fields = ['id', 'name', 'description', 'status', 'project', 'assignee', 'comment_count', 'comments']
 
@@ -10,3 +10,9 @@ class UserSerializer(serializers.ModelSerializer):
             'password': {'write_only': True}
         }
 
+
+
+class AssigneeSerializer(UserSerializer):
+    """A user in assignee search, with their open ticket count."""
+    class Meta(UserSerializer.Meta):
+        fields = ['id', 'email', 'password', 'name', 'open_ticket_count']
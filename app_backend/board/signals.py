@@ -0,0 +1,138 @@
+"""
+Model signal handlers, connected in BoardConfig.ready().
+"""
+from django.db import connections
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from . import changes, counters, search, snapshots
+from .auth import user_cache
+from .models import Change, Comment, Project, Ticket, User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop cached authentications for a user whenever the user changes."""
+    user_cache.invalidate_user(instance.id)
+    # Users are embedded (assignee, commentor, creator) in every snapshot
+    snapshots.bump(snapshots.USERS)
+
+
+def _action(signal):
+    return Change.Action.DELETE if signal is post_delete else Change.Action.UPSERT
+
+
+def _origin_model(origin):
+    # Model.delete() passes the instance as `origin`, QuerySet.delete() the queryset
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _deleted_with_project(origin):
+    """Whether a ticket's post_delete comes from deleting its project."""
+    return _origin_model(origin) is Project
+
+
+def _deleted_with_ticket(origin):
+    """
+    Whether a comment's post_delete comes from deleting its ticket or its
+    ticket's project: a cascade from either only reaches comments through
+    tickets that are being deleted too.
+    """
+    return _origin_model(origin) in (Ticket, Project)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, signal, **kwargs):
+    changes.record(Change.Entity.PROJECT, instance.id, instance.id, _action(signal))
+    snapshots.bump(snapshots.BOARD, snapshots.PROJECTS, snapshots.project_scope(instance.id))
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_changed(sender, instance, signal, origin=None, **kwargs):
+    # A deleted project's tombstone stands for its tickets and comments, so
+    # the cascade doesn't log one entry per row
+    if not (signal is post_delete and _deleted_with_project(origin)):
+        changes.record(Change.Entity.TICKET, instance.id, instance.project_id, _action(signal))
+    snapshots.bump(
+        snapshots.BOARD,
+        snapshots.project_scope(instance.project_id),
+        snapshots.ticket_scope(instance.id),
+    )
+
+
+@receiver(pre_save, sender=Ticket)
+def load_counted_as(sender, instance, **kwargs):
+    """Tickets not loaded whole (see Ticket.from_db) are read back before an update."""
+    if not instance._state.adding and not hasattr(instance, '_counted_as'):
+        instance._counted_as = Ticket.objects.filter(id=instance.id).values_list(
+            'project_id', 'status', 'assignee_id'
+        ).first()
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def count_ticket(sender, instance, signal, created=False, origin=None, **kwargs):
+    if signal is post_delete:
+        if _deleted_with_project(origin):
+            # Uncounted all at once by uncount_project_tickets
+            return
+        before, after = getattr(instance, '_counted_as', instance.counted_as()), None
+    else:
+        before, after = None if created else instance._counted_as, instance.counted_as()
+    if before != after:
+        counters.record_tickets([(before, after)])
+    instance._counted_as = after
+
+
+@receiver(pre_delete, sender=Project)
+def uncount_project_tickets(sender, instance, origin=None, **kwargs):
+    """
+    A deleted project's open tickets come off their assignees' counts in
+    one pass rather than one UPDATE per cascaded ticket; the project row
+    itself is going away.
+    """
+    if _deleted_with_project(origin):
+        counters.record_tickets([
+            ((None, ticket_status, assignee_id), None)
+            for ticket_status, assignee_id in Ticket.objects.filter(
+                project=instance, assignee__isnull=False, status__in=counters.OPEN_STATUSES,
+            ).values_list('status', 'assignee_id')
+        ])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def count_comment(sender, instance, signal, created=False, origin=None, **kwargs):
+    if signal is post_delete and _deleted_with_ticket(origin):
+        # The ticket row holding the count is going away too
+        return
+    if created or signal is post_delete:
+        counters.record_comments(instance.ticket_id, 1 if created else -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, signal, origin=None, **kwargs):
+    if signal is post_delete and _deleted_with_ticket(origin):
+        # Logged and invalidated by its ticket's (or project's) own delete
+        return
+    if Comment.ticket.is_cached(instance):
+        project_id = instance.ticket.project_id
+    else:
+        project_id = Ticket.objects.filter(id=instance.ticket_id).values_list('project_id', flat=True).first()
+    changes.record(Change.Entity.COMMENT, instance.id, project_id, _action(signal))
+    snapshots.bump(
+        snapshots.BOARD,
+        project_id and snapshots.project_scope(project_id),
+        snapshots.ticket_scope(instance.ticket_id),
+    )
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """SQLite drops a table's triggers when a migration rebuilds it."""
+    if sender.name == 'board':
+        search.ensure_triggers(connections[using])
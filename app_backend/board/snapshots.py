@@ -0,0 +1,140 @@
+"""
+Versioned snapshots of serialized read responses in Django's cache.
+
+Every snapshot is stored under a key that embeds the current version of
+each scope it depends on:
+- 'users'               user names/emails embedded in payloads
+- 'board'               every ticket, comment and project
+- 'projects'            the project list
+- 'project:<id>'        tickets and comments of one project, and the project itself
+- 'ticket:<id>'         one ticket and its comments
+
+Writes bump the affected scopes once their transaction commits (see
+board/signals.py), so a stale snapshot is simply never looked up again
+and ages out of the cache. Repeated reads cost one cache round trip for
+the versions and one for the snapshot. The same versions serve as cheap
+ETag validators (see board/conditional.py).
+
+The counters live in the cache (BOARD_SNAPSHOT_CACHE_ALIAS), so with more
+than one worker process that cache must be shared (REDIS_URL); a
+local-memory cache is only safe for a single process.
+"""
+import hashlib
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from backend.metrics import board_snapshot_requests_total
+
+USERS = 'users'
+BOARD = 'board'
+PROJECTS = 'projects'
+
+
+def project_scope(project_id):
+    return f'project:{project_id}'
+
+
+def ticket_scope(ticket_id):
+    return f'ticket:{ticket_id}'
+
+
+def snapshots_enabled():
+    return settings.BOARD_SNAPSHOT_CACHE
+
+
+def versioning_enabled():
+    """Whether anything (snapshots or ETags) reads the version counters."""
+    return settings.BOARD_SNAPSHOT_CACHE or settings.CONDITIONAL_GET
+
+
+def _cache():
+    return caches[settings.BOARD_SNAPSHOT_CACHE_ALIAS]
+
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def _new_version():
+    # Seed from the clock so a counter recreated after eviction or a cache
+    # restart never reuses a version that older snapshots were stored under
+    return time.time_ns()
+
+
+def get_versions(scopes):
+    """Return {scope: version} for the given scopes, creating missing counters."""
+    cache = _cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, scope in keys.items():
+        if key not in found:
+            cache.add(key, _new_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[scope] = found[key]
+    return versions
+
+
+def _bump_now(scopes):
+    cache = _cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Counter missing (never read, or evicted): start a fresh one
+            cache.set(key, _new_version(), timeout=None)
+
+
+def bump(*scopes):
+    """Invalidate every snapshot depending on `scopes` once the current transaction commits."""
+    if not versioning_enabled():
+        return
+    scopes = [scope for scope in scopes if scope]
+    transaction.on_commit(lambda: _bump_now(scopes))
+
+
+def _snapshot_key(name, scopes, versions, params):
+    version_part = '.'.join(f'{versions[scope]}' for scope in scopes)
+    params_part = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:16]
+    return f'snapshot:{name}:{"|".join(scopes)}:{version_part}:{params_part}'
+
+
+def get_or_build(name, scopes, params, builder):
+    """
+    Return the cached snapshot `name` for the current versions of `scopes`
+    and the request `params`, calling `builder()` to create it on a miss.
+    """
+    if not snapshots_enabled():
+        return builder()
+
+    key = _snapshot_key(name, scopes, get_versions(scopes), params)
+    cache = _cache()
+    data = cache.get(key)
+    if data is not None:
+        board_snapshot_requests_total.labels(name, 'hit').inc()
+        return data
+    board_snapshot_requests_total.labels(name, 'miss').inc()
+    data = builder()
+    cache.set(key, data, timeout=settings.BOARD_SNAPSHOT_TTL)
+    return data
+
+
+async def aget_or_build(name, scopes, params, builder):
+    """Async version of get_or_build(); `builder` is a coroutine function."""
+    if not snapshots_enabled():
+        return await builder()
+
+    versions = await sync_to_async(get_versions)(scopes)
+    key = _snapshot_key(name, scopes, versions, params)
+    cache = _cache()
+    data = await cache.aget(key)
+    if data is not None:
+        board_snapshot_requests_total.labels(name, 'hit').inc()
+        return data
+    board_snapshot_requests_total.labels(name, 'miss').inc()
+    data = await builder()
+    await cache.aset(key, data, timeout=settings.BOARD_SNAPSHOT_TTL)
+    return data
@@ -0,0 +1,874 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.db import InterfaceError, close_old_connections, connection, connections, transaction
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from backend.profiling import repeated_statements
+from board import urls
+from board.auth import create_token, user_cache
+from board.changes import changes_since, current_cursor
+from board.counters import reconcile
+from board.models import AuthToken, Comment, Notification, Project, Ticket, User
+from board.notifications import FakeTransport, OutboxWorker
+from board.pagination import encode_cursor
+from board.queries import board_queryset, comment_queryset, project_queryset
+from board.renderers import ORJSONRenderer
+from board.serializers import CommentSerializer, ProjectSerializer, TicketSerializer, rows
+from board.ticket_views import SIGNUP_TOKEN
+from board.token_backends import CacheTokenBackend, DatabaseTokenBackend
+
+
+class BoardTestCase(TestCase):
+    """Two users, a project, and request headers that log in as alice."""
+
+    def setUp(self):
+        caches['default'].clear()
+        user_cache.clear()
+        self.alice = User.objects.create(email='test-alice@example.com', name='Test Alice', password='x')
+        self.bob = User.objects.create(email='test-bob@example.com', name='Test Bob', password='x')
+        self.project = Project.objects.create(name='Test project', created_by=self.alice)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {create_token(self.alice)}'}
+
+    def add_tickets(self, count, comments=2):
+        for n in range(count):
+            ticket = Ticket.objects.create(
+                name=f'Test ticket {n}', project=self.project,
+                status=Ticket.Status.values[n % len(Ticket.Status.values)],
+                assignee=self.alice if n % 2 else self.bob,
+            )
+            for m in range(comments):
+                Comment.objects.create(ticket=ticket, commentor=self.bob, content=f'Test comment {m}')
+
+    def get(self, path, **headers):
+        return self.client.get(path, **self.auth, **headers)
+
+
+@override_settings(BOARD_SNAPSHOT_CACHE=False, CONDITIONAL_GET=False)
+class BoardQueryCountTests(BoardTestCase):
+    """The board's query count must not grow with the tickets on it."""
+
+    def assertBoardQueries(self, tickets):
+        self.add_tickets(tickets)
+        # Token, user, then the tickets and their comments
+        user_cache.clear()
+        with self.assertNumQueries(4):
+            self.assertEqual(self.get('/tickets').status_code, 200)
+        # Paged: the tickets and their comments per status column
+        user_cache.clear()
+        with self.assertNumQueries(2 + 2 * len(Ticket.Status.values)):
+            self.assertEqual(self.get('/tickets?limit=50').status_code, 200)
+
+    def test_few_tickets(self):
+        self.assertBoardQueries(4)
+
+    def test_many_tickets(self):
+        self.assertBoardQueries(40)
+
+
+@override_settings(CONDITIONAL_GET=True)
+class ConditionalGetTests(BoardTestCase):
+
+    def test_unchanged_board_is_not_modified(self):
+        self.add_tickets(2)
+        etag = self.get('/tickets')['ETag']
+        self.assertTrue(etag)
+
+        response = self.get('/tickets', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_write_changes_the_etag(self):
+        self.add_tickets(2)
+        etag = self.get('/tickets')['ETag']
+        ticket = Ticket.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/tickets/{ticket.id}', {'status': 'DONE'},
+                                         content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get('/tickets', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+@override_settings(BOARD_SNAPSHOT_CACHE=False)
+class PaginationTests(BoardTestCase):
+    """Pages when the client sends limit or cursor, the original full lists otherwise."""
+
+    def collect(self, path):
+        items, cursor = [], None
+        while True:
+            body = self.get(f'{path}&cursor={cursor}' if cursor else path).json()
+            items += body['results']
+            cursor = body['next']
+            if not cursor:
+                return items
+
+    def test_unpaginated_without_limit_or_cursor(self):
+        self.add_tickets(3)
+        self.assertIsInstance(self.get('/projects').json(), list)
+        board = self.get('/tickets').json()
+        self.assertNotIn('next', board)
+        self.assertEqual(sum(len(board[status]) for status in Ticket.Status.values), 3)
+        ticket = Ticket.objects.first()
+        self.assertEqual(len(self.get(f'/tickets/{ticket.id}/comments').json()), 2)
+
+    def test_project_pages(self):
+        for n in range(4):
+            Project.objects.create(name=f'Test project {n}', created_by=self.alice)
+        body = self.get('/projects?limit=2').json()
+        self.assertEqual(len(body['results']), 2)
+        self.assertTrue(body['next'])
+        ids = [project['id'] for project in self.collect('/projects?limit=2')]
+        self.assertEqual(ids, sorted(str(project.id) for project in Project.objects.all()))
+
+    def test_comment_pages(self):
+        self.add_tickets(1, comments=5)
+        ticket = Ticket.objects.get()
+        ids = [comment['id'] for comment in self.collect(f'/tickets/{ticket.id}/comments?limit=2')]
+        expected = Comment.objects.filter(ticket=ticket).order_by('created_at', 'id').values_list('id', flat=True)
+        self.assertEqual(ids, [str(comment_id) for comment_id in expected])
+
+    def test_board_column_pages(self):
+        self.add_tickets(12, comments=0)
+        board = self.get('/tickets?limit=2').json()
+        self.assertEqual(set(board['next']), set(Ticket.Status.values))
+        todo = [ticket['id'] for ticket in board['TODO']]
+        cursor = board['next']['TODO']
+        while cursor:
+            page = self.get(f'/tickets?status=TODO&limit=2&cursor={cursor}').json()
+            todo += [ticket['id'] for ticket in page['TODO']]
+            cursor = page['next']['TODO']
+        self.assertEqual(todo, list(Ticket.objects.filter(status='TODO').order_by('id').values_list('id', flat=True)))
+
+    def test_cursor_needs_status(self):
+        self.add_tickets(4, comments=0)
+        cursor = self.get('/tickets?limit=1').json()['next']['TODO']
+        self.assertEqual(self.get(f'/tickets?cursor={cursor}').status_code, 400)
+
+    def test_invalid_cursor_and_limit(self):
+        self.assertEqual(self.get('/projects?cursor=nonsense').status_code, 400)
+        self.assertEqual(self.get('/projects?limit=0').status_code, 400)
+
+    @override_settings(API_PAGINATION=True)
+    def test_always_paginated(self):
+        body = self.get('/projects').json()
+        self.assertEqual(set(body), {'results', 'next'})
+
+
+class DatabaseTokenBackendTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.backend = DatabaseTokenBackend(ttl=3600, max_tokens=10, refresh_interval=60)
+
+    def test_one_live_token_per_user(self):
+        token = self.backend.create(self.bob.id)
+        self.assertEqual(self.backend.create(self.bob.id), token)
+        self.assertEqual(self.backend.get_user_id(token), str(self.bob.id))
+        self.assertEqual(self.backend.delete(token), str(self.bob.id))
+        self.assertIsNone(self.backend.get_user_id(token))
+
+    def test_expired_token_is_replaced(self):
+        token = self.backend.create(self.bob.id)
+        AuthToken.objects.filter(key=token).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(self.backend.get_user_id(token))
+        self.assertNotEqual(self.backend.create(self.bob.id), token)
+        self.assertEqual(AuthToken.objects.filter(user=self.bob).count(), 1)
+
+    def test_racing_login_gets_the_winners_token(self):
+        def racing_login():
+            # Another login for bob commits between our lookup and our insert
+            AuthToken.objects.create(key='winner', user=self.bob, expires_at=timezone.now() + timedelta(hours=1))
+            return 'loser'
+
+        with mock.patch('board.token_backends.generate_token', side_effect=racing_login):
+            self.assertEqual(self.backend.create(self.bob.id), 'winner')
+        self.assertEqual(list(AuthToken.objects.filter(user=self.bob).values_list('key', flat=True)), ['winner'])
+
+
+class CacheTokenBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+        self.backend = CacheTokenBackend(ttl=3600)
+
+    def test_one_live_token_per_user(self):
+        token = self.backend.create('1')
+        self.assertEqual(self.backend.create('1'), token)
+        self.assertEqual(self.backend.get_user_id(token), '1')
+        self.assertEqual(self.backend.delete_user('1'), token)
+        self.assertIsNone(self.backend.get_user_id(token))
+
+    def test_clear_starts_a_new_generation(self):
+        token = self.backend.create('1')
+        self.cache.set('unrelated', 'kept')
+        self.backend.clear()
+        self.assertIsNone(self.backend.get_user_id(token))
+        self.assertNotEqual(self.backend.create('1'), token)
+        self.assertEqual(self.cache.get('unrelated'), 'kept')
+
+    def test_clear_without_generation_counter(self):
+        token = self.backend.create('1')
+        # Counter evicted: clear() can't increment it and must still retire the old entries
+        self.cache.delete(CacheTokenBackend.GENERATION_KEY)
+        self.backend.clear()
+        self.assertIsNone(self.backend.get_user_id(token))
+
+
+class RowSerializationTests(BoardTestCase):
+    """The values() row serializers render the same bytes as the DRF serializers."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_tickets(4)
+        Ticket.objects.create(name='Unassigned', description='Ünïcode "quoted"', project=self.project)
+
+    def assertSameJSON(self, drf, lean):
+        expected = JSONRenderer().render(drf)
+        self.assertEqual(JSONRenderer().render(lean), expected)
+        self.assertEqual(ORJSONRenderer().render(lean), expected)
+
+    def test_tickets(self):
+        self.assertSameJSON(TicketSerializer(board_queryset(), many=True).data,
+                            rows.serialize_tickets(rows.ticket_rows(board_queryset())))
+
+    def test_projects(self):
+        Project.objects.create(name='Empty project', created_by=self.bob)
+        self.assertSameJSON(ProjectSerializer(project_queryset(), many=True).data,
+                            rows.serialize_projects(rows.project_rows(project_queryset())))
+
+    def test_comments(self):
+        self.assertSameJSON(CommentSerializer(comment_queryset(), many=True).data,
+                            rows.serialize_comments(rows.comment_rows(comment_queryset())))
+
+
+@override_settings(CONDITIONAL_GET=False)
+class FieldSelectionTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_tickets(4)
+
+    def board_tickets(self, path):
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [ticket for status in Ticket.Status.values for ticket in response.json()[status]]
+
+    def test_all_fields_by_default(self):
+        for ticket in self.board_tickets('/tickets'):
+            self.assertEqual(tuple(ticket), rows.TICKET_OUTPUT)
+            self.assertEqual(len(ticket['comments']), 2)
+
+    def test_ticket_fields(self):
+        for ticket in self.board_tickets('/tickets?fields=name,assignee'):
+            self.assertEqual(tuple(ticket), ('id', 'name', 'status', 'assignee'))
+        for ticket in self.board_tickets('/tickets?fields=name&include=comments&limit=2'):
+            self.assertEqual(tuple(ticket), ('id', 'name', 'status', 'comments'))
+            self.assertEqual(len(ticket['comments']), 2)
+
+    @override_settings(BOARD_SNAPSHOT_CACHE=False)
+    def test_comments_not_loaded_unless_included(self):
+        self.get('/projects')  # Authenticated users are cached from here on
+        with self.assertNumQueries(1):
+            self.get('/tickets?fields=name')
+        with self.assertNumQueries(2):
+            self.get('/tickets?fields=name&include=comments')
+
+    @override_settings(BOARD_SNAPSHOT_CACHE=True)
+    def test_selection_is_part_of_the_snapshot_key(self):
+        self.board_tickets('/tickets')
+        for ticket in self.board_tickets('/tickets?fields=name'):
+            self.assertEqual(tuple(ticket), ('id', 'name', 'status'))
+
+    def test_project_fields(self):
+        self.assertEqual([tuple(project) for project in self.get('/projects?fields=name').json()], [('id', 'name')])
+        project = self.get(f'/projects/{self.project.id}?fields=ticket_counts').json()
+        self.assertEqual(tuple(project), ('id', 'ticket_counts'))
+
+    def test_unknown_fields(self):
+        for path in ('/tickets?fields=name,secret', '/tickets?fields=comments', '/tickets?include=project',
+                     '/projects?fields=tickets', '/projects?include=comments'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 400)
+
+
+class ChangesTests(BoardTestCase):
+
+    def test_cursor_within_retention(self):
+        cursor = self.get('/changes').json()['cursor']
+        response = self.get(f'/changes?since={cursor}')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(CHANGELOG_RETENTION=3600)
+    def test_expired_cursor_requires_resync(self):
+        cursor = encode_cursor([0, 0, time.time() - 2 * 3600])
+        response = self.get(f'/changes?since={cursor}')
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()['resync_required'])
+
+    def test_cursor_without_txid_requires_resync(self):
+        cursor = encode_cursor([0, time.time()])
+        self.assertEqual(self.get(f'/changes?since={cursor}').status_code, 410)
+
+    def test_malformed_cursor(self):
+        self.assertEqual(self.get('/changes?since=nonsense').status_code, 400)
+
+
+class ChangesDeliveryTests(TransactionTestCase):
+    """
+    Changes as clients see them once committed; on Postgres the log holds
+    back entries of transactions still running, the test's own included.
+    """
+
+    def setUp(self):
+        self.projects = [
+            Project.objects.create(name=f'Test project {n}', created_by=User.objects.create(
+                email=f'test-{n}@example.com', name=f'Test {n}', password='x',
+            ))
+            for n in range(2)
+        ]
+
+    def add_ticket(self, name, n=0):
+        # Tickets in different projects don't wait on each other's counter rows
+        project = self.projects[n]
+        return Ticket.objects.create(name=name, project=project, assignee=project.created_by)
+
+    def assertChanges(self, cursor, names):
+        changes, cursor, _ = changes_since(cursor)
+        self.assertEqual({change['data']['name'] for change in changes}, names)
+        return cursor
+
+    def test_changes_after_cursor(self):
+        cursor = current_cursor()
+        self.add_ticket('First')
+        self.add_ticket('Second')
+        cursor = self.assertChanges(cursor, {'First', 'Second'})
+        self.assertChanges(cursor, set())
+
+    @skipUnless(connection.vendor == 'postgresql', 'SQLite commits one writer at a time, in id order')
+    def test_slow_transaction(self):
+        written, commit = threading.Event(), threading.Event()
+
+        def slow_write():
+            try:
+                with transaction.atomic():
+                    self.add_ticket('Slow', 1)
+                    written.set()
+                    commit.wait(10)
+            finally:
+                connection.close()
+
+        cursor = current_cursor()
+        writer = threading.Thread(target=slow_write)
+        writer.start()
+        self.assertTrue(written.wait(10))
+        # Logged after the slow ticket, committed before it
+        self.add_ticket('Fast')
+        cursor = self.assertChanges(cursor, set())
+
+        commit.set()
+        writer.join()
+        cursor = self.assertChanges(cursor, {'Slow', 'Fast'})
+        self.assertChanges(cursor, set())
+
+
+class SearchTests(BoardTestCase):
+    """The database keeps the search index in step with every write (migrations 0007, 0011)."""
+
+    def search(self, q):
+        body = self.get(f'/search?q={q}').json()
+        return [t['name'] for t in body['tickets']], [c['id'] for c in body['comments']]
+
+    def test_ticket_writes(self):
+        ticket = Ticket.objects.create(name='Deploying rockets', description='to orbit', project=self.project)
+        self.assertEqual(self.search('deploy')[0], ['Deploying rockets'])
+        self.assertEqual(self.search('orbit')[0], ['Deploying rockets'])
+
+        ticket.name = 'Launching boats'
+        ticket.save()
+        self.assertEqual(self.search('deploy')[0], [])
+        self.assertEqual(self.search('launch')[0], ['Launching boats'])
+        # A status change leaves the index as it was
+        Ticket.objects.filter(id=ticket.id).update(status=Ticket.Status.DONE)
+        self.assertEqual(self.search('launch')[0], ['Launching boats'])
+
+        ticket.delete()
+        self.assertEqual(self.search('launch')[0], [])
+
+    def test_comment_writes(self):
+        self.add_tickets(1, comments=0)
+        ticket = Ticket.objects.get()
+        comment = Comment.objects.create(ticket=ticket, commentor=self.bob, content='Authentication broke')
+        other = Comment.objects.create(ticket=ticket, commentor=self.bob, content='Authentication is back')
+        self.assertEqual(sorted(self.search('auth')[1]), sorted([str(comment.id), str(other.id)]))
+
+        comment.content = 'Fine now'
+        comment.save()
+        self.assertEqual(self.search('auth')[1], [str(other.id)])
+        self.assertEqual(self.search('fine')[1], [str(comment.id)])
+
+        comment.delete()
+        self.assertEqual(self.search('fine')[1], [])
+        # Comments deleted with their ticket leave the index too
+        ticket.delete()
+        self.assertEqual(self.search('auth')[1], [])
+
+
+@override_settings(ASSIGNEE_SEARCH_CACHE_TTL=0)
+class AssigneeSearchTests(BoardTestCase):
+
+    def search(self, prefix, **params):
+        response = self.client.get('/assignees', {'prefix': prefix, **params}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [user['name'] for user in response.json()]
+
+    def test_name_or_email_prefix(self):
+        User.objects.create(email='zoe@example.com', name='Zoë Ünal', password='x')
+        User.objects.create(email='zp@example.com', name='Zp', password='x')
+        self.assertEqual(self.search('TEST AL'), ['Test Alice'])
+        self.assertEqual(self.search('test-bob@'), ['Test Bob'])
+        # Non-ASCII characters after the prefix are still inside its range
+        self.assertEqual(self.search('zo'), ['Zoë Ünal'])
+        self.assertEqual(self.search('zoë ü'), ['Zoë Ünal'])
+        self.assertEqual(self.search('nobody'), [])
+
+    def test_recently_assigned_first(self):
+        self.assertEqual(self.search('test'), ['Test Alice', 'Test Bob'])
+        self.client.post('/tickets/create', {
+            'name': 'New', 'project_id': str(self.project.id), 'assignee_id': str(self.bob.id),
+        }, content_type='application/json', **self.auth)
+        self.assertEqual(self.search('test'), ['Test Bob', 'Test Alice'])
+        self.assertEqual(self.search('test', limit=1), ['Test Bob'])
+
+    @override_settings(ASSIGNEE_SEARCH_CACHE_TTL=60)
+    def test_results_cached_per_prefix(self):
+        self.assertEqual(self.search('test'), ['Test Alice', 'Test Bob'])
+        User.objects.create(email='test-carol@example.com', name='Test Carol', password='x')
+        self.assertEqual(self.search('test'), ['Test Alice', 'Test Bob'])
+        self.assertEqual(self.search('test c'), ['Test Carol'])
+
+
+class BulkTicketTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_tickets(2, comments=0)
+        self.first, self.second = Ticket.objects.order_by('id')
+
+    def bulk(self, operations, atomic=False):
+        return self.client.post('/tickets/bulk', {'operations': operations, 'atomic': atomic},
+                                content_type='application/json', **self.auth)
+
+    def mixed_batch(self):
+        return [
+            {'op': 'create', 'name': 'New', 'project_id': str(self.project.id), 'assignee_id': str(self.alice.id)},
+            {'op': 'update', 'id': self.first.id, 'status': 'DONE'},
+            {'op': 'delete', 'id': 0},
+            {'op': 'archive', 'id': self.second.id},
+        ]
+
+    def test_partial_applies_the_valid_operations(self):
+        response = self.bulk(self.mixed_batch())
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [201, 200, 404, 400])
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+        self.assertEqual(results[0]['ticket']['name'], 'New')
+        self.assertEqual(results[1]['ticket']['status'], 'DONE')
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, 'DONE')
+        self.assertEqual(reconcile(check=True), {'tickets': 0, 'projects': 0, 'users': 0})
+
+    def test_atomic_applies_nothing_after_a_failure(self):
+        response = self.bulk(self.mixed_batch(), atomic=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['status'] for result in response.json()['results']], [424, 424, 404, 400])
+        self.assertEqual(Ticket.objects.count(), 2)
+        self.first.refresh_from_db()
+        self.assertNotEqual(self.first.status, 'DONE')
+
+    def test_duplicate_ticket_ids(self):
+        response = self.bulk([
+            {'op': 'update', 'id': self.first.id, 'name': 'Renamed'},
+            {'op': 'delete', 'id': self.first.id},
+        ])
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [200, 400])
+        self.assertEqual(results[1]['error'], 'Ticket appears in more than one operation')
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.name, 'Renamed')
+
+    def test_empty_batch(self):
+        self.assertEqual(self.bulk([]).status_code, 400)
+
+
+class CounterTests(BoardTestCase):
+    """Every write path keeps the denormalized counters equal to a recount."""
+
+    def assertCountersExact(self):
+        self.assertEqual(reconcile(check=True), {'tickets': 0, 'projects': 0, 'users': 0})
+
+    def test_ticket_writes(self):
+        response = self.client.post('/tickets/create', {
+            'name': 'New', 'project_id': str(self.project.id), 'assignee_id': str(self.bob.id),
+        }, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 201)
+        ticket_id = response.json()['id']
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.open_ticket_count, 1)
+
+        self.client.patch(f'/tickets/{ticket_id}', {'status': 'DONE', 'assignee_id': str(self.alice.id)},
+                          content_type='application/json', **self.auth)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_count, self.project.done_count), (0, 1))
+        self.assertCountersExact()
+
+        self.client.delete(f'/tickets/{ticket_id}/delete', **self.auth)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.done_count, 0)
+        self.assertCountersExact()
+
+    def test_comment_writes(self):
+        self.add_tickets(1, comments=0)
+        ticket = Ticket.objects.get()
+        response = self.client.post(f'/tickets/{ticket.id}/comments/create', {'content': 'Hi'},
+                                    content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 201)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.comment_count, 1)
+
+        self.client.delete(f'/comments/{response.json()["id"]}/delete', **self.auth)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.comment_count, 0)
+        self.assertCountersExact()
+
+    def test_cascading_deletes(self):
+        self.add_tickets(8, comments=3)
+        ticket = Ticket.objects.first()
+        self.client.delete(f'/tickets/{ticket.id}/delete', **self.auth)
+        self.assertCountersExact()
+
+        self.client.delete(f'/projects/{self.project.id}/delete', **self.auth)
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.open_ticket_count, self.bob.open_ticket_count), (0, 0))
+        self.assertCountersExact()
+
+
+@override_settings(NOTIFICATION_TRANSPORT='board.notifications.FakeTransport', NOTIFICATION_DIGEST_WINDOW=0)
+class NotificationOutboxTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_tickets(1, comments=0)
+        self.ticket = Ticket.objects.get()
+
+    def comment(self, ticket, content='Hi'):
+        return self.client.post(f'/tickets/{ticket.id}/comments/create', {'content': content},
+                                content_type='application/json', **self.auth)
+
+    def test_comment_queues_and_worker_sends(self):
+        self.assertEqual(self.comment(self.ticket).status_code, 201)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.ticket.assignee.email)
+
+        transport = FakeTransport(latency_ms=0, failure_rate=0)
+        worker = OutboxWorker(transport)
+        try:
+            self.assertEqual(worker.run_once(), (1, 0, 0))
+        finally:
+            worker.close()
+        self.assertEqual([m['to'] for m in transport.sent], [self.ticket.assignee.email])
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.Status.SENT)
+
+    def test_failed_send_is_retried_later(self):
+        self.comment(self.ticket)
+        worker = OutboxWorker(FakeTransport(latency_ms=0, failure_rate=1), max_attempts=2)
+        try:
+            self.assertEqual(worker.run_once(), (0, 1, 0))
+            notification = Notification.objects.get()
+            self.assertEqual((notification.status, notification.attempts), (Notification.Status.PENDING, 1))
+            self.assertGreater(notification.next_attempt_at, timezone.now())
+            # Not due again until the backoff has passed
+            self.assertEqual(worker.run_once(), (0, 0, 0))
+        finally:
+            worker.close()
+
+    @override_settings(NOTIFICATION_TRANSPORT='board.notifications.SendGridTransport', SENDGRID_API_KEY='')
+    def test_nothing_queued_without_transport(self):
+        self.assertEqual(self.comment(self.ticket).status_code, 201)
+        self.assertFalse(Notification.objects.exists())
+
+
+@override_settings(NOTIFICATION_TRANSPORT='board.notifications.FakeTransport', NOTIFICATION_DIGEST_WINDOW=120)
+class NotificationDigestTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Tickets 0 and 2 are assigned to bob, ticket 1 to alice
+        self.add_tickets(3, comments=0)
+        self.tickets = list(Ticket.objects.order_by('name'))
+        self.transport = FakeTransport(latency_ms=0, failure_rate=0)
+
+    def comment(self, ticket, content='Hi'):
+        self.client.post(f'/tickets/{ticket.id}/comments/create', {'content': content},
+                         content_type='application/json', **self.auth)
+
+    def run_worker(self, due=None, **options):
+        # Notifications wait out the digest window; end it for the given ones
+        Notification.objects.filter(id__in=due or Notification.objects.values('id')).update(
+            next_attempt_at=timezone.now()
+        )
+        worker = OutboxWorker(self.transport, **options)
+        try:
+            return worker.run_once()
+        finally:
+            worker.close()
+
+    def test_held_for_the_window(self):
+        self.comment(self.tickets[0])
+        worker = OutboxWorker(self.transport)
+        try:
+            self.assertEqual(worker.run_once(), (0, 0, 0))
+        finally:
+            worker.close()
+
+    def test_waiting_notifications_join_a_due_one(self):
+        for content in ('One', 'Two', 'Three'):
+            self.comment(self.tickets[0], content)
+        self.comment(self.tickets[1])
+        first = Notification.objects.order_by('created_at').first()
+        self.assertEqual(self.run_worker(due=[first.id]), (3, 0, 2))
+        [message] = self.transport.sent
+        self.assertEqual(message['to'], self.bob.email)
+        self.assertEqual(message['subject'], '3 new comments on your tickets')
+        # Alice's notification wasn't due and has no digest to join
+        self.assertEqual(Notification.objects.filter(status=Notification.Status.PENDING).get().recipient,
+                         self.alice.email)
+
+    def test_digest_max_batch(self):
+        for content in ('One', 'Two', 'Three'):
+            self.comment(self.tickets[0], content)
+        self.assertEqual(self.run_worker(digest_max_batch=2), (3, 0, 1))
+        self.assertEqual(sorted(message['subject'] for message in self.transport.sent),
+                         ['2 new comments on your tickets', 'New comment on your ticket'])
+
+    def test_digest_by_ticket(self):
+        self.comment(self.tickets[0])
+        self.comment(self.tickets[2])
+        self.assertEqual(self.run_worker(digest_by_ticket=True), (2, 0, 0))
+        self.assertEqual(len(self.transport.sent), 2)
+
+
+# Most queries each route in board/urls.py may run against the budget
+# fixture: url name -> (method, path, body, budget). Paths and bodies are
+# formatted with the fixture's ids. A budget is part of the route's
+# contract: change one only in the commit that changes what the route
+# does, and say why there. Authentication costs two queries (token,
+# user). Deletes cascade to tickets and comments in batches, one DELETE
+# per 100 rows, so theirs barely move with the fixture's size.
+QUERY_BUDGETS = {
+    'signup': ('POST', '/signup', {
+        'email': 'budget-new@example.com', 'password': 'x', 'name': 'New', 'signup_token': SIGNUP_TOKEN,
+    }, 7),
+    'login': ('POST', '/login', {'email': 'test-alice@example.com', 'password': 'x'}, 2),
+    'logout': ('POST', '/logout', None, 4),
+    'search_assignees': ('GET', '/assignees?prefix=test', None, 3),
+    'get_tickets': ('GET', '/tickets', None, 10),
+    'create_ticket': ('POST', '/tickets/create', {
+        'name': 'New', 'project_id': '{project}', 'assignee_id': '{bob}',
+    }, 13),
+    'bulk_tickets': ('POST', '/tickets/bulk', {'operations': [
+        {'op': 'create', 'name': 'Bulk', 'project_id': '{project}', 'assignee_id': '{bob}'},
+        {'op': 'update', 'id': '{ticket}', 'status': 'DONE'},
+        {'op': 'delete', 'id': '{bulk_doomed_ticket}'},
+    ]}, 30),
+    'update_ticket': ('PATCH', '/tickets/{ticket}', {'status': 'IN_PROGRESS', 'assignee_id': '{alice}'}, 13),
+    'delete_ticket': ('DELETE', '/tickets/{doomed_ticket}/delete', None, 9),
+    'get_projects': ('GET', '/projects', None, 3),
+    'create_project': ('POST', '/projects/create', {'name': 'New'}, 4),
+    'get_project': ('GET', '/projects/{project}', None, 3),
+    'get_project_stats': ('GET', '/projects/{project}/stats', None, 3),
+    'update_project': ('PATCH', '/projects/{project}/update', {'name': 'Renamed'}, 6),
+    'delete_project': ('DELETE', '/projects/{doomed_project}/delete', None, 14),
+    'get_comments': ('GET', '/tickets/{ticket}/comments', None, 4),
+    'create_comment': ('POST', '/tickets/{ticket}/comments/create', {'content': 'New'}, 9),
+    'update_comment': ('PATCH', '/comments/{comment}', {'content': 'Edited'}, 7),
+    'delete_comment': ('DELETE', '/comments/{comment}/delete', None, 8),
+    'search': ('GET', '/search?q=budget', None, 4),
+    'get_changes': ('GET', '/changes', None, 3),
+    'stream_project_events': ('GET', '/projects/{project}/events', None, 4),
+}
+
+# Routes that only serve ASGI requests, so they are requested through AsyncClient
+ASGI_ROUTES = {'stream_project_events'}
+
+
+def _format(value, ids):
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, list):
+        return [_format(item, ids) for item in value]
+    if isinstance(value, dict):
+        return {key: _format(item, ids) for key, item in value.items()}
+    return value
+
+
+async def _asgi_request(client, method, path, body, token):
+    return await getattr(client, method.lower())(
+        path, body, content_type='application/json', headers={'Authorization': f'Token {token}'},
+    )
+
+
+@override_settings(BOARD_SNAPSHOT_CACHE=False, CONDITIONAL_GET=False)
+class QueryBudgetTests(BoardTestCase):
+    """
+    Every route stays within its query budget and repeats no statement
+    (a probable N+1) against a fixture with enough tickets and comments
+    that a per-row query overshoots by dozens.
+    """
+    TICKETS = 20
+    COMMENTS_PER_TICKET = settings.QUERY_PROFILER_REPEAT_THRESHOLD + 1
+
+    def fixture(self):
+        doomed_project = Project.objects.create(name='Test doomed project', created_by=self.alice)
+        tickets = []
+        for n in range(self.TICKETS):
+            ticket = Ticket.objects.create(
+                name=f'Budget ticket {n}', description='budget', project=self.project,
+                status=Ticket.Status.values[n % len(Ticket.Status.values)],
+                assignee=self.alice if n % 2 else self.bob,
+            )
+            tickets.append(ticket)
+            doomed = Ticket.objects.create(name=f'Budget doomed ticket {n}', project=doomed_project,
+                                           assignee=self.bob)
+            for m in range(self.COMMENTS_PER_TICKET):
+                for parent in (ticket, doomed):
+                    Comment.objects.create(ticket=parent, commentor=self.alice if m % 2 else self.bob,
+                                           content=f'Budget comment {m}')
+        return {
+            'alice': str(self.alice.id), 'bob': str(self.bob.id),
+            'project': str(self.project.id), 'doomed_project': str(doomed_project.id),
+            'ticket': tickets[0].id, 'doomed_ticket': tickets[-1].id, 'bulk_doomed_ticket': tickets[-2].id,
+            'comment': str(Comment.objects.filter(ticket=tickets[0], commentor=self.alice)
+                           .values_list('id', flat=True)[0]),
+        }
+
+    def request(self, name, ids, token):
+        method, path, body, _ = QUERY_BUDGETS[name]
+        path, body = _format(path, ids), _format(body, ids)
+        if name in ASGI_ROUTES:
+            # The thread-sensitive ORM calls run in this thread, inside the test's transaction
+            return async_to_sync(_asgi_request)(AsyncClient(), method, path, body, token)
+        return getattr(self.client, method.lower())(path, body, content_type='application/json',
+                                                    HTTP_AUTHORIZATION=f'Token {token}')
+
+    def routes(self):
+        # Opt-in routes (EVENT_STREAM) are only checked while served
+        return {pattern.name for pattern in urls.urlpatterns if isinstance(pattern, URLPattern)}
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(self.routes() - set(QUERY_BUDGETS), set())
+
+    def test_routes_within_budget(self):
+        ids = self.fixture()
+        token = create_token(self.alice)
+        threshold = settings.QUERY_PROFILER_REPEAT_THRESHOLD
+        # Routes that delete the logged-in user's token or fixture rows go last
+        routes = self.routes()
+        order = sorted((name for name in QUERY_BUDGETS if name in routes),
+                       key=lambda name: (name == 'logout', name.startswith('delete_')))
+        for name in order:
+            with self.subTest(route=name):
+                # Measure authentication uncached, as after a worker restart
+                user_cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.request(name, ids, token)
+                    if getattr(response, 'streaming', False):
+                        # Closing sends request_finished, whose close_old_connections
+                        # would close the connection inside the test's transaction
+                        request_finished.disconnect(close_old_connections)
+                        try:
+                            response.close()
+                        finally:
+                            request_finished.connect(close_old_connections)
+                statements = [query['sql'] for query in queries.captured_queries]
+                self.assertLess(response.status_code, 400)
+                self.assertLessEqual(len(statements), QUERY_BUDGETS[name][3], '\n'.join(statements))
+                self.assertEqual(repeated_statements(statements, threshold), [])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The pool is a Postgres backend')
+class ConnectionPoolTests(SimpleTestCase):
+    """backend/postgresql_pool against the test database, through its own alias."""
+    # Creates the test database whose settings the pool connects with
+    databases = {'default'}
+    alias = 'pool_test'
+
+    def setUp(self):
+        from backend.postgresql_pool.base import DatabaseWrapper
+        settings_dict = {**connection.settings_dict, 'ENGINE': 'backend.postgresql_pool', 'CONN_MAX_AGE': 0,
+                         'OPTIONS': {**connection.settings_dict['OPTIONS'], 'pool': {'max_size': 2}}}
+        self.db = DatabaseWrapper(settings_dict, alias=self.alias)
+        connections[self.alias] = self.db
+        self.pool = self.db.pool
+
+    def tearDown(self):
+        self.db.close()
+        for pooled, _ in list(self.pool._idle):
+            pooled.close()
+        DatabaseWrapper = type(self.db)
+        DatabaseWrapper._pools.pop(self.alias, None)
+        del connections[self.alias]
+
+    def query(self):
+        with self.db.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_close_returns_connection(self):
+        self.query()
+        raw = self.db.connection
+        self.db.close()
+        self.assertEqual([pooled for pooled, _ in self.pool._idle], [raw])
+
+        self.query()
+        self.assertIs(self.db.connection, raw)
+
+    def test_close_inside_atomic_discards_connection(self):
+        with self.assertRaises(InterfaceError):
+            with transaction.atomic(using=self.alias):
+                self.query()
+                self.db.close()
+                # Not handed to anyone else while the block still holds it
+                self.assertEqual(len(self.pool._idle), 0)
+                self.assertEqual(self.pool._size, 0)
+                # The rest of the block can't run outside its transaction
+                self.query()
+        self.assertIsNone(self.db.connection)
+        self.query()
+
+    def test_idle_ping_leaves_no_transaction_open(self):
+        from backend.postgresql_pool.base import CHECK_AFTER_IDLE
+        self.query()
+        raw = self.db.connection
+        raw.autocommit = False
+        self.db.close()
+        # Old enough to be pinged on the next checkout
+        self.pool._idle[-1] = (raw, time.monotonic() - CHECK_AFTER_IDLE - 1)
+
+        self.query()
+        self.assertIs(self.db.connection, raw)
+        self.assertTrue(self.db.get_autocommit())
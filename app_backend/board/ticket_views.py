@@ -1,9 +1,17 @@
+import uuid
+from django.conf import settings
+from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import Ticket, User, Project
-from .serializers import TicketSerializer, UserSerializer
+from .models import Change, Ticket, User, Project
+from .serializers import TicketSerializer, UserSerializer, rows
 from .auth import authenticate_request, create_token, delete_token, get_user_from_token
+from .bulk import apply_operations
+from . import assignees, changes, snapshots
+from .conditional import conditional_get
+from .queries import board_queryset
+from .pagination import PaginationError, get_page_size, paginate, pagination_enabled
 
 # Signup token - in production, this should be in environment variables
 SIGNUP_TOKEN = "ECE1779-2025"
@@ -106,8 +114,11 @@ def logout(request):
 @authenticate_request
 def search_assignees(request):
     """
-    Search for users by name prefix.
-    Query parameter: prefix (required)
+    Search for users by name or email prefix (case-insensitive).
+    Query parameters:
+        prefix (required)
+        limit (optional) - maximum results (default ASSIGNEE_SEARCH_LIMIT)
+    Users most recently assigned a ticket come first.
     Example: GET /assignees?prefix=Ali
     """
     prefix = request.GET.get('prefix', '').strip()
@@ -118,38 +129,139 @@ def search_assignees(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Search users whose name starts with the prefix (case-insensitive)
-    users = User.objects.filter(name__istartswith=prefix)
-    serializer = UserSerializer(users, many=True)
+    try:
+        limit = get_page_size(request, settings.ASSIGNEE_SEARCH_LIMIT)
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(assignees.search(prefix, limit), status=status.HTTP_200_OK)
+
+
+def _group_by_status(serialized_tickets):
+    """Sort serialized tickets into the board's {status: [...]} columns."""
+    grouped_tickets = {
+        'TODO': [],
+        'IN_PROGRESS': [],
+        'DONE': [],
+        'WONT_DO': []
+    }
+    
+    for serialized_ticket in serialized_tickets:
+        grouped_tickets[serialized_ticket['status']].append(serialized_ticket)
+    
+    return grouped_tickets
+
+
+def _board_page(tickets, status_filter, cursor, limit, fields):
+    """Serialize one keyset page per status column, plus the next cursors."""
+    grouped_tickets = {}
+    next_cursors = {}
+    # One keyset page per column: (status, id) range scan, never OFFSET
+    for column in [status_filter] if status_filter else Ticket.Status.values:
+        page, next_cursors[column] = paginate(
+            rows.ticket_rows(tickets.filter(status=column), fields), ['id'], cursor, limit
+        )
+        grouped_tickets[column] = rows.serialize_tickets(page, fields)
+    grouped_tickets['next'] = next_cursors
+    return grouped_tickets
+
+
+def _ticket_fields(request):
+    """Board fields asked for with ?fields= / ?include=comments."""
+    return rows.requested_fields(
+        request, rows.TICKET_OUTPUT, embeds=('comments',), required=('id', 'status')
+    )
+
+
+def _board_scopes(request):
+    """Snapshot scopes the board depends on: one project's, or the whole board's."""
+    try:
+        project_id = uuid.UUID(request.GET.get('project_id', ''))
+    except ValueError:
+        return [snapshots.USERS, snapshots.BOARD]
+    return [snapshots.USERS, snapshots.project_scope(project_id)]
 
 
 @api_view(['GET'])
 @authenticate_request
+@conditional_get(_board_scopes)
 def get_tickets(request):
     """
-    Get all tickets grouped by status (authenticated).
+    Get tickets grouped by status (authenticated).
     Returns: {
         "TODO": [...],
         "IN_PROGRESS": [...],
         "DONE": [...],
         "WONT_DO": [...]
     }
+
+    When pagination is enabled each column holds one page, and the
+    response carries a "next" cursor per column:
+        "next": {"TODO": "<cursor>" | null, ...}
+    Query parameters:
+        project_id (optional) - only return this project's board
+        status (optional) - only return this column
+        cursor (optional) - continue a column; requires status
+        limit (optional) - page size, capped at API_MAX_PAGE_SIZE
+        fields (optional) - comma-separated ticket fields to return, e.g.
+                            fields=name,assignee; id and status are always
+                            returned, comments only with include=comments
+        include (optional) - include=comments embeds comments alongside fields
+    
+    Responses are served from a versioned snapshot cache that ticket,
+    comment and project writes invalidate (see board/snapshots.py), and
+    carry an ETag so unchanged boards are answered with 304.
     """
-    tickets = Ticket.objects.all()
+    # Tickets and their relations are read as values() rows and serialized
+    # without DRF (board/serializers/rows.py): a fixed number of queries
+    # and little CPU no matter how many tickets or comments the board holds
+    tickets = board_queryset()
+    project_id = request.GET.get('project_id')
+    if project_id:
+        try:
+            project_id = str(uuid.UUID(project_id))
+        except ValueError:
+            return Response(
+                {'error': 'Invalid project_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        tickets = tickets.filter(project_id=project_id)
+    try:
+        fields = _ticket_fields(request)
+    except rows.FieldsError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    scopes = _board_scopes(request)
     
-    # Group tickets by status
-    grouped_tickets = {
-        'TODO': [],
-        'IN_PROGRESS': [],
-        'DONE': [],
-        'WONT_DO': []
-    }
+    if not pagination_enabled(request):
+        grouped_tickets = snapshots.get_or_build(
+            'tickets', scopes, {'project_id': project_id, 'fields': fields},
+            lambda: _group_by_status(rows.serialize_tickets(rows.ticket_rows(tickets, fields), fields))
+        )
+        return Response(grouped_tickets, status=status.HTTP_200_OK)
     
-    for ticket in tickets:
-        serialized_ticket = TicketSerializer(ticket).data
-        grouped_tickets[ticket.status].append(serialized_ticket)
+    status_filter = request.GET.get('status')
+    cursor = request.GET.get('cursor')
+    if status_filter and status_filter not in Ticket.Status.values:
+        return Response(
+            {'error': f'status must be one of {", ".join(Ticket.Status.values)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if cursor and not status_filter:
+        return Response(
+            {'error': 'status is required when cursor is provided'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        limit = get_page_size(request)
+        params = {'project_id': project_id, 'status': status_filter, 'cursor': cursor, 'limit': limit,
+                  'fields': fields}
+        grouped_tickets = snapshots.get_or_build(
+            'tickets', scopes, params,
+            lambda: _board_page(tickets, status_filter, cursor, limit, fields)
+        )
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     return Response(grouped_tickets, status=status.HTTP_200_OK)
 
@@ -191,8 +303,12 @@ def create_ticket(request):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        # Save with project and assignee
-        ticket = serializer.save(project=project, assignee=assignee)
+        # Save with project and assignee; the save signal updates the
+        # project and assignee counters in the same transaction
+        with transaction.atomic():
+            ticket = serializer.save(project=project, assignee=assignee)
+            if assignee:
+                assignees.record_assignment(assignee.id)
         
         return Response(TicketSerializer(ticket).data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -242,11 +358,61 @@ def update_ticket(request, ticket_id):
     
     serializer = TicketSerializer(ticket, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save(**update_kwargs)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        previous_project_id = ticket.project_id
+        with transaction.atomic():
+            if 'project' in update_kwargs and update_kwargs['project'].id != previous_project_id:
+                # The save signal only covers the new project: tell clients
+                # syncing the old project that the ticket left it
+                changes.record(Change.Entity.TICKET, ticket.id, previous_project_id, Change.Action.DELETE)
+                snapshots.bump(snapshots.project_scope(previous_project_id))
+            serializer.save(**update_kwargs)
+            if 'assignee' in update_kwargs:
+                assignees.record_assignment(update_kwargs['assignee'].id)
+        # Re-read with the relations loaded: serializing the saved instance
+        # would look up each comment's commentor separately
+        ticket = board_queryset().get(id=ticket.id)
+        return Response(TicketSerializer(ticket).data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@authenticate_request
+def bulk_tickets(request):
+    """
+    Create, update and delete many tickets in one transaction (authenticated).
+    Body: {
+        "operations": [
+            {"op": "create", "name": "...", "project_id": "uuid", "assignee_id": "uuid", ...},
+            {"op": "update", "id": 4, "status": "DONE", "assignee_id": "uuid", ...},
+            {"op": "delete", "id": 5}
+        ],
+        "atomic": false
+    }
+    Returns {"results": [...]} with one entry per operation, in order:
+        {"index": 0, "op": "create", "status": 201, "ticket": {...}}
+        {"index": 2, "op": "delete", "status": 404, "error": "Ticket not found"}
+    Invalid operations are skipped; with "atomic": true any invalid
+    operation cancels the whole batch and the response is 400.
+    """
+    operations = request.data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return Response(
+            {'error': 'operations must be a non-empty list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(operations) > settings.BULK_MAX_OPERATIONS:
+        return Response(
+            {'error': f'At most {settings.BULK_MAX_OPERATIONS} operations per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    results, applied = apply_operations(operations, atomic=bool(request.data.get('atomic')))
+    return Response(
+        {'results': results},
+        status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST
+    )
+
+
 @api_view(['DELETE'])
 @authenticate_request
 def delete_ticket(request, ticket_id):
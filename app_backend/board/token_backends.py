@@ -0,0 +1,351 @@
+"""
+Pluggable token storage for board.auth.
+
+The backend is chosen with the AUTH_TOKEN_BACKEND setting (dotted path):
+- DatabaseTokenBackend: tokens in the auth_token table, shared by every
+  worker and pod and surviving restarts (default)
+- CacheTokenBackend: tokens in a Django cache; point the cache at a cache
+  server (REDIS_URL) to share it between processes
+- InMemoryTokenBackend: per-process dict, for tests and single-process dev
+
+Every backend gives tokens a TTL (AUTH_TOKEN_TTL) with sliding expiry:
+each successful lookup pushes the expiry forward. Lookups are a hash or
+primary-key hit. Bounded backends are trimmed by a background sweeper.
+"""
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def generate_token():
+    """Generate a secure random token."""
+    return secrets.token_urlsafe(32)
+
+
+class BaseTokenBackend:
+    """
+    Interface shared by token backends.
+    Each user holds at most one live token; creating a token for a user
+    who already has one returns the existing token.
+    """
+    # Whether expired/excess tokens must be removed by the sweeper
+    needs_sweeper = False
+
+    def __init__(self, ttl=None, max_tokens=None):
+        self.ttl = ttl if ttl is not None else settings.AUTH_TOKEN_TTL
+        self.max_tokens = max_tokens if max_tokens is not None else settings.AUTH_TOKEN_MAX
+
+    def create(self, user_id):
+        """Return the user's live token, creating one if needed."""
+        raise NotImplementedError
+
+    def get_user_id(self, token):
+        """Return the user id for a live token (extending it), else None."""
+        raise NotImplementedError
+
+    def delete(self, token):
+        """Delete a token. Returns the user id it belonged to, or None."""
+        raise NotImplementedError
+
+    def delete_user(self, user_id):
+        """Delete the user's token. Returns the deleted token, or None."""
+        raise NotImplementedError
+
+    def count(self):
+        """Number of live tokens, or None if the backend can't tell cheaply."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Delete every token."""
+        raise NotImplementedError
+
+    def sweep(self):
+        """Remove expired tokens and trim to max_tokens. Returns the number removed."""
+        return 0
+
+
+class InMemoryTokenBackend(BaseTokenBackend):
+    """
+    Tokens in a per-process dict. Not shared between workers and lost on
+    restart, so only suitable for tests and single-process development.
+    Kept in least-recently-used order so trimming drops idle tokens first.
+    """
+    needs_sweeper = True
+
+    def __init__(self, ttl=None, max_tokens=None):
+        super().__init__(ttl, max_tokens)
+        self._lock = threading.Lock()
+        # Format: {token: (user_id, expires_at)}, least recently used first
+        self._tokens = OrderedDict()
+        # Format: {user_id: token} for quick user->token lookup
+        self._user_tokens = {}
+
+    def _drop(self, token):
+        user_id, _ = self._tokens.pop(token)
+        self._user_tokens.pop(user_id, None)
+        return user_id
+
+    def create(self, user_id):
+        user_id = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            token = self._user_tokens.get(user_id)
+            if token and self._tokens[token][1] > now:
+                return token
+            if token:
+                self._drop(token)
+            token = generate_token()
+            self._tokens[token] = (user_id, now + self.ttl)
+            self._user_tokens[user_id] = token
+            # Enforce the bound immediately rather than waiting for the sweeper
+            while len(self._tokens) > self.max_tokens:
+                self._drop(next(iter(self._tokens)))
+            return token
+
+    def get_user_id(self, token):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tokens.get(token)
+            if not entry:
+                return None
+            user_id, expires_at = entry
+            if expires_at <= now:
+                self._drop(token)
+                return None
+            self._tokens[token] = (user_id, now + self.ttl)
+            self._tokens.move_to_end(token)
+            return user_id
+
+    def delete(self, token):
+        with self._lock:
+            if token not in self._tokens:
+                return None
+            return self._drop(token)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            token = self._user_tokens.get(str(user_id))
+            if token:
+                self._drop(token)
+            return token
+
+    def count(self):
+        return len(self._tokens)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._user_tokens.clear()
+
+    def sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [token for token, (_, expires_at) in self._tokens.items() if expires_at <= now]
+            for token in expired:
+                self._drop(token)
+            return len(expired)
+
+
+class DatabaseTokenBackend(BaseTokenBackend):
+    """
+    Tokens in the auth_token table, keyed by the token itself so a lookup
+    is a single primary-key hit. To avoid a write on every request the
+    sliding expiry is only pushed forward once it has aged by
+    AUTH_TOKEN_REFRESH_INTERVAL seconds.
+    """
+    needs_sweeper = True
+
+    def __init__(self, ttl=None, max_tokens=None, refresh_interval=None):
+        super().__init__(ttl, max_tokens)
+        self.refresh_interval = (
+            refresh_interval if refresh_interval is not None
+            else settings.AUTH_TOKEN_REFRESH_INTERVAL
+        )
+
+    @property
+    def model(self):
+        from .models import AuthToken
+        return AuthToken
+
+    def create(self, user_id):
+        now = timezone.now()
+        existing = self.model.objects.filter(user_id=user_id, expires_at__gt=now).first()
+        if existing:
+            return existing.key
+        token = generate_token()
+        try:
+            with transaction.atomic():
+                # Only an expired token, never one a racing login just made
+                self.model.objects.filter(user_id=user_id, expires_at__lte=now).delete()
+                self.model.objects.create(
+                    key=token,
+                    user_id=user_id,
+                    expires_at=now + timedelta(seconds=self.ttl),
+                )
+        except IntegrityError:
+            # A concurrent login for the same user inserted first (one token
+            # per user is a unique constraint); hand out its token instead
+            return self.create(user_id)
+        return token
+
+    def get_user_id(self, token):
+        now = timezone.now()
+        row = self.model.objects.filter(key=token).values_list('user_id', 'expires_at').first()
+        if not row:
+            return None
+        user_id, expires_at = row
+        if expires_at <= now:
+            self.model.objects.filter(key=token).delete()
+            return None
+        new_expiry = now + timedelta(seconds=self.ttl)
+        if new_expiry - expires_at >= timedelta(seconds=self.refresh_interval):
+            self.model.objects.filter(key=token).update(expires_at=new_expiry)
+        return str(user_id)
+
+    def delete(self, token):
+        row = self.model.objects.filter(key=token).values_list('user_id', flat=True).first()
+        if row is None:
+            return None
+        self.model.objects.filter(key=token).delete()
+        return str(row)
+
+    def delete_user(self, user_id):
+        token = self.model.objects.filter(user_id=user_id).values_list('key', flat=True).first()
+        if token:
+            self.model.objects.filter(user_id=user_id).delete()
+        return token
+
+    def count(self):
+        return self.model.objects.filter(expires_at__gt=timezone.now()).count()
+
+    def clear(self):
+        self.model.objects.all().delete()
+
+    def sweep(self):
+        removed, _ = self.model.objects.filter(expires_at__lte=timezone.now()).delete()
+        excess = self.model.objects.count() - self.max_tokens
+        if excess > 0:
+            # Drop the tokens closest to expiry, i.e. the least recently used
+            oldest = self.model.objects.order_by('expires_at').values_list('key', flat=True)[:excess]
+            trimmed, _ = self.model.objects.filter(key__in=list(oldest)).delete()
+            removed += trimmed
+        return removed
+
+
+class CacheTokenBackend(BaseTokenBackend):
+    """
+    Tokens in a Django cache (AUTH_TOKEN_CACHE alias). Entries carry the
+    TTL natively, so no sweeper is needed; size is bounded by the cache
+    server's own eviction policy.
+
+    The cache is usually shared with snapshots and everything else, so
+    entries are stored under a generation number (the cache key version)
+    and clear() starts a new generation instead of flushing the cache; the
+    old entries are never read again and expire on their own.
+    """
+    GENERATION_KEY = 'auth:generation'
+
+    def __init__(self, ttl=None, max_tokens=None, alias=None):
+        super().__init__(ttl, max_tokens)
+        self.cache = caches[alias or settings.AUTH_TOKEN_CACHE]
+
+    @staticmethod
+    def _token_key(token):
+        return f'auth:token:{token}'
+
+    @staticmethod
+    def _user_key(user_id):
+        return f'auth:user:{user_id}'
+
+    @staticmethod
+    def _new_generation():
+        # Seeded from the clock, so a counter lost to eviction or a cache
+        # restart never brings back a cleared generation
+        return time.time_ns()
+
+    def _generation(self):
+        generation = self.cache.get(self.GENERATION_KEY)
+        if generation is None:
+            self.cache.add(self.GENERATION_KEY, self._new_generation(), timeout=None)
+            generation = self.cache.get(self.GENERATION_KEY)
+        return generation
+
+    def create(self, user_id):
+        user_id = str(user_id)
+        generation = self._generation()
+        token = self.cache.get(self._user_key(user_id), version=generation)
+        if token and self.cache.get(self._token_key(token), version=generation) == user_id:
+            return token
+        token = generate_token()
+        self.cache.set_many({
+            self._token_key(token): user_id,
+            self._user_key(user_id): token,
+        }, timeout=self.ttl, version=generation)
+        return token
+
+    def get_user_id(self, token):
+        generation = self._generation()
+        user_id = self.cache.get(self._token_key(token), version=generation)
+        if user_id is None:
+            return None
+        self.cache.touch(self._token_key(token), self.ttl, version=generation)
+        self.cache.touch(self._user_key(user_id), self.ttl, version=generation)
+        return user_id
+
+    def delete(self, token):
+        generation = self._generation()
+        user_id = self.cache.get(self._token_key(token), version=generation)
+        if user_id is None:
+            return None
+        self.cache.delete_many([self._token_key(token), self._user_key(user_id)], version=generation)
+        return user_id
+
+    def delete_user(self, user_id):
+        generation = self._generation()
+        token = self.cache.get(self._user_key(user_id), version=generation)
+        keys = [self._user_key(user_id)]
+        if token:
+            keys.append(self._token_key(token))
+        self.cache.delete_many(keys, version=generation)
+        return token
+
+    def count(self):
+        return None
+
+    def clear(self):
+        try:
+            self.cache.incr(self.GENERATION_KEY)
+        except ValueError:
+            # Counter missing: any fresh generation leaves the old entries behind
+            self.cache.set(self.GENERATION_KEY, self._new_generation(), timeout=None)
+
+
+class TokenSweeper(threading.Thread):
+    """Daemon thread that periodically calls backend.sweep()."""
+
+    def __init__(self, backend, interval):
+        super().__init__(name='token-sweeper', daemon=True)
+        self.backend = backend
+        self.interval = interval
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                removed = self.backend.sweep()
+                if removed:
+                    logger.info(f"Token sweeper removed {removed} tokens")
+            except Exception as e:
+                logger.error(f"Token sweep failed: {str(e)}")
+            finally:
+                # Don't hold a database connection open between sweeps
+                connection.close()
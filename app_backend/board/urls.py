@@ -1,5 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from . import ticket_views, project_views, comment_views
+from . import ticket_views, project_views, comment_views, change_views, event_views, search_views
+
+if settings.ASYNC_VIEWS:
+    # Async read endpoints (board/async_views.py) for ASGI deployments
+    from . import async_views
+    ticket_reads = project_reads = comment_reads = async_views
+else:
+    ticket_reads, project_reads, comment_reads = ticket_views, project_views, comment_views
 
 urlpatterns = [
     # Authentication
@@ -8,25 +16,38 @@ urlpatterns = [
     path('logout', ticket_views.logout, name='logout'),
     
     # Users/Assignees
-    path('assignees', ticket_views.search_assignees, name='search_assignees'),
+    path('assignees', ticket_reads.search_assignees, name='search_assignees'),
     
     # Tickets
-    path('tickets', ticket_views.get_tickets, name='get_tickets'),
+    path('tickets', ticket_reads.get_tickets, name='get_tickets'),
     path('tickets/create', ticket_views.create_ticket, name='create_ticket'),
+    path('tickets/bulk', ticket_views.bulk_tickets, name='bulk_tickets'),
     path('tickets/<int:ticket_id>', ticket_views.update_ticket, name='update_ticket'),
     path('tickets/<int:ticket_id>/delete', ticket_views.delete_ticket, name='delete_ticket'),
     
     # Projects
-    path('projects', project_views.get_projects, name='get_projects'),
+    path('projects', project_reads.get_projects, name='get_projects'),
     path('projects/create', project_views.create_project, name='create_project'),
-    path('projects/<uuid:project_id>', project_views.get_project, name='get_project'),
+    path('projects/<uuid:project_id>', project_reads.get_project, name='get_project'),
+    path('projects/<uuid:project_id>/stats', project_reads.get_project_stats, name='get_project_stats'),
     path('projects/<uuid:project_id>/update', project_views.update_project, name='update_project'),
     path('projects/<uuid:project_id>/delete', project_views.delete_project, name='delete_project'),
     
     # Comments
-    path('tickets/<int:ticket_id>/comments', comment_views.get_comments, name='get_comments'),
+    path('tickets/<int:ticket_id>/comments', comment_reads.get_comments, name='get_comments'),
     path('tickets/<int:ticket_id>/comments/create', comment_views.create_comment, name='create_comment'),
     path('comments/<uuid:comment_id>', comment_views.update_comment, name='update_comment'),
     path('comments/<uuid:comment_id>/delete', comment_views.delete_comment, name='delete_comment'),
+    
+    # Search
+    path('search', search_views.search, name='search'),
+    
+    # Delta sync
+    path('changes', change_views.get_changes, name='get_changes'),
 ]
 
+if settings.EVENT_STREAM:
+    # Opt-in server push, ASGI only (see README)
+    urlpatterns.append(
+        path('projects/<uuid:project_id>/events', event_views.stream_project_events, name='stream_project_events'),
+    )
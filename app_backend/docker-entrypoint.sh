@@ -1,5 +1,23 @@
 #!/bin/sh
 set -e
-python manage.py migrate --noinput
-python manage.py seed_data || true
-exec gunicorn backend.wsgi:application --bind 0.0.0.0:${PORT:-8000} --workers 1
\ No newline at end of file
+# Start of the cold-start time each server process reports (STARTUP_BUDGET_SECONDS)
+export BOOT_STARTED_AT=$(date +%s.%N)
+# Migrates only when migrations are pending, one pod at a time, and seeds an
+# empty database; with MIGRATE_ON_START=false pods wait for a migration job.
+# Migrations and their advisory lock need a session of their own, which a
+# transaction-mode pooler doesn't give: DATABASE_DIRECT_URL bypasses it
+if [ "${MIGRATE_ON_START:-true}" = "true" ]; then
+  DATABASE_URL="${DATABASE_DIRECT_URL:-$DATABASE_URL}" DATABASE_POOLER=false python manage.py startup --seed
+else
+  DATABASE_URL="${DATABASE_DIRECT_URL:-$DATABASE_URL}" DATABASE_POOLER=false python manage.py startup --no-migrate --seed
+fi
+# Deliver queued email notifications from one long-lived background worker,
+# which backs off while the outbox is empty and exits if mail isn't configured
+if [ "${NOTIFICATION_WORKER:-true}" = "true" ]; then
+  python manage.py send_notifications &
+fi
+# SERVER_MODE=asgi serves through uvicorn, which event streams need
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+  exec uvicorn backend.asgi:application --host 0.0.0.0 --port ${PORT:-8000} --workers ${WEB_CONCURRENCY:-2}
+fi
+exec gunicorn backend.wsgi:application --bind 0.0.0.0:${PORT:-8000} --workers ${WEB_CONCURRENCY:-2}
\ No newline at end of file
@@ -57,3 +57,23 @@ client.interceptors.response.use(
 )
 
 export default client
+
+/**
+ * Fetch every page of a cursor-paginated list endpoint.
+ * Paginated responses look like { results: [...], next: "<cursor>" | null };
+ * the first request sends no limit or cursor, so unless API_PAGINATION=true
+ * the backend answers with the full list as a plain array.
+ */
+export const collectPages = async (url) => {
+  const items = []
+  let cursor = null
+  do {
+    const sep = url.includes('?') ? '&' : '?'
+    const pageUrl = cursor ? `${url}${sep}cursor=${encodeURIComponent(cursor)}` : url
+    const data = await client.get(pageUrl).then(r => r.data)
+    if (Array.isArray(data)) return data
+    items.push(...data.results)
+    cursor = data.next
+  } while (cursor)
+  return items
+}
@@ -1,10 +1,10 @@
-import client from './client.js'
+import client, { collectPages } from './client.js'
 
 /**
  * Get all comments for a specific ticket
  */
 export const getComments = (ticketId) => 
-  client.get(`/tickets/${ticketId}/comments`).then(r => r.data)
+  collectPages(`/tickets/${ticketId}/comments`)
 
 /**
  * Create a new comment on a ticket
@@ -1,6 +1,6 @@
-import client from './client.js'
+import client, { collectPages } from './client.js'
 
-export const listProjects = () => client.get('/projects').then(r => r.data)
+export const listProjects = () => collectPages('/projects')
 
 export const getProject = (id) => client.get(`/projects/${id}`).then(r => r.data)
 
@@ -1,15 +1,32 @@
 import client from './client.js'
 
+const STATUSES = ['TODO', 'IN_PROGRESS', 'DONE', 'WONT_DO']
+
 /**
  * List all tickets, optionally filtered by project
  * Backend returns tickets grouped by status: { TODO: [...], IN_PROGRESS: [...], DONE: [...], WONT_DO: [...] }
- * This function flattens them into a single array and filters by projectId if provided
+ * plus a per-column "next" cursor when paginated; remaining pages are fetched column by column.
+ * The backend filters by projectId if provided; this function flattens the columns into a single array
  */
 export const listTickets = async (projectId) => {
-  const groupedTickets = await client.get('/tickets').then(r => r.data)
+  const projectParam = projectId ? `project_id=${encodeURIComponent(projectId)}` : ''
+  const groupedTickets = await client.get(projectId ? `/tickets?${projectParam}` : '/tickets').then(r => r.data)
+  
+  // Follow each column's cursor until it is exhausted
+  const next = groupedTickets.next || {}
+  await Promise.all(STATUSES.map(async (status) => {
+    let cursor = next[status]
+    while (cursor) {
+      const page = await client
+        .get(`/tickets?status=${status}&cursor=${encodeURIComponent(cursor)}${projectId ? `&${projectParam}` : ''}`)
+        .then(r => r.data)
+      groupedTickets[status].push(...page[status])
+      cursor = page.next[status]
+    }
+  }))
   
   // Flatten all tickets from grouped response
-  const allTickets = Object.values(groupedTickets).flat()
+  const allTickets = STATUSES.flatMap(status => groupedTickets[status] || [])
   
   // Filter by project if projectId is provided
   if (projectId) {